@@ -0,0 +1,372 @@
+# All of our imports, these are built-in libraries (numpy is optional, it's used if it's installed)
+from __future__ import annotations  # Type hinting
+from array import array				# The columns, they grow one row at a time and numpy can read them without copying
+from datetime import date			# Turns day numbers back into dates for the report
+
+from main import Diary, Record
+
+try:
+	import numpy
+except ImportError:
+	numpy = None;
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# The periods the booked hours can be grouped by
+PERIODS = ("day", "week", "month");
+
+
+
+# Turn dates into day numbers
+def dayNumber(year, month, day):
+	"""
+	Returns the day number (the same as date.toordinal()) of a date, or of whole numpy columns of dates at once
+	
+	It's plain arithmetic (days from the civil calendar), so it works the same on numbers and numpy arrays
+	
+	Args:
+		year (int | numpy.ndarray): The year
+		month (int | numpy.ndarray): The month of the year
+		day (int | numpy.ndarray): The day of the month
+	
+	Returns:
+		int | numpy.ndarray: The day number
+	"""
+	# Count the year from March, so the leap day is the last day of the year
+	year = year - (month <= 2);
+	era = year // 400;
+	yearOfEra = year - era * 400;
+	dayOfYear = (153 * ((month + 9) % 12) + 2) // 5 + day - 1;
+	dayOfEra = yearOfEra * 365 + yearOfEra // 4 - yearOfEra // 100 + dayOfYear;
+	
+	# 306 days from the 1st of January to the 1st of March of the year before day 1
+	return era * 146097 + dayOfEra - 305;
+
+
+
+# The columns the reports are worked out from
+class _Columns:
+	"""
+	A row for each record: its day number, month, start, end, priority and weight, each column in its own array
+	"""
+	def __init__(this) -> None:
+		this.day = array("i");		# Day number (date.toordinal())
+		this.month = array("i");	# Year * 12 + month - 1, so months can be counted up
+		this.start = array("b");
+		this.end = array("b");
+		this.high = array("b");		# 1 for high priority, 0 for low
+		this.weight = array("b");	# 1 for a record, -1 for a record that has since been updated or deleted
+		this.cancelled = 0;			# How many -1 rows there are
+	
+	
+	
+	
+	# Add a row to the columns
+	def row(this, record: Record, weight: int) -> None:
+		this.day.append(dayNumber(record.year, record.month, record.day));
+		this.month.append(record.year * 12 + record.month - 1);
+		this.start.append(record.start);
+		this.end.append(record.end);
+		this.high.append(1 if(record.priority.lower() == "high") else 0);
+		this.weight.append(weight);
+	
+	
+	
+	
+	# A copy that rows can be added to without changing these columns
+	def copy(this) -> _Columns:
+		columns = _Columns();
+		columns.day = array("i", this.day);
+		columns.month = array("i", this.month);
+		columns.start = array("b", this.start);
+		columns.end = array("b", this.end);
+		columns.high = array("b", this.high);
+		columns.weight = array("b", this.weight);
+		columns.cancelled = this.cancelled;
+		return columns;
+
+
+
+
+# Workload reports for a diary
+class Analytics:
+	"""
+	Keeps the diary's day number, month, start, end and priority as columns, and works out workload reports from them
+	
+	The columns are plain arrays that grow as records are added, numpy reads them without copying.
+	Updates and deletes are added as rows that count as -1, so nothing ever has to be found or rewritten.
+	The columns are only rebuilt after the records are replaced (such as after a sort), or once half of them cancel each other out.
+	
+	The rules of a recurrence.RecurringStore aren't kept in the columns, a report adds the occurrences in its date range
+	to a copy of them, so no other occurrences are ever made.
+	
+	Methods:
+		report(start, end, period) -> dict:
+			Get every workload figure for a range of dates
+		
+		close() -> None:
+			Stop keeping the columns up to date
+	"""
+	def __init__(this, diary: Diary) -> None:
+		"""
+		Build the columns for a diary, and keep them up to date as it changes
+		
+		Args:
+			diary (Diary): The diary to report on
+		"""
+		this.diary = diary;
+		this.columns = _Columns();
+		this._stale = true;  # The columns are built the first time they're needed
+		
+		with diary._lock.writing():
+			diary.onAdd.append(this._add);
+			diary.onUpdate.append(this._update);
+			diary.onReplace.append(this._replaced);
+	
+	
+	
+	
+	# Build the columns from every record in the diary
+	def _rebuild(this) -> None:
+		"""
+		Builds the columns from the records in the diary, the diary must already be locked
+		"""
+		columns = _Columns();
+		
+		# toList() is only the stored records, a RecurringStore's occurrences are added when a report is made
+		records = this.diary.store.toList();
+		columns.start = array("b", [record.start for record in records]);
+		columns.end = array("b", [record.end for record in records]);
+		columns.high = array("b", [record.priority.lower() == "high" for record in records]);
+		columns.weight = array("b", bytes([1]) * len(records));
+		
+		years = [record.year for record in records];
+		months = [record.month for record in records];
+		days = [record.day for record in records];
+		
+		# The day numbers are worked out for the whole column at once if we can
+		if(numpy is not None and len(records) > 0):
+			years = numpy.array(years, dtype=numpy.int64);
+			months = numpy.array(months, dtype=numpy.int64);
+			columns.day = array("i", dayNumber(years, months, numpy.array(days, dtype=numpy.int64)).astype(numpy.int32).tobytes());
+			columns.month = array("i", (years * 12 + months - 1).astype(numpy.int32).tobytes());
+		else:
+			columns.day = array("i", [dayNumber(year, month, day) for year, month, day in zip(years, months, days)]);
+			columns.month = array("i", [year * 12 + month - 1 for year, month in zip(years, months)]);
+		
+		this.columns = columns;
+		this._stale = false;
+	
+	
+	
+	
+	# Called by the diary every time a record is added
+	def _add(this, record: Record) -> None:
+		if(not this._stale):
+			this.columns.row(record, 1);
+	
+	
+	
+	
+	# Called by the diary every time a record is updated or deleted
+	def _update(this, old: Record, new: Record | None) -> None:
+		if(this._stale):
+			return;
+		
+		this.columns.row(old, -1);
+		this.columns.cancelled += 1;
+		
+		if(new is not None):
+			this.columns.row(new, 1);
+		
+		# Once half the rows cancel each other out it's cheaper to start again
+		if(this.columns.cancelled * 4 > len(this.columns.weight)):
+			this._stale = true;
+	
+	
+	
+	
+	# Called by the diary when all its records are replaced, such as after a sort
+	def _replaced(this) -> None:
+		this._stale = true;
+	
+	
+	
+	
+	# Every workload figure for a range of dates
+	def report(this, start: tuple[int, int, int] | None = None, end: tuple[int, int, int] | None = None, period: str = "month") -> dict:
+		"""
+		Works out the workload between two dates
+		
+		Uses numpy if it's installed, otherwise a plain loop over the columns.
+		
+		Args:
+			start (tuple[int, int, int] | None, optional): The first (day, month, year) to include. Defaults to no limit.
+			end (tuple[int, int, int] | None, optional): The last (day, month, year) to include. Defaults to no limit.
+			period (str, optional): "day", "week" (starting on Monday) or "month" to group the booked hours by. Defaults to "month".
+		
+		Returns:
+			dict: The report, with
+				appointments - how many appointments there are,
+				bookedHours - the hours booked in each period with any bookings, by the date the period starts on (yyyy-mm-dd),
+				priority - the appointments and hours of high and low priority,
+				peakHours - how many appointments cover each hour of the day (0 to 23),
+				averageDuration - the average length of an appointment in hours
+		
+		Raises:
+			ValueError: If the period isn't day, week or month
+		"""
+		if(period not in PERIODS):
+			raise ValueError(f"Can't group by {period!r}, the periods are {', '.join(PERIODS)}");
+		
+		low = 0 if(start is None) else dayNumber(start[2], start[1], start[0]);
+		high = 2 ** 31 - 1 if(end is None) else dayNumber(end[2], end[1], end[0]);
+		
+		# A stale rebuild changes the columns, so it needs the diary to itself
+		if(this._stale):
+			with this.diary._lock.writing():
+				if(this._stale):
+					this._rebuild();
+		
+		with this.diary._lock.reading():
+			columns = this.columns;
+			
+			# Only a RecurringStore has rules, the occurrences in the range are added to a copy of the columns
+			rules = getattr(this.diary.store, "rules", ());
+			if(len(rules) > 0):
+				columns = columns.copy();
+				for rule in rules:
+					for record in rule.occurrences(max(low, 1), min(high, date.max.toordinal())):
+						columns.row(record, 1);
+			
+			if(numpy is not None):
+				report = this._reportNumpy(columns, low, high, period);
+			else:
+				report = this._reportLoop(columns, low, high, period);
+		
+		# Turn the period numbers into the date each period starts on
+		labels = {};
+		for bucket, hours in report["bookedHours"]:
+			if(period == "month"):
+				first = date(bucket // 12, bucket % 12 + 1, 1);
+			elif(period == "week"):
+				first = date.fromordinal(bucket * 7 + 1);  # Day 1 was a Monday
+			else:
+				first = date.fromordinal(bucket);
+			
+			labels[first.isoformat()] = hours;
+		
+		report["bookedHours"] = labels;
+		return report;
+	
+	
+	
+	
+	# The numpy version, every figure is worked out over the whole column at once
+	def _reportNumpy(this, columns: _Columns, low: int, high: int, period: str) -> dict:
+		day = numpy.frombuffer(columns.day, dtype=numpy.int32);
+		weight = numpy.frombuffer(columns.weight, dtype=numpy.int8).astype(numpy.int64);
+		start = numpy.frombuffer(columns.start, dtype=numpy.int8).astype(numpy.int64);
+		end = numpy.frombuffer(columns.end, dtype=numpy.int8).astype(numpy.int64);
+		isHigh = numpy.frombuffer(columns.high, dtype=numpy.int8).astype(bool);
+		
+		# Only the rows in the range are kept
+		inRange = (day >= low) & (day <= high);
+		if(not inRange.all()):
+			weight = weight[inRange];
+			start = start[inRange];
+			end = end[inRange];
+			isHigh = isHigh[inRange];
+		
+		if(period == "day"):
+			buckets = day[inRange].astype(numpy.int64);
+		elif(period == "week"):
+			buckets = (day[inRange].astype(numpy.int64) - 1) // 7;
+		else:
+			buckets = numpy.frombuffer(columns.month, dtype=numpy.int32)[inRange].astype(numpy.int64);
+		
+		hours = (end - start) * weight;
+		
+		bookedHours = [];
+		if(len(buckets) > 0):
+			first = int(buckets.min());
+			totals = numpy.bincount(buckets - first, weights=hours);
+			bookedHours = [(first + int(bucket), int(totals[bucket])) for bucket in numpy.flatnonzero(totals)];
+		
+		# Each appointment adds one at its start hour and takes one away at its end, so a running total counts the appointments in each hour
+		changes = numpy.bincount(start, weights=weight, minlength=25)[:25] - numpy.bincount(end, weights=weight, minlength=25)[:25];
+		peakHours = numpy.cumsum(changes)[:24];
+		
+		appointments = int(weight.sum());
+		return {
+			"appointments": appointments,
+			"bookedHours": bookedHours,
+			"priority": {
+				"high": { "appointments": int(weight[isHigh].sum()), "hours": int(hours[isHigh].sum()) },
+				"low": { "appointments": int(weight[~isHigh].sum()), "hours": int(hours[~isHigh].sum()) }
+			},
+			"peakHours": [int(count) for count in peakHours],
+			"averageDuration": float(hours.sum()) / appointments if(appointments > 0) else 0.0
+		};
+	
+	
+	
+	
+	# The plain python version, one row at a time
+	def _reportLoop(this, columns: _Columns, low: int, high: int, period: str) -> dict:
+		totals: dict[int, int] = {};
+		peakHours = [0] * 24;
+		priority = { "high": { "appointments": 0, "hours": 0 }, "low": { "appointments": 0, "hours": 0 } };
+		appointments = 0;
+		totalHours = 0;
+		
+		for row in range(len(columns.weight)):
+			day = columns.day[row];
+			if(day < low or day > high):
+				continue;
+			
+			weight = columns.weight[row];
+			hours = (columns.end[row] - columns.start[row]) * weight;
+			
+			if(period == "day"):
+				bucket = day;
+			elif(period == "week"):
+				bucket = (day - 1) // 7;
+			else:
+				bucket = columns.month[row];
+			
+			totals[bucket] = totals.get(bucket, 0) + hours;
+			
+			for hour in range(max(0, columns.start[row]), min(24, columns.end[row])):
+				peakHours[hour] += weight;
+			
+			load = priority["high" if(columns.high[row]) else "low"];
+			load["appointments"] += weight;
+			load["hours"] += hours;
+			appointments += weight;
+			totalHours += hours;
+		
+		return {
+			"appointments": appointments,
+			"bookedHours": [(bucket, totals[bucket]) for bucket in sorted(totals) if(totals[bucket] != 0)],
+			"priority": priority,
+			"peakHours": peakHours,
+			"averageDuration": totalHours / appointments if(appointments > 0) else 0.0
+		};
+	
+	
+	
+	
+	# Stop keeping the columns up to date
+	def close(this) -> None:
+		"""
+		Stops listening to the diary
+		"""
+		with this.diary._lock.writing():
+			this.diary.onAdd.remove(this._add);
+			this.diary.onUpdate.remove(this._update);
+			this.diary.onReplace.remove(this._replaced);
@@ -0,0 +1,359 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Iterator, Callable	# Type hinting
+from datetime import date, timedelta, datetime	# Used to step through the days of the synthetic diary
+import argparse						# Reads the options from the command line
+import contextlib					# Used to hide the "Loading records" message while timing
+import io							# Used to hide the "Loading records" message while timing
+import json							# Results are written as json so they can be compared between commits
+import os							# Used for the temporary save files and the null output
+import platform						# Recorded with the results, timings from different machines aren't comparable
+import random						# Shuffles the synthetic diary so sorting has something to do
+import sys							# Results go to stdout if no output file is given
+import tempfile						# Somewhere to save and load the diary
+import time							# Used to time each operation
+
+from main import Diary, Record
+from binarydiary import BinaryDiary
+from sqlitestore import SqliteStore
+from shardedstore import ShardedStore
+from export import FORMATS, exportTo
+from analytics import Analytics
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# Make a diary's worth of appointments
+def syntheticRecords(count: int, startYear: int | None = None) -> Iterator[Record]:
+	"""
+	Generates valid appointments that never overlap, one hour long each, filling each day from 7 to 22
+	
+	Args:
+		count (int): How many appointments to generate
+		startYear (int | None, optional): The year to start in. Defaults to next year, so every appointment is in the future.
+	
+	Yields:
+		Record: The appointments, in time order
+	"""
+	day = date((startYear or date.today().year + 1), 1, 1);
+	hour = 7;
+	
+	for index in range(count):
+		yield Record("High" if(index % 3 == 0) else "Low", day.day, day.month, day.year, hour, hour + 1, f"Appointment {index}");
+		
+		hour += 1;
+		if(hour == 22):
+			hour = 7;
+			day += timedelta(days=1);
+
+
+
+
+# Make a shuffled synthetic diary
+def shuffledRecords(count: int) -> list[Record]:
+	"""
+	Returns syntheticRecords() in a shuffled order, the same order every time for the same count
+	
+	Args:
+		count (int): How many appointments to generate
+	
+	Returns:
+		list[Record]: The shuffled appointments
+	"""
+	records = list(syntheticRecords(count, 2030));
+	random.Random(count).shuffle(records);
+	return records;
+
+
+
+
+# Time a function
+def timeIt(function: Callable, *args) -> float:
+	"""
+	Times a single call to a function
+	
+	Args:
+		function (Callable): The function to call
+		*args: The arguments to call it with
+	
+	Returns:
+		float: How long the call took, in seconds
+	"""
+	start = time.perf_counter();
+	function(*args);
+	return time.perf_counter() - start;
+
+
+
+
+# Make a diary without printing the "Loading records" message
+def quietDiary(records: list, store=None) -> Diary:
+	with contextlib.redirect_stdout(io.StringIO()):
+		return Diary(records, store);
+
+
+
+
+# Time every hot path of a diary
+def benchmarkDiary(count: int) -> list[dict]:
+	"""
+	Times loading, expanding, overlap checks, sorting, showing and saving a diary
+	
+	Args:
+		count (int): How many appointments to put in the diary
+	
+	Returns:
+		list[dict]: One result per operation, with the time in seconds
+	"""
+	records = shuffledRecords(count);
+	timings: dict[str, float] = {};
+	
+	diary = None;
+	def load() -> None:
+		nonlocal diary;
+		diary = quietDiary(records);
+	
+	timings["load"] = timeIt(load);
+	timings["expandRecords"] = timeIt(diary._expandRecords);
+	
+	# Half of the checks overlap an existing appointment, half are on days with nothing booked
+	checkCount = min(count, 100000);
+	checks = [];
+	for record in records[:checkCount // 2]:
+		checks.append({ "day": record.day, "month": record.month, "year": record.year, "start": record.start, "end": record.end });
+		checks.append({ "day": record.day, "month": record.month, "year": record.year + 100, "start": record.start, "end": record.end });
+	
+	def overlapChecks() -> None:
+		for check in checks:
+			diary._isConcurrentAppointment(check);
+	
+	timings["overlapCheck"] = timeIt(overlapChecks) / max(1, len(checks));
+	
+	# Each sort starts from the shuffled order
+	for sortMethod, operation in (("time", "sortTime"), ("priority", "sortPriority")):
+		diary._setRecords(list(records));
+		timings[operation] = timeIt(diary.sortBy, sortMethod);
+	
+	with open(os.devnull, "w") as devnull:
+		timings["show"] = timeIt(diary.writeRecords, devnull);
+	
+	with tempfile.TemporaryDirectory() as directory:
+		jsonPath = os.path.join(directory, "records.json");
+		binaryPath = os.path.join(directory, "records.bin");
+		
+		def saveJson() -> None:
+			with open(jsonPath, "w", encoding="utf-8") as file:
+				json.dump(diary.exportRecords(), file);
+		
+		def loadJson() -> None:
+			with open(jsonPath, "r", encoding="utf-8") as file:
+				quietDiary(json.load(file));
+		
+		def openBinary() -> None:
+			with BinaryDiary(binaryPath) as binary:
+				binary[len(binary) - 1];
+		
+		timings["saveJson"] = timeIt(saveJson);
+		timings["loadJson"] = timeIt(loadJson);
+		timings["saveBinary"] = timeIt(BinaryDiary.write, binaryPath, diary.store);
+		timings["openBinary"] = timeIt(openBinary);
+	
+	return [{ "benchmark": "diary", "operation": operation, "records": count, "seconds": seconds } for operation, seconds in timings.items()];
+
+
+
+
+# Time each export format
+def benchmarkExports(count: int) -> list[dict]:
+	"""
+	Times exporting a diary to each format, and to each format with a date range and priority filter
+	
+	Args:
+		count (int): How many appointments to put in the diary
+	
+	Returns:
+		list[dict]: One result per export, with the time in seconds and how many records of the diary that is per second
+	"""
+	records = list(syntheticRecords(count, 2030));
+	diary = quietDiary(records);
+	
+	# A filter that keeps about a sixth of the records: the high priority ones in the first half of the diary
+	middle = records[len(records) // 2] if(len(records) > 0) else Record("High", 1, 1, 2030, 7, 8, "");
+	filters = {
+		"": {},
+		"Filtered": { "start": (1, 1, 2030), "end": (middle.day, middle.month, middle.year), "priority": "high" }
+	};
+	
+	results = [];
+	with tempfile.TemporaryDirectory() as directory:
+		for format in FORMATS:
+			for suffix, options in filters.items():
+				def export() -> None:
+					with open(os.path.join(directory, f"export.{format}"), "w", encoding="utf-8", newline="") as file:
+						exportTo(diary, file, format, **options);
+				
+				seconds = timeIt(export);
+				results.append({ "benchmark": "export", "operation": f"{format}{suffix}", "records": count, "seconds": seconds, "recordsPerSecond": count / seconds if(seconds > 0) else None });
+	
+	return results;
+
+
+
+
+# Time the workload reports
+def benchmarkAnalytics(count: int) -> list[dict]:
+	"""
+	Times building the analytics columns, a report over the whole diary and a report over a single year
+	
+	Args:
+		count (int): How many appointments to put in the diary
+	
+	Returns:
+		list[dict]: One result per operation, with the time in seconds
+	"""
+	diary = quietDiary(list(syntheticRecords(count, 2030)));
+	analytics = Analytics(diary);
+	
+	timings = {
+		"build": timeIt(analytics.report, (1, 1, 2030), (1, 1, 2030)),
+		"reportAll": timeIt(analytics.report),
+		"reportYear": timeIt(analytics.report, (1, 1, 2030), (31, 12, 2030), "day")
+	};
+	
+	return [{ "benchmark": "analytics", "operation": operation, "records": count, "seconds": seconds } for operation, seconds in timings.items()];
+
+
+
+
+# Compare the memory and sqlite stores
+def compareStores(count: int) -> list[dict]:
+	"""
+	Times adding, overlap checks, sorting and listing for a diary in each store
+	
+	Args:
+		count (int): How many appointments to put in the diary
+	
+	Returns:
+		list[dict]: One result per store and operation, with the time in seconds
+	"""
+	records = shuffledRecords(count);
+	appointments = [record.toAppointment() for record in records];
+	checks = [{ "day": record.day, "month": record.month, "year": record.year, "start": record.start, "end": record.end } for record in records[:10000]];
+	
+	results = [];
+	shardDirectory = tempfile.TemporaryDirectory();
+	for storeName, store in (("memory", None), ("sqlite", SqliteStore(":memory:")), ("sharded", ShardedStore(shardDirectory.name))):
+		diary = Diary(store=store);
+		
+		def overlapChecks() -> None:
+			for check in checks:
+				diary._isConcurrentAppointment(check);
+		
+		def show() -> None:
+			with open(os.devnull, "w") as devnull:
+				diary.writeRecords(devnull);
+		
+		timings = {
+			"addRecords": timeIt(diary.addRecords, appointments),
+			"overlapCheck": timeIt(overlapChecks) / max(1, len(checks)),
+			"sortTime": timeIt(diary.sortBy, "time"),
+			"sortPriority": timeIt(diary.sortBy, "priority"),
+			"show": timeIt(show)
+		};
+		
+		for operation, seconds in timings.items():
+			results.append({ "benchmark": "stores", "store": storeName, "operation": operation, "records": count, "seconds": seconds });
+		
+		if(store is not None):
+			store.close();
+	
+	shardDirectory.cleanup();
+	return results;
+
+
+
+
+# Compare two sets of results
+def compareResults(old: dict, new: dict) -> list[str]:
+	"""
+	Lines up two benchmark runs and works out how much slower or faster each operation got
+	
+	Args:
+		old (dict): The results of the earlier run
+		new (dict): The results of the later run
+	
+	Returns:
+		list[str]: A line for each operation that is in both runs
+	"""
+	def key(result: dict) -> tuple:
+		return (result["benchmark"], result.get("store"), result["operation"], result["records"]);
+	
+	oldResults = { key(result): result["seconds"] for result in old["results"] };
+	
+	lines = [];
+	for result in new["results"]:
+		oldSeconds = oldResults.get(key(result));
+		if(oldSeconds is None or oldSeconds == 0):
+			continue;
+		
+		name = "/".join(str(part) for part in key(result) if part is not None);
+		lines.append(f"{name}: {oldSeconds:.6f}s -> {result['seconds']:.6f}s ({result['seconds'] / oldSeconds:.2f}x)");
+	
+	return lines;
+
+
+
+
+# The benchmarks that can be run
+BENCHMARKS: dict[str, Callable[[int], list[dict]]] = {
+	"diary": benchmarkDiary,
+	"stores": compareStores,
+	"export": benchmarkExports,
+	"analytics": benchmarkAnalytics
+};
+
+
+
+# Run the benchmarks from the command line, such as: python benchmark.py 1000 10000 --output results.json
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark the diary's hot paths");
+	parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000], help="How many appointments to benchmark with (10^3 to 10^7)");
+	parser.add_argument("--benchmark", choices=list(BENCHMARKS), action="append", help="Which benchmarks to run, defaults to all of them");
+	parser.add_argument("--output", help="Where to write the json results, defaults to stdout");
+	parser.add_argument("--compare", help="Json results from an earlier run to compare against");
+	args = parser.parse_args();
+	
+	results = [];
+	for size in args.sizes:
+		for name in (args.benchmark or list(BENCHMARKS)):
+			results.extend(BENCHMARKS[name](size));
+	
+	# Everything needed to tell whether two runs can be compared
+	report = {
+		"timestamp": datetime.now().isoformat(timespec="seconds"),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"results": results
+	};
+	
+	if(args.output):
+		with open(args.output, "w", encoding="utf-8") as file:
+			json.dump(report, file, indent="\t");
+	else:
+		json.dump(report, sys.stdout, indent="\t");
+		print();
+	
+	if(args.compare):
+		with open(args.compare, "r", encoding="utf-8") as file:
+			old = json.load(file);
+		
+		for line in compareResults(old, report):
+			print(line, file=sys.stderr);
+
+
+
+if(__name__ == "__main__"):
+	main();
@@ -0,0 +1,294 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Iterable, Iterator	# Type hinting
+import json							# Used to convert to and from the records.json format
+import mmap							# Lets us read the file without loading it all into memory
+import struct						# Packs each record into a fixed number of bytes
+
+from main import Diary, Record
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+# The file starts with a header:
+#	magic (8 bytes), version (2 bytes), record size (2 bytes), record count (8 bytes), padded to 32 bytes
+HEADER = struct.Struct("<8sHHQ12x");
+MAGIC = b"DIARYBIN";
+VERSION = 2;
+READABLE_VERSIONS = (1, 2);  # Version 1 files are the same, they just never have a cased priority
+
+# Followed by every record, each one is exactly 128 bytes:
+#	priority, day, month (1 byte each), year (2 bytes), start, end, description length (1 byte each),
+#	then the description as utf-8, padded with zeros. 30 characters is at most 120 bytes of utf-8
+RECORD = struct.Struct("<BBBHBBB120s");
+
+# Priorities are stored as an index into this tuple so their spelling survives a round trip
+PRIORITIES = ("High", "Low", "high", "low", "HIGH", "LOW");
+
+# The diary accepts high and low in any case, any other spelling is stored as CASED, plus LOW if it's low,
+# plus a bit for each letter that's uppercase (bit 0 for the first letter)
+CASED = 128;
+LOW = 64;
+
+
+
+# Pack a priority into a single byte
+def _packPriority(priority: str) -> int:
+	"""
+	Returns the byte a priority is stored as, keeping its spelling
+	
+	Args:
+		priority (str): High or low, in any case
+	
+	Raises:
+		ValueError: If the priority isn't high or low
+	
+	Returns:
+		int: The index into PRIORITIES, or a CASED byte
+	"""
+	if(priority in PRIORITIES):
+		return PRIORITIES.index(priority);
+	
+	word = priority.lower();
+	if(word != "high" and word != "low"):
+		raise ValueError(f"Priority {priority!r} can't be stored in a binary diary");
+	
+	packed = CASED | (LOW if(word == "low") else 0);
+	for index, letter in enumerate(priority):
+		if(letter.isupper()):
+			packed |= 1 << index;
+	
+	return packed;
+
+
+
+
+# Unpack a priority from its byte
+def _unpackPriority(packed: int) -> str:
+	if(packed < CASED):
+		return PRIORITIES[packed];
+	
+	word = "low" if(packed & LOW) else "high";
+	return "".join(letter.upper() if(packed >> index & 1) else letter for index, letter in enumerate(word));
+
+
+
+# Fixed width binary diary file
+class BinaryDiary:
+	"""
+	A read-only, memory mapped view of a binary diary file
+	
+	Opening the file only reads the header, records are unpacked straight out of the
+	memory map when they're accessed, so memory use doesn't grow with the size of the file.
+	
+	Methods:
+		write(path, records) -> int:
+			Write records to a new binary diary file
+		
+		toDiary() -> Diary:
+			Load every record into a Diary
+		
+		exportRecords() -> Iterator[str]:
+			Get the records in the string format used for saving
+	"""
+	def __init__(this, path: str) -> None:
+		"""
+		Open a binary diary file
+		
+		Args:
+			path (str): The file to open
+		
+		Raises:
+			ValueError: If the file isn't a binary diary, or it's shorter than its header says
+		"""
+		this._file = open(path, "rb");
+		
+		# An empty file can't be mapped at all, so the file has to be closed again if mmap turns it away
+		try:
+			this._map = mmap.mmap(this._file.fileno(), 0, access=mmap.ACCESS_READ);
+		except ValueError:
+			this._file.close();
+			raise ValueError(f"{path} is not a binary diary file");
+		
+		if(len(this._map) < HEADER.size):
+			this.close();
+			raise ValueError(f"{path} is not a binary diary file");
+		
+		magic, version, recordSize, count = HEADER.unpack_from(this._map, 0);
+		if(magic != MAGIC or version not in READABLE_VERSIONS or recordSize != RECORD.size):
+			this.close();
+			raise ValueError(f"{path} is not a binary diary file");
+		
+		# A file cut short would otherwise only fail once a missing record was read
+		if(len(this._map) < HEADER.size + count * RECORD.size):
+			this.close();
+			raise ValueError(f"{path} is truncated, the header says it has {count} records");
+		
+		this._count: int = count;
+	
+	
+	
+	
+	def __len__(this) -> int:
+		return this._count;
+	
+	
+	
+	
+	# Unpack a single record straight from the memory map
+	def __getitem__(this, index: int) -> Record:
+		"""
+		Reads the record at an index without touching any of the others
+		
+		Args:
+			index (int): The index of the record, negative indexes count from the end
+		
+		Returns:
+			Record: The record at the index
+		"""
+		if(index < 0):
+			index += this._count;
+		
+		if(not 0 <= index < this._count):
+			raise IndexError("record index out of range");
+		
+		priority, day, month, year, start, end, length, description = RECORD.unpack_from(this._map, HEADER.size + index * RECORD.size);
+		return Record(_unpackPriority(priority), day, month, year, start, end, description[:length].decode("utf-8"));
+	
+	
+	
+	
+	def __iter__(this) -> Iterator[Record]:
+		for index in range(this._count):
+			yield this[index];
+	
+	
+	
+	
+	def __enter__(this) -> BinaryDiary:
+		return this;
+	
+	
+	def __exit__(this, *args) -> None:
+		this.close();
+	
+	
+	
+	
+	# Close the memory map and the file
+	def close(this) -> None:
+		"""
+		Closes the memory map and the file, records can no longer be read afterwards
+		"""
+		if(not this._map.closed):
+			this._map.close();
+		
+		this._file.close();
+	
+	
+	
+	
+	# Load every record into a diary
+	def toDiary(this) -> Diary:
+		"""
+		Loads every record into a new Diary
+		
+		Returns:
+			Diary: A diary with all of the records
+		"""
+		return Diary(list(this));
+	
+	
+	
+	
+	# Get the records in the semicolon string format
+	def exportRecords(this) -> Iterator[str]:
+		"""
+		Returns the records in the "priority;d/m/y;start;end;description" string format, one at a time
+		
+		Returns:
+			Iterator[str]: The records as strings
+		"""
+		for record in this:
+			yield str(record);
+	
+	
+	
+	
+	# Write records to a new file
+	@staticmethod
+	def write(path: str, records: Iterable[Record | str]) -> int:
+		"""
+		Writes records to a new binary diary file, replacing it if it exists
+		
+		The priority keeps its spelling, any casing of high or low the diary accepts can be stored.
+		
+		Args:
+			path (str): The file to write
+			records (Iterable[Record | str]): Records, or records in the string format
+		
+		Raises:
+			ValueError: If a record can't fit in the fixed width format
+		
+		Returns:
+			int: How many records were written
+		"""
+		count = 0;
+		with open(path, "wb") as file:
+			# The count isn't known yet, so it gets filled in once every record is written
+			file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0));
+			
+			for record in records:
+				if(isinstance(record, str)):
+					record = Record.fromString(record);
+				
+				priority = _packPriority(record.priority);
+				
+				description = record.description.encode("utf-8");
+				if(len(description) > 120):
+					raise ValueError(f"Description {record.description!r} is too long for a binary diary");
+				
+				file.write(RECORD.pack(priority, record.day, record.month, record.year, record.start, record.end, len(description), description));
+				count += 1;
+			
+			file.seek(0);
+			file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count));
+		
+		return count;
+	
+	
+	
+	
+	# Convert a records.json file into a binary diary
+	@staticmethod
+	def fromJson(jsonPath: str, path: str) -> int:
+		"""
+		Converts a records.json file (a list of records in the string format) into a binary diary file
+		
+		Args:
+			jsonPath (str): The json file to read
+			path (str): The binary diary file to write
+		
+		Returns:
+			int: How many records were written
+		"""
+		with open(jsonPath, "r", encoding="utf-8") as file:
+			records = json.load(file);
+		
+		return BinaryDiary.write(path, records);
+	
+	
+	
+	
+	# Convert a binary diary into a records.json file
+	def toJson(this, jsonPath: str) -> None:
+		"""
+		Writes the records to a records.json file (a list of records in the string format)
+		
+		Args:
+			jsonPath (str): The json file to write
+		"""
+		with open(jsonPath, "w", encoding="utf-8") as file:
+			json.dump(list(this.exportRecords()), file, indent="\t");
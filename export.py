@@ -0,0 +1,222 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Iterator, TextIO, Callable	# Type hinting
+from datetime import datetime, timezone	# iCalendar events are stamped with the time they were exported
+import csv							# Quotes descriptions with commas in them
+import io							# Each csv chunk is written to a string first
+import json							# Each JSON Lines row is a json object
+
+from main import Diary, Record
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# Get the records to export, straight from the store
+def _selectRecords(diary: Diary, start: tuple[int, int, int] | None, end: tuple[int, int, int] | None, priority: str | None) -> Iterator[Record]:
+	"""
+	Yields the records to export, filtered by date and priority
+	
+	Args:
+		diary (Diary): The diary to export
+		start (tuple[int, int, int] | None): The first (day, month, year) to export, or None for no limit
+		end (tuple[int, int, int] | None): The last (day, month, year) to export, or None for no limit
+		priority (str | None): Only export this priority - case insensitive, or None for every priority
+	
+	Yields:
+		Record: The records, in time order if a date range was given, otherwise in their stored order
+	"""
+	# A date range is a range of the store's sorted index, otherwise the records are streamed in their stored order
+	with diary._lock.reading():
+		if(start is None and end is None):
+			records = diary.store.slice(0, None);
+		else:
+			low = 0 if(start is None) else (start[2] * 10000 + start[1] * 100 + start[0]) * 100;
+			high = 9999999900 if(end is None) else (end[2] * 10000 + end[1] * 100 + end[0] + 1) * 100;
+			records = diary.store.between(low, high);
+	
+	if(priority is None):
+		yield from records;
+		return;
+	
+	priority = priority.lower();
+	for record in records:
+		if(record.priority.lower() == priority):
+			yield record;
+
+
+
+
+# Group formatted rows into chunks
+def _chunked(rows: Iterator[str], chunkSize: int) -> Iterator[str]:
+	"""
+	Joins rows together so they can be written a chunk at a time
+	
+	Args:
+		rows (Iterator[str]): The rows, each ending in its own newline
+		chunkSize (int): How many rows go into each chunk
+	
+	Yields:
+		str: Chunks of up to chunkSize rows
+	"""
+	chunk = [];
+	for row in rows:
+		chunk.append(row);
+		
+		if(len(chunk) >= chunkSize):
+			yield "".join(chunk);
+			chunk = [];
+	
+	if(len(chunk) > 0):
+		yield "".join(chunk);
+
+
+
+
+# CSV, one row per record
+def renderCsv(diary: Diary, start: tuple[int, int, int] | None = None, end: tuple[int, int, int] | None = None, priority: str | None = None, chunkSize: int = 500) -> Iterator[str]:
+	"""
+	Renders the records as CSV, a chunk at a time
+	
+	Args:
+		diary (Diary): The diary to export
+		start (tuple[int, int, int] | None, optional): The first (day, month, year) to export. Defaults to no limit.
+		end (tuple[int, int, int] | None, optional): The last (day, month, year) to export. Defaults to no limit.
+		priority (str | None, optional): Only export this priority - case insensitive. Defaults to every priority.
+		chunkSize (int, optional): How many rows go into each chunk. Defaults to 500.
+	
+	Yields:
+		str: The header row, then chunks of up to chunkSize rows
+	"""
+	yield "priority,day,month,year,start,end,description\r\n";
+	
+	records = _selectRecords(diary, start, end, priority);
+	while(true):
+		buffer = io.StringIO();
+		writer = csv.writer(buffer);
+		
+		rows = 0;
+		for record in records:
+			writer.writerow((record.priority, record.day, record.month, record.year, record.start, record.end, record.description));
+			
+			rows += 1;
+			if(rows >= chunkSize):
+				break;
+		
+		if(rows == 0):
+			return;
+		
+		yield buffer.getvalue();
+
+
+
+
+# JSON Lines, one appointment object per line
+def renderJsonLines(diary: Diary, start: tuple[int, int, int] | None = None, end: tuple[int, int, int] | None = None, priority: str | None = None, chunkSize: int = 500) -> Iterator[str]:
+	"""
+	Renders the records as JSON Lines, a chunk at a time
+	
+	Args:
+		diary (Diary): The diary to export
+		start (tuple[int, int, int] | None, optional): The first (day, month, year) to export. Defaults to no limit.
+		end (tuple[int, int, int] | None, optional): The last (day, month, year) to export. Defaults to no limit.
+		priority (str | None, optional): Only export this priority - case insensitive. Defaults to every priority.
+		chunkSize (int, optional): How many rows go into each chunk. Defaults to 500.
+	
+	Yields:
+		str: Chunks of up to chunkSize lines
+	"""
+	# Only the text needs escaping, so the numbers are formatted directly instead of dumping a whole dictionary per record
+	rows = (
+		f'{{"priority": {json.dumps(record.priority)}, "day": {record.day}, "month": {record.month}, "year": {record.year}, '
+		f'"start": {record.start}, "end": {record.end}, "description": {json.dumps(record.description)}}}\n'
+		for record in _selectRecords(diary, start, end, priority)
+	);
+	yield from _chunked(rows, chunkSize);
+
+
+
+
+# Escape text for an iCalendar value
+def _icsText(text: str) -> str:
+	return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n");
+
+
+
+
+# iCalendar, one event per record
+def renderIcs(diary: Diary, start: tuple[int, int, int] | None = None, end: tuple[int, int, int] | None = None, priority: str | None = None, chunkSize: int = 500) -> Iterator[str]:
+	"""
+	Renders the records as an iCalendar (.ics) file, a chunk at a time
+	
+	Each record becomes an event with a floating (local) start and end time, high priority is priority 1 and low is 9.
+	
+	Args:
+		diary (Diary): The diary to export
+		start (tuple[int, int, int] | None, optional): The first (day, month, year) to export. Defaults to no limit.
+		end (tuple[int, int, int] | None, optional): The last (day, month, year) to export. Defaults to no limit.
+		priority (str | None, optional): Only export this priority - case insensitive. Defaults to every priority.
+		chunkSize (int, optional): How many events go into each chunk. Defaults to 500.
+	
+	Yields:
+		str: The calendar header, chunks of up to chunkSize events, then the calendar footer
+	"""
+	stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ");
+	yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Diary//Diary export//EN\r\n";
+	
+	def events() -> Iterator[str]:
+		for number, record in enumerate(_selectRecords(diary, start, end, priority)):
+			day = f"{record.year:04d}{record.month:02d}{record.day:02d}";
+			yield (
+				"BEGIN:VEVENT\r\n"
+				f"UID:{stamp}-{number}@diary\r\n"
+				f"DTSTAMP:{stamp}\r\n"
+				f"DTSTART:{day}T{record.start:02d}0000\r\n"
+				f"DTEND:{day}T{record.end:02d}0000\r\n"
+				f"SUMMARY:{_icsText(record.description)}\r\n"
+				f"PRIORITY:{1 if(record.priority.lower() == 'high') else 9}\r\n"
+				"END:VEVENT\r\n"
+			);
+	
+	yield from _chunked(events(), chunkSize);
+	yield "END:VCALENDAR\r\n";
+
+
+
+
+# Each format, and the function that renders it
+FORMATS: dict[str, Callable[..., Iterator[str]]] = {
+	"csv": renderCsv,
+	"jsonl": renderJsonLines,
+	"ics": renderIcs
+};
+
+
+
+
+# Write an export to a stream
+def exportTo(diary: Diary, stream: TextIO, format: str, start: tuple[int, int, int] | None = None, end: tuple[int, int, int] | None = None, priority: str | None = None, chunkSize: int = 500) -> None:
+	"""
+	Writes the records to a text stream in a format, a chunk at a time
+	
+	Files should be opened with newline="" so the line endings are written as they are.
+	
+	Args:
+		diary (Diary): The diary to export
+		stream (TextIO): Where to write the export, such as an open file
+		format (str): "csv", "jsonl" or "ics"
+		start (tuple[int, int, int] | None, optional): The first (day, month, year) to export. Defaults to no limit.
+		end (tuple[int, int, int] | None, optional): The last (day, month, year) to export. Defaults to no limit.
+		priority (str | None, optional): Only export this priority - case insensitive. Defaults to every priority.
+		chunkSize (int, optional): How many records go into each chunk. Defaults to 500.
+	
+	Raises:
+		ValueError: If the format isn't csv, jsonl or ics
+	"""
+	if(format not in FORMATS):
+		raise ValueError(f"Can't export to {format!r}, the formats are {', '.join(FORMATS)}");
+	
+	for chunk in FORMATS[format](diary, start, end, priority, chunkSize):
+		stream.write(chunk);
@@ -0,0 +1,298 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Iterator			# Type hinting
+from contextlib import contextmanager	# Lets batch() be used in a with statement
+
+from main import Diary, Record
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# Undo and redo for a diary
+class History:
+	"""
+	Keeps versions of a diary so changes can be undone and redone
+	
+	A version only holds what changed: the records that were added, updated or deleted, or for a sort (or any other
+	replace) the list of records from before it. The list isn't copied, the store swaps in a new list when it replaces
+	its records, so the old one is kept as it was. Memory grows with the changes made, not with the number of versions.
+	
+	Each change is its own version, unless it's made inside batch(), such as a whole addRecords() import.
+	
+	An undone delete (or redone add) puts the record back at the end of the stored order.
+	
+	Methods:
+		batch() -> ContextManager:
+			Group every change made inside it into a single version
+		
+		undo() -> bool:
+			Go back a version
+		
+		redo() -> bool:
+			Go forward a version
+		
+		restore(version) -> bool:
+			Go back or forward to a version
+		
+		close() -> None:
+			Stop keeping versions
+	"""
+	def __init__(this, diary: Diary, limit: int | None = None) -> None:
+		"""
+		Start keeping versions of a diary, from its current records
+		
+		Args:
+			diary (Diary): The diary to keep versions of
+			limit (int | None, optional): The most versions to be able to undo, the oldest are forgotten. Defaults to no limit.
+		"""
+		this.diary = diary;
+		this.limit = limit;
+		
+		# Each version is a list of changes: ("add", record), ("update", old, new), or ("replace", records)
+		# new is None for a delete, and records is the list of records the diary didn't have at the time
+		this.undoStack: list[list[tuple]] = [];
+		this.redoStack: list[list[tuple]] = [];
+		this.version = 0;
+		
+		this._batch: list[tuple] | None = None;
+		this._batchDepth = 0;
+		this._applying = false;  # Set while undoing or redoing, so those changes aren't recorded as new ones
+		
+		with diary._lock.writing():
+			diary.onAdd.append(this._added);
+			diary.onUpdate.append(this._updated);
+			diary.onBeforeReplace.append(this._replacing);
+	
+	
+	
+	
+	# Record a change
+	def _record(this, change: tuple) -> None:
+		if(this._applying):
+			return;
+		
+		# A new change means the undone versions can't be redone any more
+		this.redoStack = [];
+		
+		if(this._batch is not None):
+			this._batch.append(change);
+			return;
+		
+		this.undoStack.append([change]);
+		this.version += 1;
+		
+		if(this.limit is not None and len(this.undoStack) > this.limit):
+			del this.undoStack[0];
+	
+	
+	
+	
+	# Called by the diary every time a record is added
+	def _added(this, record: Record) -> None:
+		this._record(("add", record));
+	
+	
+	# Called by the diary every time a record is updated or deleted
+	def _updated(this, old: Record, new: Record | None) -> None:
+		this._record(("update", old, new));
+	
+	
+	# Called by the diary just before all its records are replaced, such as by a sort
+	def _replacing(this) -> None:
+		# The store swaps in a new list, so the current one stays as it is and can be kept without copying it
+		if(not this._applying):
+			this._record(("replace", this.diary.store.toList()));
+	
+	
+	
+	
+	# Group changes into one version
+	@contextmanager
+	def batch(this) -> Iterator[None]:
+		"""
+		Groups every change made inside the with statement into a single version, batches can be nested
+		
+		Example:
+			with history.batch():
+				diary.addRecords(rows)
+		"""
+		this._batchDepth += 1;
+		if(this._batchDepth == 1):
+			this._batch = [];
+		
+		try:
+			yield;
+		finally:
+			this._batchDepth -= 1;
+			
+			if(this._batchDepth == 0):
+				changes = this._batch;
+				this._batch = None;
+				
+				if(len(changes) > 0):
+					this.undoStack.append(changes);
+					this.version += 1;
+					
+					if(this.limit is not None and len(this.undoStack) > this.limit):
+						del this.undoStack[0];
+	
+	
+	
+	
+	# Apply a change, forwards or backwards
+	def _apply(this, change: tuple, backwards: bool) -> tuple:
+		"""
+		Applies a change to the store and tells the diary's other listeners about it. The diary must already be locked.
+		
+		Args:
+			change (tuple): The change to apply
+			backwards (bool): True to undo it, False to redo it
+		
+		Returns:
+			tuple: The change, with anything that's needed to apply it the other way next time
+		"""
+		diary = this.diary;
+		store = diary.store;
+		
+		if(change[0] == "add"):
+			record = change[1];
+			if(backwards):
+				store.remove(record);
+				for listener in diary.onUpdate:
+					listener(record, None);
+			else:
+				store.append(record);
+				for listener in diary.onAdd:
+					listener(record);
+		
+		elif(change[0] == "update"):
+			old, new = (change[2], change[1]) if(backwards) else (change[1], change[2]);
+			
+			# A delete is undone by adding the record back, and redone by removing it again
+			if(old is None):
+				store.append(new);
+				for listener in diary.onAdd:
+					listener(new);
+			else:
+				if(new is None):
+					store.remove(old);
+				else:
+					store.update(old, new);
+				
+				for listener in diary.onUpdate:
+					listener(old, new);
+		
+		else:
+			# Swap the lists, keeping the one being replaced so it can be swapped back
+			for listener in diary.onBeforeReplace:
+				listener();
+			
+			current = store.toList();
+			store.replace(change[1]);
+			change = ("replace", current);
+			
+			for listener in diary.onReplace:
+				listener();
+		
+		return change;
+	
+	
+	
+	
+	# Move a version from one stack to the other
+	def _step(this, source: list[list[tuple]], target: list[list[tuple]], backwards: bool) -> bool:
+		if(this._batch is not None or len(source) == 0):
+			return false;
+		
+		with this.diary._lock.writing():
+			this._applying = true;
+			try:
+				changes = source.pop();
+				
+				# Changes are undone in the opposite order to how they were made
+				ordered = reversed(changes) if(backwards) else changes;
+				applied = [this._apply(change, backwards) for change in ordered];
+				target.append(applied[::-1] if(backwards) else applied);
+				
+				this.diary._orderings = {};
+			finally:
+				this._applying = false;
+		
+		this.version += -1 if(backwards) else 1;
+		return true;
+	
+	
+	
+	
+	# Go back a version
+	def undo(this) -> bool:
+		"""
+		Undoes the most recent version
+		
+		Returns:
+			bool: False if there was nothing to undo (or a batch is still open), True if it was undone
+		"""
+		return this._step(this.undoStack, this.redoStack, true);
+	
+	
+	
+	
+	# Go forward a version
+	def redo(this) -> bool:
+		"""
+		Redoes the most recently undone version
+		
+		Returns:
+			bool: False if there was nothing to redo (or a batch is still open), True if it was redone
+		"""
+		return this._step(this.redoStack, this.undoStack, false);
+	
+	
+	
+	
+	# Go to a version
+	def restore(this, version: int) -> bool:
+		"""
+		Undoes or redoes versions until the diary is at a version
+		
+		Args:
+			version (int): The version to go to, as read from history.version
+		
+		Returns:
+			bool: False if the version can't be reached (it was forgotten, never made, or a batch is still open), True if the diary is at it
+		"""
+		if(this._batch is not None):
+			return false;
+		
+		if(version < this.version - len(this.undoStack) or version > this.version + len(this.redoStack)):
+			return false;
+		
+		# A step that can't be made would leave the version where it is, so give up rather than trying it forever
+		while(this.version > version):
+			if(not this.undo()):
+				return false;
+		
+		while(this.version < version):
+			if(not this.redo()):
+				return false;
+		
+		return true;
+	
+	
+	
+	
+	# Stop keeping versions
+	def close(this) -> None:
+		"""
+		Stops listening to the diary and forgets every version
+		"""
+		with this.diary._lock.writing():
+			this.diary.onAdd.remove(this._added);
+			this.diary.onUpdate.remove(this._updated);
+			this.diary.onBeforeReplace.remove(this._replacing);
+		
+		this.undoStack = [];
+		this.redoStack = [];
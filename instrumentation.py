@@ -0,0 +1,238 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Callable			# Type hinting
+from functools import wraps			# Keeps the name and docstring of instrumented methods
+import threading					# Stats can be recorded from several threads at once
+import time							# Used to time each call
+import tracemalloc					# Used to measure the peak memory of a call
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# Stats for a single operation
+class OperationStats:
+	"""
+	Call count, total and slowest latency, records handled, a latency histogram and peak memory for one operation
+	
+	The histogram has a bucket for each power of two microseconds, bucket i counts the calls
+	that took at least 2^(i-1) and less than 2^i microseconds (bucket 0 is under a microsecond)
+	"""
+	__slots__ = ("calls", "seconds", "slowest", "records", "histogram", "peakMemory");
+	
+	def __init__(this) -> None:
+		this.calls: int = 0;
+		this.seconds: float = 0.0;
+		this.slowest: float = 0.0;
+		this.records: int = 0;
+		this.histogram: list[int] = [0] * 40;
+		this.peakMemory: int = 0;
+	
+	
+	
+	
+	# Turn the stats into a dictionary
+	def toDict(this) -> dict:
+		"""
+		Returns the stats as a dictionary, ready to be dumped as json
+		
+		Returns:
+			dict: The stats
+		"""
+		# Trailing empty buckets are left off to keep the dump short
+		last = max([index for index, count in enumerate(this.histogram) if count > 0], default=-1);
+		
+		return {
+			"calls": this.calls,
+			"seconds": this.seconds,
+			"averageSeconds": this.seconds / this.calls if(this.calls > 0) else 0.0,
+			"slowestSeconds": this.slowest,
+			"records": this.records,
+			"recordsPerSecond": this.records / this.seconds if(this.seconds > 0) else 0.0,
+			"histogramMicroseconds": this.histogram[:last + 1],
+			"peakMemory": this.peakMemory
+		};
+
+
+
+# Stats for every instrumented operation of a diary
+class Stats:
+	"""
+	Collects the stats recorded by instrumented methods, see Diary.enableStats()
+	
+	Methods:
+		record(operation, seconds, records, peakMemory) -> None:
+			Record a single call
+		
+		toDict() -> dict:
+			Get every operation's stats as a dictionary
+		
+		report() -> str:
+			Get a table of every operation's stats
+	"""
+	def __init__(this, traceMemory: bool = false) -> None:
+		"""
+		Set up the stats
+		
+		Args:
+			traceMemory (bool, optional): Whether to measure the peak memory of memory heavy calls such as sorts. Defaults to false.
+		"""
+		this.traceMemory = traceMemory;
+		this.operations: dict[str, OperationStats] = {};
+		this._lock = threading.Lock();
+	
+	
+	
+	
+	# Record a single call
+	def record(this, operation: str, seconds: float, records: int = 1, peakMemory: int = 0) -> None:
+		"""
+		Records a single call of an operation
+		
+		Args:
+			operation (str): The name of the operation
+			seconds (float): How long the call took
+			records (int, optional): How many records the call handled. Defaults to 1.
+			peakMemory (int, optional): The most memory the call used, in bytes. Defaults to 0.
+		"""
+		with this._lock:
+			stats = this.operations.get(operation);
+			if(stats is None):
+				stats = this.operations[operation] = OperationStats();
+			
+			stats.calls += 1;
+			stats.seconds += seconds;
+			stats.slowest = max(stats.slowest, seconds);
+			stats.records += records;
+			stats.histogram[min(39, int(seconds * 1000000).bit_length())] += 1;
+			stats.peakMemory = max(stats.peakMemory, peakMemory);
+	
+	
+	
+	
+	# Turn all the stats into a dictionary
+	def toDict(this) -> dict:
+		"""
+		Returns every operation's stats as a dictionary, ready to be dumped as json
+		
+		Returns:
+			dict: Operation name -> its stats
+		"""
+		with this._lock:
+			return { operation: stats.toDict() for operation, stats in this.operations.items() };
+	
+	
+	
+	
+	# Make a table of the stats
+	def report(this) -> str:
+		"""
+		Returns a table of every operation's stats
+		
+		Returns:
+			str: The table
+		"""
+		lines = ["Operation          Calls         Total (s)     Average (ms)  Records       Records/s     Peak memory"];
+		for operation, stats in this.toDict().items():
+			lines.append(
+				f"{operation:<18} {stats['calls']:<13} {stats['seconds']:<13.4f} {stats['averageSeconds'] * 1000:<13.4f} "
+				f"{stats['records']:<13} {stats['recordsPerSecond']:<13.0f} {stats['peakMemory']}"
+			);
+		
+		return "\n".join(lines);
+
+
+
+
+# Decorator that marks a diary method to be instrumented
+def instrumented(operation: str, countRecords: Callable | None = None, traceMemory: bool = false) -> Callable:
+	"""
+	Marks a Diary method so its calls are recorded once the diary's stats are turned on
+	
+	The method itself is left untouched, the timing wrapper is only put on a diary by instrument(),
+	so there is no cost at all while the stats are turned off
+	
+	Args:
+		operation (str): The name to record the calls under
+		countRecords (Callable | None, optional): Given the diary, the arguments and the result, returns how many records the call handled. Defaults to 1 per call.
+		traceMemory (bool, optional): Whether to measure the peak memory of the call, if the stats allow it. Defaults to false.
+	
+	Returns:
+		Callable: The decorator
+	"""
+	def decorator(method: Callable) -> Callable:
+		method.instrumented = (operation, countRecords, traceMemory);
+		return method;
+	
+	return decorator;
+
+
+
+
+# Wrap a single method so its calls are recorded
+def _wrap(diary, method: Callable, stats: Stats, operation: str, countRecords: Callable | None, traceMemory: bool) -> Callable:
+	@wraps(method)
+	def wrapper(*args, **kwargs):
+		# Only trace memory if no one else is, otherwise we'd stop their tracing when we're done
+		tracing = traceMemory and stats.traceMemory and not tracemalloc.is_tracing();
+		if(tracing):
+			tracemalloc.start();
+		
+		# A call that raises is still recorded (as handling no records), and tracing is always stopped again
+		# Left running, it would slow down everything afterwards and stop later calls from measuring their memory
+		start = time.perf_counter();
+		records = 0;
+		peakMemory = 0;
+		try:
+			result = method(diary, *args, **kwargs);
+			records = 1 if(countRecords is None) else countRecords(diary, args, result);
+		finally:
+			seconds = time.perf_counter() - start;
+			
+			if(tracing):
+				peakMemory = tracemalloc.get_traced_memory()[1];
+				tracemalloc.stop();
+			
+			stats.record(operation, seconds, records, peakMemory);
+		
+		return result;
+	
+	return wrapper;
+
+
+
+
+# Start recording the stats of a diary
+def instrument(diary, stats: Stats) -> None:
+	"""
+	Puts a timing wrapper over every method of the diary marked with @instrumented
+	
+	The wrappers are set on the diary itself, so other diaries are not affected
+	
+	Args:
+		diary (Diary): The diary to record the stats of
+		stats (Stats): Where to record them
+	"""
+	for name in dir(type(diary)):
+		method = getattr(type(diary), name, None);
+		marker = getattr(method, "instrumented", None);
+		
+		if(marker is not None):
+			setattr(diary, name, _wrap(diary, method, stats, *marker));
+
+
+
+
+# Stop recording the stats of a diary
+def uninstrument(diary) -> None:
+	"""
+	Removes the timing wrappers put on a diary by instrument()
+	
+	Args:
+		diary (Diary): The diary to stop recording the stats of
+	"""
+	for name in dir(type(diary)):
+		if(hasattr(getattr(type(diary), name, None), "instrumented")):
+			diary.__dict__.pop(name, None);
@@ -0,0 +1,286 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+import json							# The snapshot and each journal line are stored as json
+import os							# Used to swap in a new snapshot without a half written file
+
+from main import Diary, Record
+from recurrence import RecurringStore, Rule
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# Append-only persistence for a diary
+class Journal:
+	"""
+	Saves a diary as a snapshot plus a journal of the records added since the snapshot.
+	
+	Every accepted record is appended to the journal as soon as it's added, so a crash
+	loses nothing. Once the journal gets long enough it is compacted into a new snapshot.
+	Updated and deleted records are journaled as {"replace": record, "with": record} and {"remove": record}.
+	The rules of a recurrence.RecurringStore are saved as single entries, {"rule": rule} and {"removeRule": rule}
+	(see Rule.toEntry()), their occurrences are never written out.
+	
+	Methods:
+		load() -> Diary:
+			Rebuild the diary from the snapshot and the journal, and start journaling it
+		
+		compact() -> None:
+			Write the diary to a new snapshot and empty the journal
+		
+		close() -> None:
+			Compact the journal and stop journaling the diary
+	"""
+	def __init__(this, directory: str, compactEvery: int = 10000, sync: bool = false) -> None:
+		"""
+		Set up the journal
+		
+		Args:
+			directory (str): The folder to keep the snapshot and journal in, created if it doesn't exist
+			compactEvery (int, optional): How many journaled records before compacting. Defaults to 10000.
+			sync (bool, optional): Whether to fsync after every record, slower but survives power loss. Defaults to false.
+		"""
+		os.makedirs(directory, exist_ok=true);
+		
+		this.snapshotPath = os.path.join(directory, "snapshot.json");
+		this.journalPath = os.path.join(directory, "journal.jsonl");
+		this.compactEvery = compactEvery;
+		this.sync = sync;
+		
+		this.diary: Diary | None = None;
+		this._file = None;
+		this._pending = 0;  # How many records are in the journal but not the snapshot
+	
+	
+	
+	
+	# Rebuild the diary from disk
+	def load(this) -> Diary:
+		"""
+		Rebuilds the diary from the snapshot and the records journaled after it
+		
+		Returns:
+			Diary: The rebuilt diary, any records added to it from now on are journaled.
+				If any recurring appointments were saved, its store is a recurrence.RecurringStore with their rules.
+		"""
+		records: list[str | None] = [];
+		rules: list[dict] = [];
+		positions: dict[str, list[int]] | None = None;  # Where each record is, only built if a record was updated or deleted
+		
+		# The snapshot is the records in the string format, followed by a {"rule": rule} for each rule
+		if(os.path.exists(this.snapshotPath)):
+			with open(this.snapshotPath, "r", encoding="utf-8") as file:
+				for entry in json.load(file):
+					if(isinstance(entry, str)):
+						records.append(entry);
+					else:
+						rules.append(entry["rule"]);
+		
+		# Replay the journal on top of the snapshot
+		journaled = 0;
+		if(os.path.exists(this.journalPath)):
+			goodLength = 0;
+			with open(this.journalPath, "rb") as file:
+				for line in file:
+					# A crash part way through writing a line leaves it torn, everything before it is still good
+					if(not line.endswith(b"\n")):
+						break;
+					
+					try:
+						entry = json.loads(line);
+					except (json.JSONDecodeError, UnicodeDecodeError):
+						break;
+					
+					if(isinstance(entry, str)):
+						if(positions is not None):
+							positions.setdefault(entry, []).append(len(records));
+						
+						records.append(entry);
+					elif("rule" in entry):
+						rules.append(entry["rule"]);
+					elif("removeRule" in entry):
+						rules.remove(entry["removeRule"]);
+					else:
+						if(positions is None):
+							positions = {};
+							for position, record in enumerate(records):
+								if(record is not None):
+									positions.setdefault(record, []).append(position);
+						
+						# The first copy of the record still in the diary is the one that was changed
+						position = positions[entry.get("remove", entry.get("replace"))].pop(0);
+						records[position] = entry.get("with");
+						
+						if(records[position] is not None):
+							positions.setdefault(records[position], []).append(position);
+					
+					goodLength += len(line);
+					journaled += 1;
+			
+			# Cut off the torn line, otherwise the next record would be written onto the end of it
+			if(goodLength < os.path.getsize(this.journalPath)):
+				os.truncate(this.journalPath, goodLength);
+		
+		records = [record for record in records if(record is not None)];
+		if(len(rules) == 0):
+			diary = Diary(records);
+		else:
+			diary = Diary(records, store=RecurringStore());
+			for rule in rules:
+				diary.store.addRule(Rule.fromEntry(rule));
+		
+		this.attach(diary);
+		this._pending = journaled;
+		
+		return diary;
+	
+	
+	
+	
+	# Start journaling a diary
+	def attach(this, diary: Diary) -> None:
+		"""
+		Starts journaling the records added to a diary
+		
+		Args:
+			diary (Diary): The diary to journal
+		"""
+		this.diary = diary;
+		this._file = open(this.journalPath, "a", encoding="utf-8");
+		
+		diary.onAdd.append(this.append);
+		diary.onUpdate.append(this._updated);
+		diary.onReplace.append(this._replaced);
+		
+		# Only a RecurringStore has rules
+		if(hasattr(diary.store, "onRule")):
+			diary.store.onRule.append(this._ruled);
+	
+	
+	
+	
+	# Called by the diary every time a record is added
+	def append(this, record: Record) -> None:
+		"""
+		Appends a record to the journal, compacting it if it has grown too long
+		
+		Args:
+			record (Record): The record that was added
+		"""
+		this._write(str(record));
+	
+	
+	
+	
+	# Called by the diary every time a record is updated or deleted
+	def _updated(this, old: Record, new: Record | None) -> None:
+		"""
+		Journals an updated or deleted record
+		
+		Args:
+			old (Record): The record before it was changed
+			new (Record | None): The record after it was changed, or None if it was deleted
+		"""
+		this._write({ "remove": str(old) } if(new is None) else { "replace": str(old), "with": str(new) });
+	
+	
+	
+	
+	# Called by a RecurringStore every time a rule is added or removed
+	def _ruled(this, rule: Rule, added: bool) -> None:
+		"""
+		Journals an added or removed rule
+		
+		Args:
+			rule (Rule): The rule
+			added (bool): True if it was added, False if it was removed
+		"""
+		this._write({ "rule" if(added) else "removeRule": rule.toEntry() });
+	
+	
+	
+	
+	# Add an entry to the journal
+	def _write(this, entry: str | dict) -> None:
+		"""
+		Appends an entry to the journal, compacting it if it has grown too long
+		
+		Args:
+			entry (str | dict): A record in the string format, or a replace/ remove entry
+		"""
+		this._file.write(json.dumps(entry) + "\n");
+		this._file.flush();
+		
+		if(this.sync):
+			os.fsync(this._file.fileno());
+		
+		this._pending += 1;
+		if(this._pending >= this.compactEvery):
+			this.compact();
+	
+	
+	
+	
+	# Called by the diary when all its records are replaced, such as after a sort
+	def _replaced(this) -> None:
+		"""
+		Compacts the journal, as replaying it would no longer give the records in the right order
+		"""
+		this.compact();
+	
+	
+	
+	
+	# Write a new snapshot and clear the journal
+	def compact(this) -> None:
+		"""
+		Writes the diary to a new snapshot and empties the journal
+		"""
+		if(this.diary is None):
+			return;
+		
+		# Write to a temporary file first, then swap it in so there is always a complete snapshot on disk
+		# The records are read straight from the store, as this is called while the diary is locked for writing
+		# toList() is only the stored records, a RecurringStore's rules are saved once each rather than as every occurrence
+		store = this.diary.store;
+		snapshot = [str(record) for record in store.toList()];
+		snapshot.extend({ "rule": rule.toEntry() } for rule in getattr(store, "rules", ()));
+		
+		temporaryPath = this.snapshotPath + ".tmp";
+		with open(temporaryPath, "w", encoding="utf-8") as file:
+			json.dump(snapshot, file);
+			file.flush();
+			os.fsync(file.fileno());
+		
+		os.replace(temporaryPath, this.snapshotPath);
+		
+		# The snapshot now has everything, so the journal can start again
+		this._file.close();
+		this._file = open(this.journalPath, "w", encoding="utf-8");
+		this._pending = 0;
+	
+	
+	
+	
+	# Stop journaling
+	def close(this) -> None:
+		"""
+		Compacts the journal and stops journaling the diary
+		"""
+		if(this.diary is None):
+			return;
+		
+		this.compact();
+		this._file.close();
+		
+		this.diary.onAdd.remove(this.append);
+		this.diary.onUpdate.remove(this._updated);
+		this.diary.onReplace.remove(this._replaced);
+		
+		if(hasattr(this.diary.store, "onRule")):
+			this.diary.store.onRule.remove(this._ruled);
+		
+		this.diary = None;
+		this._file = None;
@@ -0,0 +1,75 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Iterator			# Type hinting
+from contextlib import contextmanager	# Lets the lock be used in a with statement
+import threading					# The condition the readers and writers wait on
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# A lock that lets many readers in at once, but only one writer
+class ReadWriteLock:
+	"""
+	Any number of threads can hold the lock for reading at the same time, a writer holds it on its own.
+	
+	Waiting writers go before new readers, so a steady stream of readers can't keep a writer out forever.
+	The lock is not reentrant, a thread holding it must not try to take it again.
+	
+	Methods:
+		reading() -> ContextManager:
+			Hold the lock for reading
+		
+		writing() -> ContextManager:
+			Hold the lock for writing
+	"""
+	def __init__(this) -> None:
+		this._condition = threading.Condition(threading.Lock());
+		this._readers = 0;
+		this._writing = false;
+		this._waitingWriters = 0;
+	
+	
+	
+	
+	# Hold the lock for reading
+	@contextmanager
+	def reading(this) -> Iterator[None]:
+		with this._condition:
+			while(this._writing or this._waitingWriters > 0):
+				this._condition.wait();
+			
+			this._readers += 1;
+		
+		try:
+			yield;
+		finally:
+			with this._condition:
+				this._readers -= 1;
+				
+				if(this._readers == 0):
+					this._condition.notify_all();
+	
+	
+	
+	
+	# Hold the lock for writing
+	@contextmanager
+	def writing(this) -> Iterator[None]:
+		with this._condition:
+			this._waitingWriters += 1;
+			
+			while(this._writing or this._readers > 0):
+				this._condition.wait();
+			
+			this._waitingWriters -= 1;
+			this._writing = true;
+		
+		try:
+			yield;
+		finally:
+			with this._condition:
+				this._writing = false;
+				this._condition.notify_all();
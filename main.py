@@ -1,796 +1,2190 @@
-# All of our imports, these are built-in libraries
-from __future__ import annotations  # Type hinting
-from typing import TypedDict		# Type hinting
-from datetime import datetime		# Only using this to get the current date and time
-import json  						# This technically doesn't get used
-
-# Appointment Dictionary type for expanded records
-class Appointment(TypedDict, total=False):
-	priority: str
-	day: int
-	month: int
-	year: int
-	start: int
-	end: int
-	description: str
-
-
-# Bools that are lowercase are so much nicer
-true = True
-false = False
-
-
-
-# Set up our diary class
-class Diary:
-	"""
-	Methods:
-		addRecord() -> None:
-			Add new record(s) to the diary
-		
-		showRecords() -> None:
-			Show all the records in the diary
-		
-		sortRecords() -> Bool:
-			Sort the records by priority or time.
-	"""
-	# Init function for the diary class - Sets up everything we need
-	def __init__(this, records: list[str] = []) -> None:
-		"""
-		Initialise the diary
-		
-		Args:
-			records (list[Appointment], optional): A pre-existing record set. Defaults to [].
-		"""
-		# We support loading existing records if we have them, otherwise we init with an empty list
-		if(len(records) > 0):
-			print(f"Loading {len(records)} existing records...");
-		
-		this.records = records;
-	
-	
-	
-	
-	# Expand records from string format
-	def _expandRecords(cls) -> list[Appointment]:
-		"""
-		Expands the records into an a list of dictionary objects
-		
-		Returns:
-			List[Appointment]: A list of Appointment dictionary's
-		"""
-		expanded: list[Appointment] = [];
-		
-		delimiter = ";";
-		dateSplit = "/";
-		for record in cls.records:
-			# Split the string into an array of strings
-			dataArray = record.split(delimiter);
-			
-			# Split the date so we access the day, month and year easier
-			date = dataArray[1].split(dateSplit);
-			
-			# If the description has an ';' when it was originally inputted, our array will be longer than 5
-			# So we need to add all the extra elements to the description joined with ';'
-			# Because all other functions that deal with the description aside from the addRecord function use expandRecords(),
-			# We only need to worry about checking the array length here, where our data is converted to the Appointment dictionary type
-			description = dataArray[4];
-			if(len(dataArray) > 5):
-				for i in range(5, len(dataArray)):
-					description += f";{dataArray[i]}";
-			
-			# Apply all the data to a Dictionary
-			a: Appointment = {
-				"priority": dataArray[0],
-				"day": int(date[0]),
-				"month": int(date[1]),
-				"year": int(date[2]),
-				"start": int(dataArray[2]),
-				"end": int(dataArray[3]),
-				"description": description
-			};
-			
-			# Append the dict to a list
-			expanded.append(a);
-		
-		return expanded;
-	
-	
-	
-	
-	# Function to get the current time
-	# To be used in the addRecord() function -> Using in the isValidDate function is against the assignment spec
-	def _getCurrentTime(cls) -> dict:
-		"""
-		Returns the date and hour in a dictionary
-		
-		Returns:
-			dict: The time in a dictionary format
-		"""
-		currDate = datetime.now().strftime("%d %m %Y %H");
-		dateArray = currDate.split(" ");
-		dateObject = { "day": int(dateArray[0]), "month": int(dateArray[1]), "year": int(dateArray[2]), "hour": int(dateArray[3]) };
-		return dateObject;
-	
-	
-	
-	
-	def _isFutureTime(cls, newRecord: dict) -> bool:
-		"""
-		Returns true or false depnding on if the time is in the future
-		
-		Returns:
-			bool: True if the time is in the future, False if not
-		"""
-		
-		# Get the current time
-		currTime = cls._getCurrentTime();
-		
-		# Error messages here should be self explanatory for whats happening
-		if(newRecord["year"] < currTime["year"]):
-			print("Error: Year must be greater than or equal to the current year!");
-			return false;
-		
-		# If the year is the same, we now check the month
-		if(newRecord["year"] == currTime["year"]):
-			
-			if(newRecord["month"] < currTime["month"]):
-				print("Error: Month must be greater than or equal to the current month!");
-				return false;
-			
-			# If the month is the same, we now check the day
-			if(newRecord["month"] == currTime["month"]):
-				
-				if(newRecord["day"] < currTime["day"]):
-					print("Error: Day must be greater than or equal to the current day!");
-					return false;
-					
-				# If the day is the same, we now check the hour
-				if(newRecord["day"] == currTime["day"]):
-					
-					if(newRecord["hour"] is not None):
-						if(newRecord["hour"] <= currTime["hour"]):
-							print("Error: Hour must be greater than the current hour!");
-							return false;
-		
-		# All checks passed, return true
-		return true;
-	
-	
-	
-	
-	# Function to check if a year is a leap year
-	def _isLeapYear(cls, year: int) -> bool:
-		"""
-		Returns true or false depnding on if the year is a leap year
-		
-		Args:
-			year (int): An integer number to check if it would be a leap year
-		
-		Returns:
-			bool: True if the year is a leap year, False if not
-		"""
-		if(year % 100 == 0): # If the year is divisible by 100
-			return true if(year % 400 == 0) else false; # If it is divisible by 400, it's a leap year
-
-		return true if(year % 4 == 0) else false; # If it is divisible by 4, it's a leap year
-	
-	
-	
-	
-	# Check if a date is valid
-	def _isValidDate(cls, day: int, month: int, year: int) -> bool:
-		"""
-		Returns true or false depnding on if the date is valid
-
-		Args:
-			day (int): The day of the month
-			month (int): The month of the year
-			year (int): The year
-
-		Returns:
-			bool: True if the date is valid, False if not
-		"""
-		
-		# If the year is less than 10000 and greater than or equal to 2022, it's a valid year
-		if(10000 > year >= 2022): # This has the same effect as 10000 > year > 2021
-			pass; # Cheeky
-		else:
-			print("Error: Year must be between 10000 and 2022");
-			return false;
-		
-		# If the month is less than or equal to 12 and greater than or equal to 1, it's a valid month
-		if(1 <= month <= 12):
-			pass;
-		else:
-			print("Error: Month must be between 1 and 12");
-			return false;
-		
-		# We now check if the year is supposed to be a leap year
-		leapYear = cls._isLeapYear(year);
-		
-		# For february, we determine if it has 29 or 28 days depending on if it's a leap year
-		febDays = 29 if(leapYear) else 28;
-		
-		# Dictionary for the days in each month
-		daysInMonth = {
-			1: { "name": "January", "days": 31 },
-			2: { "name": "February", "days": febDays },
-			3: { "name": "March", "days": 31 },
-			4: { "name": "April", "days": 30 },
-			5: { "name": "May", "days": 31 },
-			6: { "name": "June", "days": 30 },
-			7: { "name": "July", "days": 31 },
-			8: { "name": "August", "days": 31 },
-			9: { "name": "September", "days": 30 },
-			10: { "name": "October", "days": 31 },
-			11: { "name": "November", "days": 30 },
-			12: { "name": "December", "days": 31 }
-		};
-		
-		# Check if the day is less than or equal to the days in the month, but greater than 1
-		if(1 <= day <= daysInMonth[month]["days"]):
-			return true;
-		else:
-			print(f"Error: Day must be between 1 and {daysInMonth[month]['days']} for the month of {daysInMonth[month]['name']}!");
-			return false;
-	
-	
-	
-	
-	# Check if a time is valid
-	def _isValidTime(cls, start: int, end: int) -> bool:
-		"""
-		Returns true or false depending on if the time is valid
-		
-		Args:
-			start (int): The start time
-			end (int): The end time
-		
-		Returns:
-			bool: True if the time is valid, False if not
-		"""
-		# If the start time is greater than or equal to the end time, it's not valid
-		if(start >= end):
-			print("Error: Start time must be before end time!");
-			return false;
-		
-		# If the start time and/ or end time is outside of the range 7-22, it's not valid
-		if(7 <= start <= 22):
-			pass; # Cheeky
-		else:
-			print("Error: Start time must be between 7 and 22!");
-			return false;
-			
-		if(7 <= end <= 22):
-			pass; # Cheeky
-		else:
-			print("Error: End time must be between 7 and 22!");
-			return false;
-		
-		# Passed all checks, return true
-		return true;
-	
-	
-	
-	
-	# Check if a record overlaps with another record
-	def _isConcurrentAppointment(cls, newApp: Appointment) -> bool:
-		"""
-		Checks if an appointment overlaps with another appointment
-		
-		Args:
-			newApp (Appointment): The new appointment to check against existing records
-		
-		Returns:
-			bool: True if there is an overlap, otherwise false
-		"""
-		# Expand the records into a more usable format
-		records = cls._expandRecords();
-		
-		concurrent = false;
-		for record in records:
-			if(newApp["year"] == record["year"] and newApp["month"] == record["month"] and newApp["day"] == record["day"]):
-				
-				# If the start times are equal, return false
-				if(newApp["start"] == record["start"]):
-					return true
-				
-				# If existingRecordEnd > newRecordStart > existingRecordStart return true
-				if(record["end"] > newApp["start"] > record["start"]):
-					return true;
-				
-				# If newRecordEnd > existingRecordStart > newRecordStart return true
-				if(newApp["end"] > record["start"] > newApp["start"]):
-					return true;
-		
-		return false
-	
-	
-	
-	
-	# Add records to the diary
-	# Realistically should have split this into multiple smaller functions
-	def addRecord(cls) -> None:
-		"""
-		Adds a record to the diary
-		
-		Asks the user for the following information:
-			Date, Start Time, End Time, Description
-		"""
-		date = ""
-		while(true):
-			
-			# Get the date and make sure it's valid or "end"
-			while(true):
-				while(true):
-					date = input("\nEnter the date of the appointment (dd/mm/yyyy) type 'END' to exit: ");
-					
-					# Our break word
-					if(date == 'END'):
-						print('\nExiting function...');
-						
-						# Call showRecords() as we were instructed, and end the function
-						return cls.showRecords();
-					
-					# Split the date using "/" as the delimiter
-					dateint = date.split("/");
-					
-					# If dateint is 3, we break this loop
-					if(len(dateint) == 3):
-						break;
-					
-					# Otherwise, we print an error message and continue looping
-					print("Error: Invalid date format!");
-				
-				# Check if the numbers can be converted to integers if so do it
-				# Weird fake ternaries to make sure we don't get an error
-				day = int(dateint[0]) if dateint[0].isdigit() else "bad";
-				month = int(dateint[1]) if dateint[1].isdigit() else "bad";
-				year = int(dateint[2]) if dateint[2].isdigit() else "bad";
-				
-				# Check if the day/month/year were correctly converted to numbers, if not restart loop
-				if(day == "bad" or month == "bad" or year == "bad"):
-					print("Error: Invalid date format!");
-					continue;
-				
-				validDate = cls._isValidDate(day, month, year);
-				
-				# If the the date is invalid, restart the loop
-				if(not validDate):
-					continue;
-				
-				# Check if the appointment is in the future/ same day so far
-				futureAppointment = cls._isFutureTime({ "day": day, "month": month, "year": year, "hour": None });
-				if(futureAppointment):
-					break;
-			# The date is theoretically valid so far
-			
-			
-			# Get the start and end times and make sure they're valid
-			while(true):
-				# Get the start time and make sure it's somewhat valid
-				while(true):
-					start = input("\nEnter the start time of the appointment (hh): ");
-					startint = int(start) if start.isdigit() else "bad";
-					
-					# If startint isn't bad, we can break this loop
-					if(startint != "bad"):
-						break;
-					
-					print("Error: Invalid start time format!");
-				
-				
-				# Get the end time and make sure it's somewhat valid
-				while(true):
-					end = input("\nEnter the end time of the appointment (hh): ");
-					endint = int(end) if end.isdigit() else "bad";
-					
-					# If endint isn't bad, we can break this loop
-					if(endint != "bad"):
-						break;
-					
-					print("Error: Invalid end time format!");
-				
-				
-				validTime = cls._isValidTime(startint, endint);
-				# If the time is invalid, restart the loop
-				if(not validTime):
-					continue;
-				
-				
-				futureAppointment = cls._isFutureTime({ "day": day, "month": month, "year": year, "hour": startint });
-				# If future appointment is true, the time is valid!
-				if(futureAppointment):
-					break;
-			# Start and end times are somewhat valid at this point
-			
-			
-			# Format date as required for isConcurrentAppointment()
-			apmnt: Appointment = { "day": day, "month": month, "year": year, "start": startint, "end": endint };
-			concurrent = cls._isConcurrentAppointment(apmnt);
-			
-			# If concurrent is true, we need to ask for a new date/ start/ end, so we restart the loop
-			# This also prevents users getting stuck in an infinite loop if they entered a date that cannot have any more appointments
-			if(concurrent):
-				print("\nError: Appointment overlaps with another appointment!");
-				continue;
-			
-			
-			# Get the description of the appointment
-			while(true):
-				description = input("\nEnter the description of the appointment (Max of 30 characters): ");
-				
-				# If the description is within the required length, we can break this loop
-				if(30 >= len(description) >= 1):
-					break;
-				
-				# If it's empty
-				if(len(description) == 0):
-					print("Error: Description cannot be empty!");
-				
-				# If it's too long
-				if(len(description) > 30):
-					print("Error: Description is too long!");
-
-			
-			# Get the priority of the appointment
-			while(true):
-				priority = input("\nEnter the priority of the appointment (High/Low): ");
-				correctPriority = (priority.lower() == "high" or priority.lower() == "low");
-				
-				if(correctPriority):
-					cls.records.append(f"{priority};{day}/{month}/{year};{start};{end};{description}");
-					print("Successfully added the appointment to the records!");
-					break;
-				
-				print("Error: Invalid priority!");
-	
-	
-	
-	
-	# Show all records in the diary
-	def showRecords(this) -> None:
-		"""
-		Show all records in the diary
-		
-		Creates a table of all the records in the diary before printing it
-		"""
-		if(len(this.records) == 0):
-			return print("Error: There are no records currently in the diary!");
-			
-		outputArray = [];
-		delimiter = "\n";
-		
-		descLength: int = 7
-		records = this._expandRecords();
-		# For each record, we're going to give them a variable so we better understand and access the data
-		for record in records:
-			priority = record["priority"];
-			day = record["day"];
-			month = record["month"];
-			year = record["year"];
-			start = record["start"];
-			end = record["end"];
-			description = record["description"];
-			
-			# Make sure the the prioity, date, start and end will always be the same lengths
-			priority = "Low " if(priority.lower() == "low") else "High";
-			
-			# 9 -> 09 etc
-			# We do this to kinda cheat the system, we stored them correctly without the 0's in front
-			# But then to display them and make our life easier, we make sure they're all the same length
-			if(10 > day):
-				day = f"0{day}";
-			
-			if(10 > month):
-				month = f"0{month}";
-			
-			if(10 > start):
-				start = f"{start} ";
-			
-			if(10 > end):
-				end = f"{end} ";
-			
-			# Turn the date into the correct format
-			date = f"{day}/{month}/{year}"
-			
-			# Make sure the description seperator matches the length of the title or longest description
-			descLength = max(descLength, len(description))
-			
-			# Add to an output, adding in the predefined spaces.
-			outputArray.append(f"{priority}        {date}     {start}        {end}      {description}");
-		
-		# Titles will always be in the same location
-		headers = "\nPrioity     Date           Start     End     Subject\n";
-		# Seperators will always be in the same location, but desc length may change length
-		seperators = f"--------    ----------     -----     ---     {'-' * descLength}\n";
-		
-		output = headers + seperators + delimiter.join(outputArray);
-		print(output);
-	
-	
-	
-	
-	# Sort by Prioity Or Time
-	def sortRecords(cls) -> bool:
-		"""
-		Sort records by either priority or time
-		
-		Returns:
-			bool: False if the diary was not sorted, True if it was
-		"""
-		
-		
-		# Bubble sort algorithm
-		def sort(array: list) -> list: # Worst case sort time is: O(n^2)
-			"""
-			Returns a sorted list using an implimentation of the bubble sort algorithm.
-			We decided that due to the expected size of the diary, the bubble sort algorithm is good enough.
-			
-			Internal Function because it is only used in the sortRecords function
-			
-			Args:
-				array (list): A list of integers to sort
-			
-			Returns:
-				list: A sorted list
-			"""
-			
-			for element in array:
-				# Sorted starts at true and turns to false if an item was swapped during an iteration in the inside loop
-				sorted = true;
-				
-				# LastSort starts at 1 because otherwise we'd try and compare the last element to 'nothing' on the first pass
-				lastSort = 1;
-				
-				for i in range(len(array) - lastSort):
-					# We grab 2 elements to compare
-					itemA = array[i];
-					itemB = array[i + 1];
-				
-					if(itemA <= itemB): # If the elements are in the "correct" order
-						continue; # We go to the iteration
-					
-					# If the elements are in the wrong order, we swap them
-					array[i] = itemB;
-					array[i + 1] = itemA;
-				
-					# If we get to here, a change has been made
-					if(sorted):
-						sorted = false;
-				
-				if(sorted): # If no changes were made, we know that the array has been sorted
-					break; # This Reduces time wasted in cases where the array might already be sorted or was close to sorted etc
-				
-				# The last check on the inner loop always puts an element in the correct spot, so we don't need to check it again
-				# This also decreases our average sort time, sadly we can't do much more for this algorithm to improve its average sort time
-				lastSort += 1;
-			
-			return array;
-		
-		
-		# Progress bar
-		def progressBar(progress: float) -> str:
-			"""
-			Returns a progress bar with a carriage return at the front
-			Was added for fun, if there are several thousand records, you can see
-			the sorting progress instead of thinking the program is stuck
-			
-			Internal function because it is only used in the sortRecords function
-			
-			Args:
-				progress (float): A number between 0 and 1 to represent the progress
-			"""
-			bar = "\r[##             ]"
-			if(progress >= 0.99):
-				return "\r[############...]"  # 99%
-			
-			if(progress >= 0.9):
-				return "\r[###########....]"  # 90%
-			
-			if(progress >= 0.8):
-				return "\r[##########.....]"  # 80%
-			
-			if(progress >= 0.7):
-				return "\r[#########......]"  # 70%
-			
-			if(progress >= 0.6):
-				return "\r[########.......]"  # 60%
-			
-			if(progress >= 0.5):
-				return "\r[#######........]"  # 50%
-			
-			if(progress >= 0.4):
-				return "\r[######.........]"  # 40%
-			
-			if(progress >= 0.3):
-				return "\r[#####..........]"  # 30%
-			
-			if(progress >= 0.2):
-				return "\r[####...........]"  # 20%
-			
-			if(progress >= 0.1):
-				return "\r[###............]"  # 10%
-			
-			return bar
-		
-		
-		# Ask how to sort the records until the user enters a valid input or "end" - case insensitive
-		# Valid inputs are "time" and "priority"
-		
-		sortMethod = false;
-		
-		while(true):
-			print("\nHow would you like to sort the records?");
-			print("Type 'PRIORITY' to sort by priority,");
-			print("Type 'TIME' to sort by time,");
-			print("Type 'END' to return to the main menu");
-			choice = input("Enter your choice: ");
-			choice = choice.lower();
-			
-			if(choice == "priority"):
-				sortMethod = "priority";
-				break;
-			
-			if(choice == "time"):
-				sortMethod = "time";
-				break;
-			
-			if(choice == "end"):
-				print("\nExiting function...");
-				return;
-			
-			else:
-				print("Invalid input, please try again");
-			
-		
-		
-		# Regardless of the choice, I felt it was better to also sort the records by time
-		# Also I spent all this time programming it, I at least want it used.
-		
-		# Things are going to get slightly complicated
-		# We are going to make an object/ dict that will use key-pair-values to store the data
-		# This will allow us to sort the data by sorting the keys.
-		# The appointments will be stored in a format like so:
-		#
-		#	{
-		#		Year: {
-		#			Month: {
-		#				Day: {
-		#					Start time: {
-		#						...Appointment
-		#					}
-		#				}
-		#			}
-		#		}
-		#	}
-		#
-		# From there, we will sort the keys of each level into ascending order, which at the end will result in the data being sorted
-		# We don't actually have to do this to sort the data, we could instead convert each appointment to the time since the epoch.
-		# It would be a much cleaner method to sort, but this shows the understanding of how to manipulate data similar to this.
-		
-		
-		
-		print("\r[...............]", end="");  # Progress bar
-		
-		# Expand the records into a more usable format
-		data = cls._expandRecords();
-		appointments = {};
-		
-		print("\r[#..............]", end="");  # Progress bar
-		
-		for apmnt in data:
-			# If the year is not in the dictionary, add it
-			if(apmnt["year"] not in appointments):
-				appointments[apmnt["year"]] = {};
-			
-			# If the month of the specified year is not in the dictionary, add it
-			if(apmnt["month"] not in appointments[apmnt["year"]]):
-				appointments[apmnt["year"]][apmnt["month"]] = {};
-			
-			# If the day of the specified month is not in the dictionary, add it
-			if(apmnt["day"] not in appointments[apmnt["year"]][apmnt["month"]]):
-				appointments[apmnt["year"]][apmnt["month"]][apmnt["day"]] = {};
-			
-			# Add the data to the dictionary setting the start-time as the key
-			appointments[apmnt["year"]][apmnt["month"]][apmnt["day"]][apmnt["start"]] = apmnt;
-		
-		print("\r[##.............]", end="");  # Progress bar
-		
-		dataLength = len(data);
-		totalSorted = 0;
-		
-		sortedArray = [];
-		# sort the years into ascending order and iterate through them
-		for year in sort(list(appointments.keys())):
-			
-			# sort the months into ascending order and iterate through them
-			for month in sort(list(appointments[year].keys())):
-				
-				# sort the days into ascending order and iterate through them
-				for day in sort(list(appointments[year][month].keys())):
-					
-					# sort the appointments into ascending order and iterate through them
-					for start in sort(list(appointments[year][month][day].keys())):
-						
-						# Add the appointment to sortedArray. This should now have the dates sorted correctly via time
-						sortedArray.append(appointments[year][month][day][start]);
-						totalSorted += 1;
-						print(progressBar(totalSorted / dataLength), end=""); # Progress bar
-		
-		# sortedArray is now sorted by time. I call this method "jank time sort".
-		
-		print("\r[#############..]", end="");  # Progress bar
-		
-		# Now we can sort via priority if that was required
-		if(sortMethod == "priority"):
-			high = [];
-			low = [];
-			
-			for a in sortedArray:
-				if(a["priority"] == "high"):
-					# High prioity appointments will go into the high list
-					high.append(a);
-				else:
-					# Low prioity appointments will go into the low list
-					low.append(a);
-			
-			# We clear out the old sortedArray
-			sortedArray.clear();
-			high.extend(low); # Add the low priority appointments to the high list
-			sortedArray.extend(high); # Add all the appointments to the sortedArray
-		
-		# Now we change the format back into a string for use with other functions
-		rec = [];
-		for appt in sortedArray:
-			rec.append(f"{appt['priority']};{appt['day']}/{appt['month']}/{appt['year']};{appt['start']};{appt['end']};{appt['description']}");
-		print("\r[##############.]", end=""); # Progress bar
-		
-		# And apply the data back to the records in the new order
-		cls.records.clear();
-		cls.records.extend(rec);
-		print("\r[###############]", end=""); # Progress bar
-		print(" Done!");
-		
-		return true
-
-
-
-# Main function, will only be run if the file is not imported
-def main() -> bool:
-	saveRecords = false; # False by default, change to true if you want to save the records to a file
-	
-	diary = Diary();
-	while(true):
-		print("\nWhat would you like to do?");
-		print("Type 'ADD' to add appointments,");
-		print("Type 'SHOW' to show all appointments,");
-		print("Type 'SORT' to sort all appointments,");
-		print("Type 'END' to exit the program.");
-		choice = input("Enter your choice: ");
-		choice = choice.lower();
-		
-		if(choice == "add"):
-			diary.addRecord();
-			continue;
-		
-		if(choice == "show"):
-			diary.showRecords();
-			continue;
-		
-		if(choice == "sort"):
-			diary.sortRecords();
-			continue;
-		
-		if(choice == "end"):
-			print("\nExiting program...");
-			break;
-		
-		print("\nInvalid choice");
-	
-	if(saveRecords): # We added the ability to save the records to a file, saveRecords is false by default however
-		json.dump(diary.records, open("records.json", "w"), indent="\t");
-		return true;
-	
-	return false;
\ No newline at end of file
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import TypedDict, Iterable, Iterator, TextIO, Callable	# Type hinting
+from itertools import islice		# Used to show part of the records without copying them
+from bisect import bisect_left, bisect_right	# Binary search over the sorted index
+from datetime import datetime, date, timedelta	# Used to get the current date and time, and to step through days
+import sys							# Used to intern the strings we store in the records
+import time							# Used to report how long sorting took
+import threading					# Readers can share the sorted index, so merging into it is locked
+import argparse						# Reads the batch mode options from the command line
+import contextlib					# Used to hide the "Loading records" message in batch mode
+import io							# Used to hide the "Loading records" message in batch mode
+
+from instrumentation import Stats, instrumented, instrument, uninstrument
+from locking import ReadWriteLock
+
+# Appointment Dictionary type for expanded records
+class Appointment(TypedDict, total=False):
+	priority: str
+	day: int
+	month: int
+	year: int
+	start: int
+	end: int
+	description: str
+
+
+# Result dictionary type for each row given to Diary.addRecords()
+class AddResult(TypedDict):
+	index: int
+	accepted: bool
+	reason: str | None
+
+
+# Summary dictionary type for a run of runBatch()
+class BatchSummary(TypedDict):
+	commands: int
+	succeeded: int
+	failed: int
+	seconds: float
+
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# The name and number of days of each month, February gets an extra day in leap years
+# Built once here, instead of every time a date is checked
+MONTHS = {
+	1: { "name": "January", "days": 31 },
+	2: { "name": "February", "days": 28 },
+	3: { "name": "March", "days": 31 },
+	4: { "name": "April", "days": 30 },
+	5: { "name": "May", "days": 31 },
+	6: { "name": "June", "days": 30 },
+	7: { "name": "July", "days": 31 },
+	8: { "name": "August", "days": 31 },
+	9: { "name": "September", "days": 30 },
+	10: { "name": "October", "days": 31 },
+	11: { "name": "November", "days": 30 },
+	12: { "name": "December", "days": 31 }
+};
+
+
+
+# Turn a start and end time into a bitmask of the hours that are booked
+def hourMask(start: int, end: int) -> int:
+	"""
+	Returns a bitmask with a bit set for every hour from start up to (but not including) end
+	
+	The start hour is always set, even if the end is not after the start.
+	This means two masks overlap exactly when the start/ end comparison rules in
+	Diary._isConcurrentAppointment() say the appointments overlap.
+	
+	Args:
+		start (int): The start time
+		end (int): The end time
+	
+	Returns:
+		int: The bitmask of booked hours
+	"""
+	mask = 1 << start;
+	if(end > start):
+		mask |= (1 << end) - (1 << start);
+	
+	return mask;
+
+
+
+# Compact record type, records are parsed into this once when they are loaded or added
+class Record:
+	"""
+	A single appointment in the diary
+	
+	Records are parsed once when they are loaded or added, and only turned back
+	into the "priority;d/m/y;start;end;description" string format when saving or exporting
+	"""
+	# Slots stop every record from carrying around its own __dict__
+	__slots__ = ("priority", "day", "month", "year", "start", "end", "description");
+	
+	def __init__(this, priority: str, day: int, month: int, year: int, start: int, end: int, description: str) -> None:
+		"""
+		Create a new record
+		
+		Args:
+			priority (str): The priority of the appointment (High/Low)
+			day (int): The day of the month
+			month (int): The month of the year
+			year (int): The year
+			start (int): The start time
+			end (int): The end time
+			description (str): The description of the appointment
+		"""
+		# There are only ever a few priorities and descriptions tend to repeat, so we intern them
+		this.priority = sys.intern(priority);
+		this.day = day;
+		this.month = month;
+		this.year = year;
+		this.start = start;
+		this.end = end;
+		this.description = sys.intern(description);
+	
+	
+	
+	
+	# Parse a record from the string format
+	@classmethod
+	def fromString(cls, record: str) -> Record:
+		"""
+		Parses a record from the "priority;d/m/y;start;end;description" string format
+		
+		Args:
+			record (str): The record in string format
+		
+		Returns:
+			Record: The parsed record
+		"""
+		# Split at most 4 times, if the description had a ';' in it when it was inputted it stays in the last element
+		dataArray = record.split(";", 4);
+		
+		# Split the date so we access the day, month and year easier
+		date = dataArray[1].split("/");
+		
+		return cls(dataArray[0], int(date[0]), int(date[1]), int(date[2]), int(dataArray[2]), int(dataArray[3]), dataArray[4]);
+	
+	
+	
+	
+	# Create a record from an appointment dictionary
+	@classmethod
+	def fromAppointment(cls, apmnt: Appointment) -> Record:
+		"""
+		Creates a record from an Appointment dictionary
+		
+		Args:
+			apmnt (Appointment): The appointment to convert
+		
+		Returns:
+			Record: The new record
+		"""
+		return cls(apmnt["priority"], apmnt["day"], apmnt["month"], apmnt["year"], apmnt["start"], apmnt["end"], apmnt["description"]);
+	
+	
+	
+	
+	# Turn the record into an appointment dictionary
+	def toAppointment(this) -> Appointment:
+		"""
+		Returns the record as an Appointment dictionary
+		
+		Returns:
+			Appointment: The record as a dictionary
+		"""
+		return {
+			"priority": this.priority,
+			"day": this.day,
+			"month": this.month,
+			"year": this.year,
+			"start": this.start,
+			"end": this.end,
+			"description": this.description
+		};
+	
+	
+	
+	
+	# The date packed into a single integer, yyyymmdd
+	@property
+	def date(this) -> int:
+		"""
+		Returns the date packed into a single integer (yyyymmdd) so it can be used as a key
+		
+		Returns:
+			int: The packed date
+		"""
+		return this.year * 10000 + this.month * 100 + this.day;
+	
+	
+	
+	
+	# The date and start time packed into a single integer, yyyymmddhh
+	@property
+	def key(this) -> int:
+		"""
+		Returns the date and start time packed into a single integer (yyyymmddhh) for sorting
+		
+		Returns:
+			int: The packed sort key
+		"""
+		return (this.year * 10000 + this.month * 100 + this.day) * 100 + this.start;
+	
+	
+	
+	
+	# The string format is what gets saved to a file
+	def __str__(this) -> str:
+		return f"{this.priority};{this.day}/{this.month}/{this.year};{this.start};{this.end};{this.description}";
+	
+	
+	def __repr__(this) -> str:
+		return f"Record({str(this)!r})";
+
+
+
+# In-memory storage for the records of a diary
+class MemoryStore:
+	"""
+	Keeps the records of a diary in a list, along with the indexes used to check and show them
+	
+	Any other store (such as sqlitestore.SqliteStore) needs the same methods
+	
+	Methods:
+		append(record) -> None:
+			Add a record to the end of the store
+		
+		replace(records, timeOrder) -> None:
+			Replace every record in the store
+		
+		slice(offset, stop) -> Iterator[Record]:
+			Get the records between two positions
+		
+		dayMask(date) -> int:
+			Get the bitmask of hours booked on a day
+		
+		between(low, high) -> Iterator[Record]:
+			Get the records with a sort key from low up to high, in time order
+		
+		sort(sortMethod) -> bool:
+			Sort the records by priority or time
+		
+		toList() -> list[Record]:
+			Get the records as a list
+		
+		remove(record) -> bool:
+			Remove a record, leaving a tombstone in its place
+		
+		update(old, new) -> bool:
+			Swap a record for a new one in the same place
+		
+		compact() -> None:
+			Clear out the tombstones
+	"""
+	def __init__(this) -> None:
+		# Removed records are left as None (a tombstone) until the store is compacted, so nothing has to shift along
+		this.records: list[Record | None] = [];
+		this.removed: int = 0;
+		
+		# Where each record is in the list, only built the first time a record is removed or updated
+		this._positions: dict[Record, int] | None = None;
+		
+		# Occupancy index, packed date -> bitmask of the hours booked on that day
+		this.occupancy: dict[int, int] = {};
+		
+		# Sorted index, the sort key (yyyymmddhh) of every record in time order, and the records in the same order
+		this.keys: list[int] = [];
+		this.byKey: list[Record] = [];
+		
+		# Records added out of time order, merged into the sorted index the next time it's searched
+		# Several readers may search at once, so only one of them gets to do the merge
+		# Removed records are left as None in byKey, and counted so searches know when to skip them
+		this.pending: list[Record] = [];
+		this.keysRemoved: int = 0;
+		this._mergeLock = threading.Lock();
+		
+		# The length of the longest description (or the "Subject" title), so showRecords() knows its widths up front
+		this.descLength: int = 7;
+	
+	
+	
+	
+	def __len__(this) -> int:
+		return len(this.records) - this.removed;
+	
+	
+	# Readers stream the list after letting go of the lock, so a record can be removed while they're part way through it
+	# The tombstones are always skipped, even if there weren't any when the reader started
+	def __iter__(this) -> Iterator[Record]:
+		return (record for record in this.records if(record is not None));
+	
+	
+	
+	
+	# Add a record to the indexes
+	def _index(this, record: Record) -> None:
+		"""
+		Adds a record to the indexes
+		
+		Args:
+			record (Record): The record to index
+		"""
+		date = record.date;
+		this.occupancy[date] = this.occupancy.get(date, 0) | hourMask(record.start, record.end);
+		
+		if(len(record.description) > this.descLength):
+			this.descLength = len(record.description);
+		
+		# Records added in time order go straight onto the end of the sorted index
+		# Anything else waits in pending until the next query, so adding never has to shift the index along
+		key = record.key;
+		if(len(this.pending) == 0 and (len(this.keys) == 0 or key >= this.keys[-1])):
+			this.keys.append(key);
+			this.byKey.append(record);
+		else:
+			this.pending.append(record);
+	
+	
+	
+	
+	# Add a single record
+	def append(this, record: Record) -> None:
+		"""
+		Appends a record and keeps the indexes up to date
+		
+		Args:
+			record (Record): The record to add
+		"""
+		if(this._positions is not None):
+			this._positions[record] = len(this.records);
+		
+		this.records.append(record);
+		this._index(record);
+	
+	
+	
+	
+	# Replace all the records and rebuild the indexes
+	def replace(this, records: list[Record], timeOrder: list[Record] | None = None) -> None:
+		"""
+		Replaces every record and rebuilds the indexes to match
+		
+		Args:
+			records (list[Record]): The new records
+			timeOrder (list[Record] | None, optional): The same records in time order, if the caller already has them,
+				so the sorted index doesn't have to be sorted again. Defaults to None.
+		"""
+		this.records = records;
+		this.removed = 0;
+		this._positions = None;
+		this.pending = [];
+		this.keysRemoved = 0;
+		
+		# Sort the index once up front, instead of inserting every record into the right place
+		if(timeOrder is None):
+			timeOrder = sorted(records, key=lambda record: record.key);
+		
+		# The index is built in one go rather than a record at a time through _index(), it's already in order
+		this.byKey = list(timeOrder);
+		this.keys = [record.key for record in timeOrder];
+		
+		occupancy: dict[int, int] = {};
+		for key, record in zip(this.keys, timeOrder):
+			date = key // 100;
+			occupancy[date] = occupancy.get(date, 0) | hourMask(record.start, record.end);
+		
+		this.occupancy = occupancy;
+		this.descLength = max(7, max(map(len, (record.description for record in records)), default=0));
+	
+	
+	
+	
+	# Get part of the records without copying them
+	def slice(this, offset: int, stop: int | None) -> Iterator[Record]:
+		"""
+		Returns the records from offset up to (but not including) stop
+		
+		Args:
+			offset (int): The position of the first record
+			stop (int | None): The position to stop at, or None for the end
+		
+		Returns:
+			Iterator[Record]: The records in the slice
+		"""
+		# Positions don't count tombstones, so they have to be skipped over until the store is compacted
+		return islice(iter(this), offset, stop);
+	
+	
+	
+	
+	# Get the hours booked on a day
+	def dayMask(this, date: int) -> int:
+		"""
+		Returns the bitmask of hours booked on a day, see hourMask()
+		
+		Args:
+			date (int): The packed date (yyyymmdd)
+		
+		Returns:
+			int: The bitmask of booked hours, 0 if nothing is booked
+		"""
+		return this.occupancy.get(date, 0);
+	
+	
+	
+	
+	# Move the records added out of order into the sorted index
+	def _mergePending(this) -> None:
+		"""
+		Merges the pending records into the sorted index
+		
+		A few records are binary inserted, otherwise they're added to the end and the index is re-sorted.
+		The index is already one sorted run, so the sort only really has to deal with the new records.
+		"""
+		if(len(this.pending) == 0):
+			return;
+		
+		with this._mergeLock:
+			# Another reader may have merged them while we were waiting
+			if(len(this.pending) == 0):
+				return;
+			
+			if(len(this.pending) <= 32):
+				for record in this.pending:
+					# Insert after any records with the same key, so they stay in the order they were added
+					key = record.key;
+					position = bisect_right(this.keys, key);
+					this.keys.insert(position, key);
+					this.byKey.insert(position, record);
+			else:
+				# The sort is stable, so records with the same key stay in the order they were added
+				# Any tombstones are dropped while we're rebuilding the index anyway
+				if(this.keysRemoved > 0):
+					this.byKey = [record for record in this.byKey if(record is not None)];
+					this.keysRemoved = 0;
+				
+				this.byKey.extend(this.pending);
+				this.byKey.sort(key=lambda record: record.key);
+				this.keys = [record.key for record in this.byKey];
+			
+			this.pending = [];
+	
+	
+	
+	
+	# Get the records in a range of sort keys
+	def between(this, low: int, high: int) -> Iterator[Record]:
+		"""
+		Returns the records with a sort key (yyyymmddhh) from low up to (but not including) high, in time order
+		
+		Binary searches the sorted index, so this costs O(log n) plus the number of records returned
+		
+		Args:
+			low (int): The lowest sort key to include
+			high (int): The sort key to stop at
+		
+		Returns:
+			Iterator[Record]: The records in the range
+		"""
+		this._mergePending();
+		
+		first = bisect_left(this.keys, low);
+		last = bisect_left(this.keys, high, first);
+		
+		if(this.keysRemoved == 0):
+			return iter(this.byKey[first:last]);
+		
+		return iter([record for record in this.byKey[first:last] if(record is not None)]);
+	
+	
+	
+	
+	# Sort the records
+	def sort(this, sortMethod: str) -> bool:
+		"""
+		Sorts the records on a single packed (date, start) key, see Diary.sortBy()
+		
+		Args:
+			sortMethod (str): Either "time" or "priority" - lowercase
+		
+		Returns:
+			bool: False if the sort method was invalid, True if the records were sorted
+		"""
+		# Time is always used, priority just puts the high priority appointments in front
+		if(sortMethod == "time"):
+			sortedArray = sorted(this, key=lambda record: record.key);
+		
+		elif(sortMethod == "priority"):
+			sortedArray = sorted(this, key=lambda record: (record.priority.lower() != "high", record.key));
+		
+		else:
+			return false;
+		
+		# Swap in the sorted records, rebuilding the indexes as we go
+		this.replace(sortedArray, sortedArray if(sortMethod == "time") else None);
+		return true;
+	
+	
+	
+	
+	# Get the records as a list
+	def toList(this) -> list[Record]:
+		"""
+		Returns the records as a list, for the memory store this is the list itself unless it has tombstones
+		
+		Returns:
+			list[Record]: The records
+		"""
+		if(this.removed == 0):
+			return this.records;
+		
+		return list(this);
+	
+	
+	
+	
+	# Take a record out of the sorted index
+	def _unindex(this, record: Record) -> None:
+		"""
+		Leaves a tombstone where the record was in the sorted index, and works out its day's bitmask again
+		
+		Args:
+			record (Record): The record to take out
+		"""
+		this._mergePending();
+		
+		# Records with the same key are next to each other, so only that run has to be looked through
+		key = record.key;
+		position = bisect_left(this.keys, key);
+		while(this.byKey[position] is not record):
+			position += 1;
+		
+		this.byKey[position] = None;
+		this.keysRemoved += 1;
+		
+		# Another record could share some of its hours (only if overlaps were loaded from a file), so the day is rebuilt from its records
+		date = record.date;
+		mask = 0;
+		for other in this.between(date * 100, date * 100 + 100):
+			mask |= hourMask(other.start, other.end);
+		
+		if(mask == 0):
+			this.occupancy.pop(date, None);
+		else:
+			this.occupancy[date] = mask;
+	
+	
+	
+	
+	# Find where a record is in the list
+	def _position(this, record: Record) -> int | None:
+		if(this._positions is None):
+			this._positions = { other: position for position, other in enumerate(this.records) if(other is not None) };
+		
+		return this._positions.get(record);
+	
+	
+	
+	
+	# Remove a single record
+	def remove(this, record: Record) -> bool:
+		"""
+		Removes a record, it's left as a tombstone in the list until the store is compacted
+		
+		Args:
+			record (Record): The record to remove, as returned by the store
+		
+		Returns:
+			bool: False if the record isn't in the store, True if it was removed
+		"""
+		position = this._position(record);
+		if(position is None):
+			return false;
+		
+		this.records[position] = None;
+		this.removed += 1;
+		del this._positions[record];
+		this._unindex(record);
+		
+		# Once tombstones make up half the list it's cheaper to clear them out than to keep skipping them
+		if(this.removed > 1000 and this.removed * 2 > len(this.records)):
+			this.compact();
+		
+		return true;
+	
+	
+	
+	
+	# Swap a record for a new one
+	def update(this, old: Record, new: Record) -> bool:
+		"""
+		Replaces a record with a new one, in the same place in the list
+		
+		Args:
+			old (Record): The record to replace, as returned by the store
+			new (Record): The record to put in its place
+		
+		Returns:
+			bool: False if the old record isn't in the store, True if it was replaced
+		"""
+		position = this._position(old);
+		if(position is None):
+			return false;
+		
+		this.records[position] = new;
+		del this._positions[old];
+		this._positions[new] = position;
+		
+		this._unindex(old);
+		this._index(new);
+		return true;
+	
+	
+	
+	
+	# Clear out the tombstones
+	def compact(this) -> None:
+		"""
+		Rebuilds the list and indexes without the tombstones left by removed and updated records
+		"""
+		if(this.removed > 0 or this.keysRemoved > 0):
+			this.replace(list(this));
+
+
+
+# The keys the records can be ordered by for Diary.orderedBy(), each turns a record into something comparable
+# High priority comes before low, descriptions are compared without caring about case
+ORDER_KEYS: dict[str, Callable[[Record], int | str]] = {
+	"priority": lambda record: 0 if(record.priority.lower() == "high") else 1,
+	"date": lambda record: record.date,
+	"start": lambda record: record.start,
+	"end": lambda record: record.end,
+	"time": lambda record: record.key,
+	"duration": lambda record: record.end - record.start,
+	"description": lambda record: record.description.casefold()
+};
+
+
+
+# Set up our diary class
+class Diary:
+	"""
+	Methods:
+		addRecord() -> None:
+			Add new record(s) to the diary
+		
+		showRecords() -> None:
+			Show all the records in the diary
+		
+		sortRecords() -> Bool:
+			Sort the records by priority or time.
+		
+		sortBy(sortMethod) -> Bool:
+			Sort the records by priority or time without asking the user
+		
+		addRecords(appointments) -> list[AddResult]:
+			Add a batch of records without asking the user
+		
+		writeRecords(stream, offset, limit) -> None:
+			Write the table of records to a stream, a chunk at a time
+		
+		exportRecords() -> list[str]:
+			Get the records in the string format used for saving
+		
+		enableStats(traceMemory) -> Stats:
+			Start recording how long each operation takes
+		
+		recordsOn(day, month, year) -> list[Record]:
+			Get the records on a day
+		
+		recordsBetween(start, end) -> list[Record]:
+			Get the records between two dates
+		
+		recordAt(day, month, year, hour) -> Record | None:
+			Get the record booked at an hour
+		
+		findFreeSlots(length, start, end, count) -> list[Appointment]:
+			Find the earliest free times for an appointment
+		
+		orderedBy(*keys) -> list[Record]:
+			Get the records ordered by several keys, without changing their stored order
+		
+		updateRecord(day, month, year, start, changes) -> str | None:
+			Change an appointment, checking it the same way as a new one
+		
+		rescheduleRecord(day, month, year, start, newDay, newMonth, newYear, newStart, newEnd) -> str | None:
+			Move an appointment to a new time
+		
+		deleteRecord(day, month, year, start) -> bool:
+			Cancel an appointment
+		
+		compact() -> None:
+			Clear out the tombstones left by cancelled and changed appointments
+	"""
+	# Init function for the diary class - Sets up everything we need
+	def __init__(this, records: list[str | Record] | None = None, store: MemoryStore | None = None) -> None:
+		"""
+		Initialise the diary
+		
+		Args:
+			records (list[str | Record] | None, optional): A pre-existing record set. Defaults to None.
+			store (MemoryStore | None, optional): Where to keep the records, such as a sqlitestore.SqliteStore. Defaults to a new MemoryStore.
+		"""
+		# We support loading existing records if we have them, otherwise we init with an empty list
+		# The default is None rather than [], a list default would be shared between every diary
+		if(records is None):
+			records = [];
+		
+		if(len(records) > 0):
+			print(f"Loading {len(records)} existing records...");
+		
+		# Stats for the instrumented methods, None while they're turned off
+		this.stats: Stats | None = None;
+		
+		# Readers can share the diary, anything that changes it holds the lock on its own
+		this._lock = ReadWriteLock();
+		
+		# Functions to call when a record is added, when one is updated or deleted (the new record is None if it was deleted),
+		# or when all the records are replaced (such as after a sort). onBeforeReplace is called just before they're replaced.
+		# These are called while the diary is locked for writing, so they must not call any of the diary's locking methods
+		this.onAdd: list[Callable[[Record], None]] = [];
+		this.onUpdate: list[Callable[[Record, Record | None], None]] = [];
+		this.onBeforeReplace: list[Callable[[], None]] = [];
+		this.onReplace: list[Callable[[], None]] = [];
+		
+		this.store = store if(store is not None) else MemoryStore();
+		
+		# The records in each order asked for with orderedBy(), thrown away whenever the records change
+		this._orderings: dict[tuple[str, ...], list[Record]] = {};
+		
+		# Records are parsed once here, every other function works on the parsed records
+		# A store may already have records in it (such as an existing database), so we only replace them if we were given some
+		if(len(records) > 0):
+			this._setRecords([record if(isinstance(record, Record)) else Record.fromString(record) for record in records]);
+	
+	
+	
+	
+	# All the records in the diary
+	@property
+	def records(this) -> list[Record]:
+		"""
+		Returns a copy of the records in the diary, in their stored order
+		
+		The memory store's toList() is its own list, which gets tombstones written into it when records are deleted,
+		so callers get a list of their own that later changes to the diary don't touch
+		
+		Returns:
+			list[Record]: The records
+		"""
+		with this._lock.reading():
+			return list(this.store.toList());
+	
+	
+	
+	
+	# Replace all the records
+	def _setRecords(cls, records: list[Record]) -> None:
+		"""
+		Replaces the records of the diary, the store rebuilds its indexes to match
+		
+		Args:
+			records (list[Record]): The new records
+		"""
+		with cls._lock.writing():
+			for listener in cls.onBeforeReplace:
+				listener();
+			
+			cls.store.replace(records);
+			cls._orderings = {};
+			
+			for listener in cls.onReplace:
+				listener();
+	
+	
+	
+	
+	# Add a single record to the diary
+	@instrumented("add")
+	def _appendRecord(cls, record: Record) -> None:
+		"""
+		Appends a record to the diary, the store keeps its indexes up to date
+		The diary must already be locked for writing
+		
+		Args:
+			record (Record): The record to add
+		"""
+		cls.store.append(record);
+		cls._orderings = {};
+		
+		for listener in cls.onAdd:
+			listener(record);
+	
+	
+	
+	
+	# Check for overlaps and add the record in one step
+	def _insertIfFree(cls, record: Record) -> bool:
+		"""
+		Adds a record to the diary, but only if it doesn't overlap another appointment
+		
+		The check and the add happen while the diary is locked, so two threads can't both book the same time
+		
+		Args:
+			record (Record): The record to add
+		
+		Returns:
+			bool: True if the record was added, False if it overlapped
+		"""
+		with cls._lock.writing():
+			if(cls.store.dayMask(record.date) & hourMask(record.start, record.end)):
+				return false;
+			
+			cls._appendRecord(record);
+			return true;
+	
+	
+	
+	
+	# Turn on the stats
+	def enableStats(cls, traceMemory: bool = false) -> Stats:
+		"""
+		Starts recording call counts, latencies and record counts for adding, validating,
+		overlap checks, expanding, sorting and showing
+		
+		Args:
+			traceMemory (bool, optional): Whether to also measure the peak memory of each sort, this slows sorting down. Defaults to false.
+		
+		Returns:
+			Stats: The stats, which keep filling up until disableStats() is called
+		"""
+		if(cls.stats is not None):
+			uninstrument(cls);
+		
+		cls.stats = Stats(traceMemory);
+		instrument(cls, cls.stats);
+		return cls.stats;
+	
+	
+	
+	
+	# Turn off the stats
+	def disableStats(cls) -> Stats | None:
+		"""
+		Stops recording stats
+		
+		Returns:
+			Stats | None: The stats that were recorded, if they were turned on
+		"""
+		stats = cls.stats;
+		cls.stats = None;
+		uninstrument(cls);
+		return stats;
+	
+	
+	
+	
+	# Turn the records back into the string format
+	def exportRecords(cls) -> list[str]:
+		"""
+		Returns the records in the "priority;d/m/y;start;end;description" string format
+		
+		Returns:
+			list[str]: The records as strings, ready to be saved
+		"""
+		with cls._lock.reading():
+			return [str(record) for record in cls.store];
+	
+	
+	
+	
+	# Expand records into dictionaries
+	@instrumented("expand", lambda diary, args, result: len(result))
+	def _expandRecords(cls) -> list[Appointment]:
+		"""
+		Expands the records into an a list of dictionary objects
+		
+		The records are already parsed, so this no longer has to split any strings
+		
+		Returns:
+			List[Appointment]: A list of Appointment dictionary's
+		"""
+		with cls._lock.reading():
+			return [record.toAppointment() for record in cls.store];
+	
+	
+	
+	
+	# Get every record on a single day
+	def recordsOn(cls, day: int, month: int, year: int) -> list[Record]:
+		"""
+		Returns the records on a day, in time order
+		
+		Args:
+			day (int): The day of the month
+			month (int): The month of the year
+			year (int): The year
+		
+		Returns:
+			list[Record]: The records on that day
+		"""
+		date = year * 10000 + month * 100 + day;
+		
+		with cls._lock.reading():
+			return list(cls.store.between(date * 100, (date + 1) * 100));
+	
+	
+	
+	
+	# Get every record between two dates
+	def recordsBetween(cls, start: tuple[int, int, int], end: tuple[int, int, int]) -> list[Record]:
+		"""
+		Returns the records from the start date up to and including the end date, in time order
+		
+		Args:
+			start (tuple[int, int, int]): The first date to include, as (day, month, year)
+			end (tuple[int, int, int]): The last date to include, as (day, month, year)
+		
+		Returns:
+			list[Record]: The records in the range
+		"""
+		startDate = start[2] * 10000 + start[1] * 100 + start[0];
+		endDate = end[2] * 10000 + end[1] * 100 + end[0];
+		
+		with cls._lock.reading():
+			return list(cls.store.between(startDate * 100, (endDate + 1) * 100));
+	
+	
+	
+	
+	# Find what is booked at a certain hour
+	def recordAt(cls, day: int, month: int, year: int, hour: int) -> Record | None:
+		"""
+		Returns the record booked at an hour on a day, if there is one
+		
+		Args:
+			day (int): The day of the month
+			month (int): The month of the year
+			year (int): The year
+			hour (int): The hour to look up
+		
+		Returns:
+			Record | None: The record that covers the hour, or None if the hour is free
+		"""
+		# Only the handful of records on that day need to be looked at
+		for record in cls.recordsOn(day, month, year):
+			if(hourMask(record.start, record.end) & (1 << hour)):
+				return record;
+		
+		return None;
+	
+	
+	
+	
+	# Find the earliest free times for an appointment
+	@instrumented("findFreeSlots")
+	def findFreeSlots(cls, length: int, start: tuple[int, int, int], end: tuple[int, int, int] | None = None, count: int = 1, currTime: dict | None = None) -> list[Appointment]:
+		"""
+		Finds the earliest free times for an appointment between 7 and 22, that are still in the future
+		
+		Each day is checked against its bitmask of booked hours, so no records need to be looked at
+		
+		Args:
+			length (int): How many hours the appointment is
+			start (tuple[int, int, int]): The first date to search, as (day, month, year)
+			end (tuple[int, int, int] | None, optional): The last date to search, as (day, month, year). Defaults to a year after start.
+			count (int, optional): How many free times to find. Defaults to 1.
+			currTime (dict | None, optional): The current time from _getCurrentTime(), fetched if not given
+		
+		Returns:
+			list[Appointment]: Up to count free times, with the day, month, year, start and end set
+		"""
+		slots: list[Appointment] = [];
+		
+		# Appointments have to start and end between 7 and 22
+		if(not 1 <= length <= 15 or count < 1):
+			return slots;
+		
+		if(currTime is None):
+			currTime = cls._getCurrentTime();
+		
+		today = date(currTime["year"], currTime["month"], currTime["day"]);
+		
+		day = date(start[2], start[1], start[0]);
+		# A year after a start late in 9999 would be past the last date there is, so the search stops at date.max
+		lastDay = date.fromordinal(min(day.toordinal() + 365, date.max.toordinal())) if(end is None) else date(end[2], end[1], end[0]);
+		
+		# Nothing in the past is free, so skip straight to today
+		day = max(day, today);
+		
+		# The bitmask for every start time the appointment could have
+		candidates = [(hour, hourMask(hour, hour + length)) for hour in range(7, 23 - length)];
+		
+		while(day <= lastDay):
+			with cls._lock.reading():
+				booked = cls.store.dayMask(day.year * 10000 + day.month * 100 + day.day);
+			
+			for hour, mask in candidates:
+				# Today, only the hours after the current hour are in the future
+				if(day == today and hour <= currTime["hour"]):
+					continue;
+				
+				if(booked & mask == 0):
+					slots.append({ "day": day.day, "month": day.month, "year": day.year, "start": hour, "end": hour + length });
+					booked |= mask;  # So the next free time we find doesn't overlap this one
+					
+					if(len(slots) == count):
+						return slots;
+			
+			if(day == date.max):
+				break;
+			
+			day += timedelta(days=1);
+		
+		return slots;
+	
+	
+	
+	
+	# Function to get the current time
+	# To be used in the addRecord() function -> Using in the isValidDate function is against the assignment spec
+	def _getCurrentTime(cls) -> dict:
+		"""
+		Returns the date and hour in a dictionary
+		
+		Returns:
+			dict: The time in a dictionary format
+		"""
+		currDate = datetime.now().strftime("%d %m %Y %H");
+		dateArray = currDate.split(" ");
+		dateObject = { "day": int(dateArray[0]), "month": int(dateArray[1]), "year": int(dateArray[2]), "hour": int(dateArray[3]) };
+		return dateObject;
+	
+	
+	
+	
+	def _isFutureTime(cls, newRecord: dict, currTime: dict | None = None) -> bool:
+		"""
+		Returns true or false depnding on if the time is in the future
+		
+		Args:
+			newRecord (dict): The day, month, year and hour (or None) to check
+			currTime (dict, optional): The current time from _getCurrentTime(), fetched if not given
+		
+		Returns:
+			bool: True if the time is in the future, False if not
+		"""
+		error = cls._checkFutureTime(newRecord, currTime);
+		if(error is not None):
+			print(error);
+			return false;
+		
+		return true;
+	
+	
+	
+	
+	# Same as _isFutureTime(), but returns the error instead of printing it
+	@instrumented("validate")
+	def _checkFutureTime(cls, newRecord: dict, currTime: dict | None = None) -> str | None:
+		"""
+		Checks if the time is in the future
+		
+		Args:
+			newRecord (dict): The day, month, year and hour (or None) to check
+			currTime (dict, optional): The current time from _getCurrentTime(), fetched if not given
+		
+		Returns:
+			str | None: The error message if the time is not in the future, otherwise None
+		"""
+		
+		# Get the current time, if we weren't given it
+		if(currTime is None):
+			currTime = cls._getCurrentTime();
+		
+		# Error messages here should be self explanatory for whats happening
+		if(newRecord["year"] < currTime["year"]):
+			return "Error: Year must be greater than or equal to the current year!";
+		
+		# If the year is the same, we now check the month
+		if(newRecord["year"] == currTime["year"]):
+			
+			if(newRecord["month"] < currTime["month"]):
+				return "Error: Month must be greater than or equal to the current month!";
+			
+			# If the month is the same, we now check the day
+			if(newRecord["month"] == currTime["month"]):
+				
+				if(newRecord["day"] < currTime["day"]):
+					return "Error: Day must be greater than or equal to the current day!";
+					
+				# If the day is the same, we now check the hour
+				if(newRecord["day"] == currTime["day"]):
+					
+					if(newRecord["hour"] is not None):
+						if(newRecord["hour"] <= currTime["hour"]):
+							return "Error: Hour must be greater than the current hour!";
+		
+		# All checks passed
+		return None;
+	
+	
+	
+	
+	# Function to check if a year is a leap year
+	def _isLeapYear(cls, year: int) -> bool:
+		"""
+		Returns true or false depnding on if the year is a leap year
+		
+		Args:
+			year (int): An integer number to check if it would be a leap year
+		
+		Returns:
+			bool: True if the year is a leap year, False if not
+		"""
+		if(year % 100 == 0): # If the year is divisible by 100
+			return true if(year % 400 == 0) else false; # If it is divisible by 400, it's a leap year
+
+		return true if(year % 4 == 0) else false; # If it is divisible by 4, it's a leap year
+	
+	
+	
+	
+	# Check if a date is valid
+	def _isValidDate(cls, day: int, month: int, year: int) -> bool:
+		"""
+		Returns true or false depnding on if the date is valid
+
+		Args:
+			day (int): The day of the month
+			month (int): The month of the year
+			year (int): The year
+
+		Returns:
+			bool: True if the date is valid, False if not
+		"""
+		error = cls._checkDate(day, month, year);
+		if(error is not None):
+			print(error);
+			return false;
+		
+		return true;
+	
+	
+	
+	
+	# Same as _isValidDate(), but returns the error instead of printing it
+	@instrumented("validate")
+	def _checkDate(cls, day: int, month: int, year: int) -> str | None:
+		"""
+		Checks if the date is valid
+
+		Args:
+			day (int): The day of the month
+			month (int): The month of the year
+			year (int): The year
+
+		Returns:
+			str | None: The error message if the date is invalid, otherwise None
+		"""
+		
+		# If the year is less than 10000 and greater than or equal to 2022, it's a valid year
+		if(10000 > year >= 2022): # This has the same effect as 10000 > year > 2021
+			pass; # Cheeky
+		else:
+			return "Error: Year must be between 10000 and 2022";
+		
+		# If the month is less than or equal to 12 and greater than or equal to 1, it's a valid month
+		if(1 <= month <= 12):
+			pass;
+		else:
+			return "Error: Month must be between 1 and 12";
+		
+		# For february, we determine if it has 29 or 28 days depending on if it's a leap year
+		days = MONTHS[month]["days"];
+		if(month == 2 and cls._isLeapYear(year)):
+			days = 29;
+		
+		# Check if the day is less than or equal to the days in the month, but greater than 1
+		if(1 <= day <= days):
+			return None;
+		else:
+			return f"Error: Day must be between 1 and {days} for the month of {MONTHS[month]['name']}!";
+	
+	
+	
+	
+	# Check if a time is valid
+	def _isValidTime(cls, start: int, end: int) -> bool:
+		"""
+		Returns true or false depending on if the time is valid
+		
+		Args:
+			start (int): The start time
+			end (int): The end time
+		
+		Returns:
+			bool: True if the time is valid, False if not
+		"""
+		error = cls._checkTime(start, end);
+		if(error is not None):
+			print(error);
+			return false;
+		
+		return true;
+	
+	
+	
+	
+	# Same as _isValidTime(), but returns the error instead of printing it
+	@instrumented("validate")
+	def _checkTime(cls, start: int, end: int) -> str | None:
+		"""
+		Checks if the time is valid
+		
+		Args:
+			start (int): The start time
+			end (int): The end time
+		
+		Returns:
+			str | None: The error message if the time is invalid, otherwise None
+		"""
+		# If the start time is greater than or equal to the end time, it's not valid
+		if(start >= end):
+			return "Error: Start time must be before end time!";
+		
+		# If the start time and/ or end time is outside of the range 7-22, it's not valid
+		if(7 <= start <= 22):
+			pass; # Cheeky
+		else:
+			return "Error: Start time must be between 7 and 22!";
+			
+		if(7 <= end <= 22):
+			pass; # Cheeky
+		else:
+			return "Error: End time must be between 7 and 22!";
+		
+		# Passed all checks
+		return None;
+	
+	
+	
+	
+	# Check if a record overlaps with another record
+	@instrumented("overlapCheck")
+	def _isConcurrentAppointment(cls, newApp: Appointment, moving: Record | None = None) -> bool:
+		"""
+		Checks if an appointment overlaps with another appointment
+		
+		Args:
+			newApp (Appointment): The new appointment to check against existing records
+			moving (Record | None, optional): A record being moved, it can't overlap itself. Defaults to None.
+		
+		Returns:
+			bool: True if there is an overlap, otherwise false
+		"""
+		# Each day has a bitmask of the hours booked, so we only need a single lookup and compare
+		date = newApp["year"] * 10000 + newApp["month"] * 100 + newApp["day"];
+		with cls._lock.reading():
+			booked = cls._bookedHours(date, moving);
+		
+		return (booked & hourMask(newApp["start"], newApp["end"])) != 0;
+	
+	
+	
+	
+	# The hours booked on a day, leaving out a record being moved
+	def _bookedHours(cls, date: int, moving: Record | None) -> int:
+		"""
+		Returns the bitmask of hours booked on a day, the diary must already be locked
+		
+		Args:
+			date (int): The packed date (yyyymmdd)
+			moving (Record | None): A record being moved, its hours don't count as booked
+		
+		Returns:
+			int: The bitmask of booked hours
+		"""
+		booked = cls.store.dayMask(date);
+		
+		# Appointments can't overlap, so the hours of the record being moved are only booked by it
+		if(moving is not None and moving.date == date):
+			booked &= ~hourMask(moving.start, moving.end);
+		
+		return booked;
+	
+	
+	
+	
+	# Add records to the diary
+	# Realistically should have split this into multiple smaller functions
+	def addRecord(cls) -> None:
+		"""
+		Adds a record to the diary
+		
+		Asks the user for the following information:
+			Date, Start Time, End Time, Description
+		"""
+		date = ""
+		while(true):
+			
+			# Get the date and make sure it's valid or "end"
+			while(true):
+				while(true):
+					date = input("\nEnter the date of the appointment (dd/mm/yyyy) type 'END' to exit: ");
+					
+					# Our break word
+					if(date == 'END'):
+						print('\nExiting function...');
+						
+						# Call showRecords() as we were instructed, and end the function
+						return cls.showRecords();
+					
+					# Split the date using "/" as the delimiter
+					dateint = date.split("/");
+					
+					# If dateint is 3, we break this loop
+					if(len(dateint) == 3):
+						break;
+					
+					# Otherwise, we print an error message and continue looping
+					print("Error: Invalid date format!");
+				
+				# Check if the numbers can be converted to integers if so do it
+				# Weird fake ternaries to make sure we don't get an error
+				day = int(dateint[0]) if dateint[0].isdigit() else "bad";
+				month = int(dateint[1]) if dateint[1].isdigit() else "bad";
+				year = int(dateint[2]) if dateint[2].isdigit() else "bad";
+				
+				# Check if the day/month/year were correctly converted to numbers, if not restart loop
+				if(day == "bad" or month == "bad" or year == "bad"):
+					print("Error: Invalid date format!");
+					continue;
+				
+				validDate = cls._isValidDate(day, month, year);
+				
+				# If the the date is invalid, restart the loop
+				if(not validDate):
+					continue;
+				
+				# Check if the appointment is in the future/ same day so far
+				futureAppointment = cls._isFutureTime({ "day": day, "month": month, "year": year, "hour": None });
+				if(futureAppointment):
+					break;
+			# The date is theoretically valid so far
+			
+			
+			# Get the start and end times and make sure they're valid
+			while(true):
+				# Get the start time and make sure it's somewhat valid
+				while(true):
+					start = input("\nEnter the start time of the appointment (hh): ");
+					startint = int(start) if start.isdigit() else "bad";
+					
+					# If startint isn't bad, we can break this loop
+					if(startint != "bad"):
+						break;
+					
+					print("Error: Invalid start time format!");
+				
+				
+				# Get the end time and make sure it's somewhat valid
+				while(true):
+					end = input("\nEnter the end time of the appointment (hh): ");
+					endint = int(end) if end.isdigit() else "bad";
+					
+					# If endint isn't bad, we can break this loop
+					if(endint != "bad"):
+						break;
+					
+					print("Error: Invalid end time format!");
+				
+				
+				validTime = cls._isValidTime(startint, endint);
+				# If the time is invalid, restart the loop
+				if(not validTime):
+					continue;
+				
+				
+				futureAppointment = cls._isFutureTime({ "day": day, "month": month, "year": year, "hour": startint });
+				# If future appointment is true, the time is valid!
+				if(futureAppointment):
+					break;
+			# Start and end times are somewhat valid at this point
+			
+			
+			# Format date as required for isConcurrentAppointment()
+			apmnt: Appointment = { "day": day, "month": month, "year": year, "start": startint, "end": endint };
+			concurrent = cls._isConcurrentAppointment(apmnt);
+			
+			# If concurrent is true, we need to ask for a new date/ start/ end, so we restart the loop
+			# This also prevents users getting stuck in an infinite loop if they entered a date that cannot have any more appointments
+			if(concurrent):
+				print("\nError: Appointment overlaps with another appointment!");
+				
+				# Offer to show the next free times of the same length, so the user doesn't have to guess
+				findSlots = input("\nWould you like to see the next free times for an appointment this long? (Y/N): ");
+				if(findSlots.lower() == "y"):
+					slots = cls.findFreeSlots(endint - startint, (day, month, year), count=5);
+					
+					if(len(slots) == 0):
+						print("There are no free times of that length in the next year!");
+					
+					for slot in slots:
+						print(f"{slot['day']}/{slot['month']}/{slot['year']} from {slot['start']} to {slot['end']}");
+				
+				continue;
+			
+			
+			# Get the description of the appointment
+			while(true):
+				description = input("\nEnter the description of the appointment (Max of 30 characters): ");
+				
+				# If the description is within the required length, we can break this loop
+				if(30 >= len(description) >= 1):
+					break;
+				
+				# If it's empty
+				if(len(description) == 0):
+					print("Error: Description cannot be empty!");
+				
+				# If it's too long
+				if(len(description) > 30):
+					print("Error: Description is too long!");
+
+			
+			# Get the priority of the appointment
+			while(true):
+				priority = input("\nEnter the priority of the appointment (High/Low): ");
+				correctPriority = (priority.lower() == "high" or priority.lower() == "low");
+				
+				if(correctPriority):
+					# Someone else may have booked the time while we were asking, so the overlap is checked again as it's added
+					if(cls._insertIfFree(Record(priority, day, month, year, startint, endint, description))):
+						print("Successfully added the appointment to the records!");
+					else:
+						print("\nError: Appointment overlaps with another appointment!");
+					
+					break;
+				
+				print("Error: Invalid priority!");
+	
+	
+	
+	
+	# Add many records to the diary without asking the user anything
+	@instrumented("addBatch", lambda diary, args, result: len(result))
+	def addRecords(cls, appointments: Iterable[Appointment | str]) -> list[AddResult]:
+		"""
+		Adds a batch of records to the diary
+		
+		Each row goes through the same checks as addRecord(), including overlaps with
+		rows earlier in the same batch. Rows that fail a check are skipped, nothing is printed.
+		
+		Args:
+			appointments (Iterable[Appointment | str]): Appointment dictionaries or records in the string format
+		
+		Returns:
+			list[AddResult]: Whether each row was accepted, and the reason if it was not
+		"""
+		results: list[AddResult] = [];
+		
+		# The current time only needs to be fetched once for the whole batch
+		currTime = cls._getCurrentTime();
+		
+		for index, apmnt in enumerate(appointments):
+			reason = cls._checkAppointment(apmnt, currTime);
+			
+			# _checkAppointment gives us back the record if it passed every check
+			# Another thread may have booked the time since it was checked, so the overlap is checked again as it's added
+			if(isinstance(reason, Record)):
+				if(cls._insertIfFree(reason)):
+					results.append({ "index": index, "accepted": true, "reason": None });
+				else:
+					results.append({ "index": index, "accepted": false, "reason": "Error: Appointment overlaps with another appointment!" });
+			else:
+				results.append({ "index": index, "accepted": false, "reason": reason });
+		
+		return results;
+	
+	
+	
+	
+	# Run every check addRecord() would on a single appointment
+	def _checkAppointment(cls, apmnt: Appointment | str, currTime: dict, moving: Record | None = None) -> Record | str:
+		"""
+		Checks an appointment the same way addRecord() does
+		
+		Args:
+			apmnt (Appointment | str): An Appointment dictionary or a record in the string format
+			currTime (dict): The current time from _getCurrentTime()
+			moving (Record | None, optional): The record this appointment replaces, it doesn't count as an overlap,
+				and it can stay in the past if its time doesn't change. Defaults to None.
+		
+		Returns:
+			Record | str: The parsed record if every check passed, otherwise the error message
+		"""
+		try:
+			record = Record.fromString(apmnt) if(isinstance(apmnt, str)) else Record.fromAppointment(apmnt);
+			
+			# Appointment dictionaries aren't parsed, so a field like "1" or 1.5 would get past this and break the checks further down
+			for field in (record.day, record.month, record.year, record.start, record.end):
+				if(type(field) is not int):
+					raise TypeError(f"Expected an int, got {type(field).__name__}");
+		except (ValueError, IndexError, KeyError, TypeError):
+			return "Error: Invalid record format!";
+		
+		error = cls._checkDate(record.day, record.month, record.year);
+		if(error is not None):
+			return error;
+		
+		error = cls._checkTime(record.start, record.end);
+		if(error is not None):
+			return error;
+		
+		if(moving is None or record.key != moving.key):
+			error = cls._checkFutureTime({ "day": record.day, "month": record.month, "year": record.year, "hour": record.start }, currTime);
+			if(error is not None):
+				return error;
+		
+		if(cls._isConcurrentAppointment({ "day": record.day, "month": record.month, "year": record.year, "start": record.start, "end": record.end }, moving)):
+			return "Error: Appointment overlaps with another appointment!";
+		
+		if(len(record.description) == 0):
+			return "Error: Description cannot be empty!";
+		
+		if(len(record.description) > 30):
+			return "Error: Description is too long!";
+		
+		if(record.priority.lower() != "high" and record.priority.lower() != "low"):
+			return "Error: Invalid priority!";
+		
+		return record;
+	
+	
+	
+	
+	# Find the record that starts at an hour
+	def _recordStarting(cls, day: int, month: int, year: int, start: int) -> Record | None:
+		"""
+		Returns the record that starts at an hour on a day, from the sorted index. The diary must already be locked.
+		
+		Args:
+			day (int): The day of the month
+			month (int): The month of the year
+			year (int): The year
+			start (int): The start time
+		
+		Returns:
+			Record | None: The record, or None if nothing starts then
+		"""
+		key = (year * 10000 + month * 100 + day) * 100 + start;
+		return next(cls.store.between(key, key + 1), None);
+	
+	
+	
+	
+	# Change an appointment
+	@instrumented("update")
+	def updateRecord(cls, day: int, month: int, year: int, start: int, changes: Appointment) -> str | None:
+		"""
+		Changes the appointment that starts at an hour on a day, it stays in the same place in the stored order
+		
+		The changed appointment goes through the same checks as a new one, except that it can't overlap itself.
+		Changing the day or the start and end times reschedules it, which has to be to a time in the future.
+		
+		Args:
+			day (int): The day of the month of the appointment to change
+			month (int): The month of the year
+			year (int): The year
+			start (int): The start time
+			changes (Appointment): The fields to change, any that are left out keep their old value
+		
+		Returns:
+			str | None: The error message if the appointment wasn't changed, otherwise None
+		"""
+		with cls._lock.reading():
+			old = cls._recordStarting(day, month, year, start);
+		
+		if(old is None):
+			return "Error: There is no appointment at that time!";
+		
+		record = cls._checkAppointment({ **old.toAppointment(), **changes }, cls._getCurrentTime(), old);
+		if(not isinstance(record, Record)):
+			return record;
+		
+		# Something else may have changed the diary since we checked, so the record and the overlap are checked again as it's swapped in
+		with cls._lock.writing():
+			current = cls._recordStarting(day, month, year, start);
+			if(current is None or str(current) != str(old)):
+				return "Error: There is no appointment at that time!";
+			
+			if(cls._bookedHours(record.date, current) & hourMask(record.start, record.end)):
+				return "Error: Appointment overlaps with another appointment!";
+			
+			# The store can still turn it down, such as an occurrence of a recurring appointment that isn't stored on its own
+			if(not cls.store.update(current, record)):
+				return "Error: That appointment can't be changed!";
+			
+			cls._orderings = {};
+			
+			for listener in cls.onUpdate:
+				listener(current, record);
+		
+		return None;
+	
+	
+	
+	
+	# Move an appointment
+	def rescheduleRecord(cls, day: int, month: int, year: int, start: int, newDay: int, newMonth: int, newYear: int, newStart: int, newEnd: int) -> str | None:
+		"""
+		Moves the appointment that starts at an hour on a day to a new time, see updateRecord()
+		
+		Args:
+			day (int): The day of the month of the appointment to move
+			month (int): The month of the year
+			year (int): The year
+			start (int): The start time
+			newDay (int): The new day of the month
+			newMonth (int): The new month of the year
+			newYear (int): The new year
+			newStart (int): The new start time
+			newEnd (int): The new end time
+		
+		Returns:
+			str | None: The error message if the appointment wasn't moved, otherwise None
+		"""
+		return cls.updateRecord(day, month, year, start, { "day": newDay, "month": newMonth, "year": newYear, "start": newStart, "end": newEnd });
+	
+	
+	
+	
+	# Cancel an appointment
+	@instrumented("delete")
+	def deleteRecord(cls, day: int, month: int, year: int, start: int) -> bool:
+		"""
+		Deletes the appointment that starts at an hour on a day
+		
+		The store leaves a tombstone in its place, so nothing has to be shifted or rewritten. See compact().
+		
+		Args:
+			day (int): The day of the month
+			month (int): The month of the year
+			year (int): The year
+			start (int): The start time
+		
+		Returns:
+			bool: False if there was no appointment at that time, True if it was deleted
+		"""
+		with cls._lock.writing():
+			record = cls._recordStarting(day, month, year, start);
+			if(record is None or not cls.store.remove(record)):
+				return false;
+			
+			cls._orderings = {};
+			
+			for listener in cls.onUpdate:
+				listener(record, None);
+		
+		return true;
+	
+	
+	
+	
+	# Clear out the tombstones
+	@instrumented("compact", lambda diary, args, result: len(diary.store))
+	def compact(cls) -> None:
+		"""
+		Has the store clear out the tombstones left by deleted and updated appointments
+		
+		The memory store also does this on its own once tombstones make up half of it
+		"""
+		with cls._lock.writing():
+			cls.store.compact();
+	
+	
+	
+	
+	# Turn a single record into a row of the table
+	def _formatRecord(cls, record: Record) -> str:
+		"""
+		Formats a record as a row of the table printed by showRecords()
+		
+		Args:
+			record (Record): The record to format
+		
+		Returns:
+			str: The formatted row, without a newline
+		"""
+		# For each record, we're going to give them a variable so we better understand and access the data
+		priority = record.priority;
+		day = record.day;
+		month = record.month;
+		year = record.year;
+		start = record.start;
+		end = record.end;
+		description = record.description;
+		
+		# Make sure the the prioity, date, start and end will always be the same lengths
+		priority = "Low " if(priority.lower() == "low") else "High";
+		
+		# 9 -> 09 etc
+		# We do this to kinda cheat the system, we stored them correctly without the 0's in front
+		# But then to display them and make our life easier, we make sure they're all the same length
+		if(10 > day):
+			day = f"0{day}";
+		
+		if(10 > month):
+			month = f"0{month}";
+		
+		if(10 > start):
+			start = f"{start} ";
+		
+		if(10 > end):
+			end = f"{end} ";
+		
+		# Turn the date into the correct format
+		date = f"{day}/{month}/{year}"
+		
+		# Add the predefined spaces.
+		return f"{priority}        {date}     {start}        {end}      {description}";
+	
+	
+	
+	
+	# Render the table a chunk at a time
+	def renderRecords(cls, offset: int = 0, limit: int | None = None, chunkSize: int = 500, order: tuple[str, ...] | None = None) -> Iterator[str]:
+		"""
+		Renders the table of records as a stream of text chunks
+		
+		The column widths are known in advance (the longest description is tracked as records are added),
+		so rows can be written out as they are formatted instead of building the whole table first.
+		
+		Args:
+			offset (int, optional): The index of the first record to show. Defaults to 0.
+			limit (int | None, optional): The most records to show, or None for all of them. Defaults to None.
+			chunkSize (int, optional): How many rows go into each chunk. Defaults to 500.
+			order (tuple[str, ...] | None, optional): Keys to order the rows by, as for orderedBy(). Defaults to the stored order.
+		
+		Yields:
+			str: The headers, then chunks of up to chunkSize rows, each row ending in a newline
+		"""
+		# Titles will always be in the same location
+		headers = "\nPrioity     Date           Start     End     Subject\n";
+		# Seperators will always be in the same location, but desc length may change length
+		seperators = f"--------    ----------     -----     ---     {'-' * cls.store.descLength}\n";
+		yield headers + seperators;
+		
+		# The lock isn't held while the rows are written out, a sort swaps in a new list so we keep reading the one we started with
+		stop = None if(limit is None) else offset + limit;
+		if(order is not None):
+			records = islice(cls._ordering(tuple(order)), offset, stop);
+		else:
+			with cls._lock.reading():
+				records = cls.store.slice(offset, stop);
+		
+		chunk = [];
+		for record in records:
+			chunk.append(cls._formatRecord(record));
+			
+			if(len(chunk) >= chunkSize):
+				chunk.append("");  # So the join gives the last row a newline too
+				yield "\n".join(chunk);
+				chunk = [];
+		
+		if(len(chunk) > 0):
+			chunk.append("");
+			yield "\n".join(chunk);
+	
+	
+	
+	
+	# Write the table to a stream
+	@instrumented("show", lambda diary, args, result: len(diary.store))
+	def writeRecords(cls, stream: TextIO, offset: int = 0, limit: int | None = None, chunkSize: int = 500, order: tuple[str, ...] | None = None) -> None:
+		"""
+		Writes the table of records to a text stream, one chunk at a time
+		
+		Args:
+			stream (TextIO): Where to write the table, such as sys.stdout or an open file
+			offset (int, optional): The index of the first record to show. Defaults to 0.
+			limit (int | None, optional): The most records to show, or None for all of them. Defaults to None.
+			chunkSize (int, optional): How many rows go into each chunk. Defaults to 500.
+			order (tuple[str, ...] | None, optional): Keys to order the rows by, as for orderedBy(). Defaults to the stored order.
+		"""
+		for chunk in cls.renderRecords(offset, limit, chunkSize, order):
+			stream.write(chunk);
+	
+	
+	
+	
+	# Show all records in the diary
+	def showRecords(this) -> None:
+		"""
+		Show all records in the diary
+		
+		Streams a table of all the records in the diary, a chunk at a time
+		"""
+		if(len(this.store) == 0):
+			return print("Error: There are no records currently in the diary!");
+		
+		this.writeRecords(sys.stdout);
+	
+	
+	
+	
+	# Get the records in an order, building it if it isn't cached
+	def _ordering(cls, keys: tuple[str, ...]) -> list[Record]:
+		"""
+		Returns the records ordered by the keys, from the cache if they've been ordered that way since the last change
+		The list that's returned must not be changed, it's shared with the cache
+		
+		Args:
+			keys (tuple[str, ...]): The keys to order by, see orderedBy()
+		
+		Returns:
+			list[Record]: The ordered records
+		"""
+		ordering = cls._orderings.get(keys);
+		if(ordering is not None):
+			return ordering;
+		
+		fields = [];
+		for key in keys:
+			name = key[1:] if(key.startswith("-")) else key;
+			if(name not in ORDER_KEYS):
+				raise ValueError(f"Can't order records by {key!r}, the keys are {', '.join(ORDER_KEYS)}");
+			
+			fields.append((ORDER_KEYS[name], key.startswith("-")));
+		
+		with cls._lock.reading():
+			records = list(cls.store);
+			orderings = cls._orderings;
+		
+		if(not any(descending and getKey is ORDER_KEYS["description"] for getKey, descending in fields)):
+			# Every key is a number, so each record gets one composite key (descending numbers are negated) and there's a single sort
+			records.sort(key=lambda record: tuple(-getKey(record) if(descending) else getKey(record) for getKey, descending in fields));
+		else:
+			# Text can't be negated, so sort once per key from the last to the first - each sort is stable so the earlier keys win
+			for getKey, descending in reversed(fields):
+				records.sort(key=getKey, reverse=descending);
+		
+		# If the records changed while we were sorting, the cache has already been replaced and this ordering is just thrown away
+		orderings[keys] = records;
+		return records;
+	
+	
+	
+	
+	# Order the records by several keys, without changing their stored order
+	def orderedBy(cls, *keys: str) -> list[Record]:
+		"""
+		Returns the records ordered by one or more keys, the stored order of the diary doesn't change
+		
+		Each order is cached until a record is added or the records are replaced (or sorted),
+		so showing the diary in a few different orders again and again only sorts once per order.
+		
+		Args:
+			*keys (str): The keys to order by, the first key matters most. One of priority, date, start, end, time,
+				duration or description, with a "-" in front for descending (such as "-duration")
+		
+		Returns:
+			list[Record]: The records in the new order
+		
+		Raises:
+			ValueError: If a key isn't one of the keys above
+		"""
+		return list(cls._ordering(keys));
+	
+	
+	
+	
+	# Sort by Prioity Or Time, without asking the user anything
+	@instrumented("sort", lambda diary, args, result: len(diary.store), traceMemory=true)
+	def sortBy(cls, sortMethod: str) -> bool:
+		"""
+		Sort records by either priority or time without any prompts
+		
+		Every record is sorted on a single packed (date, start) key, the sort is stable
+		so records with the same date and start time keep their order and none are lost.
+		
+		Args:
+			sortMethod (str): Either "time" or "priority" - case insensitive
+		
+		Returns:
+			bool: False if the sort method was invalid, True if the diary was sorted
+		"""
+		sortMethod = sortMethod.lower();
+		if(sortMethod != "time" and sortMethod != "priority"):
+			return false;
+		
+		# The store builds the sorted records as a new list and swaps it in, so readers never see a half sorted diary
+		with cls._lock.writing():
+			for listener in cls.onBeforeReplace:
+				listener();
+			
+			if(not cls.store.sort(sortMethod)):
+				return false;
+			
+			cls._orderings = {};
+			
+			for listener in cls.onReplace:
+				listener();
+		
+		return true;
+	
+	
+	
+	
+	# Sort by Prioity Or Time
+	def sortRecords(cls) -> bool:
+		"""
+		Sort records by either priority or time
+		
+		Returns:
+			bool: False if the diary was not sorted, True if it was
+		"""
+		# Ask how to sort the records until the user enters a valid input or "end" - case insensitive
+		# Valid inputs are "time" and "priority"
+		
+		sortMethod = false;
+		
+		while(true):
+			print("\nHow would you like to sort the records?");
+			print("Type 'PRIORITY' to sort by priority,");
+			print("Type 'TIME' to sort by time,");
+			print("Type 'END' to return to the main menu");
+			choice = input("Enter your choice: ");
+			choice = choice.lower();
+			
+			if(choice == "priority"):
+				sortMethod = "priority";
+				break;
+			
+			if(choice == "time"):
+				sortMethod = "time";
+				break;
+			
+			if(choice == "end"):
+				print("\nExiting function...");
+				return;
+			
+			else:
+				print("Invalid input, please try again");
+			
+		
+		
+		# Regardless of the choice, the records are also sorted by time
+		# Each record is sorted on its (date, start) key packed into a single integer (yyyymmddhh),
+		# so this is a single O(n log n) sort instead of sorting each level of a year -> month -> day dictionary
+		count = len(cls.store);
+		print(f"Sorting {count} records...", end="");
+		
+		start = time.perf_counter();
+		sortedRecords = cls.sortBy(sortMethod);
+		seconds = time.perf_counter() - start;
+		
+		# Report how long it really took, instead of a progress bar
+		print(f" Done! ({seconds:.3f}s, {count / seconds if(seconds > 0) else count:.0f} records/s)");
+		
+		return sortedRecords;
+
+
+
+# Main function, will only be run if the file is not imported
+def main(journalDirectory: str | None = None) -> bool:
+	saveRecords = false; # False by default, change to true if you want to save the records to a file
+	if(journalDirectory is not None):
+		saveRecords = true; # --journal was given, so that's where they're saved
+	
+	# Records are saved to a journal as soon as they're added, and the diary is rebuilt from it when we start
+	if(saveRecords):
+		from journal import Journal  # Imported here, as journal.py imports this file
+		journal = Journal("records" if(journalDirectory is None) else journalDirectory);
+		diary = journal.load();
+	else:
+		diary = Diary();
+	
+	while(true):
+		print("\nWhat would you like to do?");
+		print("Type 'ADD' to add appointments,");
+		print("Type 'SHOW' to show all appointments,");
+		print("Type 'SORT' to sort all appointments,");
+		print("Type 'END' to exit the program.");
+		choice = input("Enter your choice: ");
+		choice = choice.lower();
+		
+		if(choice == "add"):
+			diary.addRecord();
+			continue;
+		
+		if(choice == "show"):
+			diary.showRecords();
+			continue;
+		
+		if(choice == "sort"):
+			diary.sortRecords();
+			continue;
+		
+		if(choice == "end"):
+			print("\nExiting program...");
+			break;
+		
+		print("\nInvalid choice");
+	
+	if(saveRecords): # We added the ability to save the records to a file, saveRecords is false by default however
+		journal.close(); # Everything is already saved, this just compacts the journal into the snapshot
+		return true;
+	
+	return false;
+
+
+
+
+# Run commands from a file or stdin, without asking the user anything
+def runBatch(diary: Diary, lines: Iterable[str], output: TextIO = sys.stdout, errors: TextIO = sys.stderr) -> BatchSummary:
+	"""
+	Runs one command per line, with everything the command needs on the same line
+	
+		ADD priority;d/m/y;start;end;description	Add an appointment, in the same format records are saved in
+		DELETE d/m/y start							Cancel the appointment that starts at that hour
+		SORT time|priority							Sort the records
+		SHOW										Write the table of records to output
+		END											Stop, any lines after this are ignored
+	
+	Commands are case insensitive, blank lines and lines starting with # are skipped.
+	Nothing is printed for a command that works, a command that fails gets a single line on errors.
+	Runs of ADD lines are added together with addRecords(), so large files don't pay for each line on its own.
+	
+	Args:
+		diary (Diary): The diary to run the commands on
+		lines (Iterable[str]): The commands, such as an open file or sys.stdin
+		output (TextIO, optional): Where SHOW writes the table. Defaults to sys.stdout.
+		errors (TextIO, optional): Where failed commands are reported. Defaults to sys.stderr.
+	
+	Returns:
+		BatchSummary: How many commands were run, how many worked and failed, and how long it took
+	"""
+	summary: BatchSummary = { "commands": 0, "succeeded": 0, "failed": 0, "seconds": 0.0 };
+	start = time.perf_counter();
+	
+	# ADD lines waiting to be added, as (line number, record)
+	adds: list[tuple[int, str]] = [];
+	
+	def fail(lineNumber: int, reason: str) -> None:
+		summary["failed"] += 1;
+		errors.write(f"Line {lineNumber}: {reason}\n");
+	
+	def flush() -> None:
+		for result in diary.addRecords(record for lineNumber, record in adds):
+			if(result["accepted"]):
+				summary["succeeded"] += 1;
+			else:
+				fail(adds[result["index"]][0], result["reason"]);
+		
+		adds.clear();
+	
+	for lineNumber, line in enumerate(lines, 1):
+		line = line.strip();
+		if(len(line) == 0 or line.startswith("#")):
+			continue;
+		
+		command, _, fields = line.partition(" ");
+		command = command.lower();
+		fields = fields.strip();
+		summary["commands"] += 1;
+		
+		if(command == "add"):
+			adds.append((lineNumber, fields));
+			if(len(adds) >= 10000):
+				flush();
+			
+			continue;
+		
+		# Every other command has to see the records added before it
+		flush();
+		
+		if(command == "end"):
+			summary["succeeded"] += 1;
+			break;
+		
+		if(command == "show"):
+			diary.writeRecords(output);
+			summary["succeeded"] += 1;
+			continue;
+		
+		if(command == "sort"):
+			if(diary.sortBy(fields)):
+				summary["succeeded"] += 1;
+			else:
+				fail(lineNumber, "Error: Sort by TIME or PRIORITY!");
+			
+			continue;
+		
+		if(command == "delete"):
+			try:
+				when, hour = fields.split();
+				day, month, year = (int(part) for part in when.split("/"));
+				deleted = diary.deleteRecord(day, month, year, int(hour));
+			except ValueError:
+				fail(lineNumber, "Error: Invalid record format!");
+				continue;
+			
+			if(deleted):
+				summary["succeeded"] += 1;
+			else:
+				fail(lineNumber, "Error: There is no appointment at that time!");
+			
+			continue;
+		
+		fail(lineNumber, f"Error: Unknown command {command.upper()!r}!");
+	
+	flush();
+	
+	summary["seconds"] = time.perf_counter() - start;
+	return summary;
+
+
+
+
+# Command line entry point
+def run(argv: list[str] | None = None) -> int:
+	"""
+	Runs the interactive menu, or a batch of commands if --batch is given
+	
+	Either one loads and saves the diary through the journal given with --journal.
+	
+	Args:
+		argv (list[str] | None, optional): The command line arguments. Defaults to sys.argv[1:].
+	
+	Returns:
+		int: The exit code, 0 if everything worked, 1 if any command failed, 2 if the batch file couldn't be read
+	"""
+	parser = argparse.ArgumentParser(description="Keep a diary of appointments");
+	parser.add_argument("--batch", metavar="FILE", help="Run the commands in FILE (- for stdin) instead of asking for them, see runBatch()");
+	parser.add_argument("--journal", metavar="DIRECTORY", help="Load the diary from a journal in DIRECTORY and save every change back to it");
+	args = parser.parse_args(argv);
+	
+	if(args.batch is None):
+		main(args.journal);
+		return 0;
+	
+	# The batch file is opened first, so there's no journal left open if it can't be read
+	try:
+		lines = sys.stdin if(args.batch == "-") else open(args.batch, "r", encoding="utf-8");
+	except OSError as error:
+		sys.stderr.write(f"Error: Can't read {args.batch}: {error.strerror}\n");
+		return 2;
+	
+	journal = None;
+	try:
+		if(args.journal is not None):
+			from journal import Journal  # Imported here, as journal.py imports this file
+			# The journal is compacted when the batch is done, compacting it every few thousand records as well would only slow a large batch down
+			journal = Journal(args.journal, compactEvery=10 ** 9);
+			# Loading prints how many records there are, which isn't wanted in the output
+			with contextlib.redirect_stdout(io.StringIO()):
+				diary = journal.load();
+		else:
+			diary = Diary();
+		
+		summary = runBatch(diary, lines);
+	finally:
+		if(lines is not sys.stdin):
+			lines.close();
+		
+		if(journal is not None):
+			journal.close();
+	
+	sys.stderr.write(f"{summary['commands']} commands in {summary['seconds']:.3f}s: {summary['succeeded']} succeeded, {summary['failed']} failed\n");
+	return 1 if(summary["failed"] > 0) else 0;
+
+
+
+if(__name__ == "__main__"):
+	# journal.py (and the other modules) import this file as "main", so we run that copy of it instead of this one,
+	# otherwise there would be two different Diary and Record classes
+	import main as diaryMain
+	sys.exit(diaryMain.run());
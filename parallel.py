@@ -0,0 +1,300 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Iterable			# Type hinting
+from concurrent.futures import ProcessPoolExecutor	# Spreads the work over every core
+import os							# Used to find out how many cores there are
+
+from main import Diary, Record, AddResult, Appointment, hourMask
+from validation import validateColumns, VALID
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+# A record as a plain tuple, these are much cheaper to send between processes than Record objects
+# (priority, day, month, year, start, end, description)
+Row = tuple;
+
+# Sorting sends each record as a single int, its sort key and whether it's low priority, with its position in the lower 32 bits
+POSITION_MASK = (1 << 32) - 1;
+
+
+
+# Worker: parse and validate a chunk of rows
+def _parseChunk(chunk: tuple[int, list, dict]) -> list[tuple[int, Row | None, str | None]]:
+	"""
+	Parses a chunk of rows and runs every check except the overlap check
+	
+	Args:
+		chunk (tuple[int, list, dict]): The index of the first row, the rows, and the current time
+	
+	Returns:
+		list[tuple[int, Row | None, str | None]]: For each row its index, the parsed row (None if it couldn't be used)
+			and the first error found (None if there wasn't one)
+	"""
+	first, rows, currTime = chunk;
+	checker = Diary();
+	
+	parsed: list[Row | None] = [];
+	results = [];
+	for row in rows:
+		try:
+			record = Record.fromString(row) if(isinstance(row, str)) else Record.fromAppointment(row);
+			
+			# The same check as Diary._checkAppointment(), appointment dictionaries aren't parsed so their fields may not be ints
+			for field in (record.day, record.month, record.year, record.start, record.end):
+				if(type(field) is not int):
+					raise TypeError(f"Expected an int, got {type(field).__name__}");
+			
+			parsed.append((record.priority, record.day, record.month, record.year, record.start, record.end, record.description));
+		except (ValueError, IndexError, KeyError, TypeError):
+			parsed.append(None);
+	
+	# Validate the whole chunk at once, rows that couldn't be parsed are given values that pass so they don't get in the way
+	columns = [[row[field] if(row is not None) else (1, 1, 9999, 7, 8)[field - 1] for row in parsed] for field in range(1, 6)];
+	codes = validateColumns(*columns, currTime);
+	
+	for index, row in enumerate(parsed):
+		if(row is None):
+			results.append((first + index, None, "Error: Invalid record format!"));
+			continue;
+		
+		priority, day, month, year, start, end, description = row;
+		
+		# The reason codes only say which check failed, the checker gives the exact message addRecords() would
+		if(codes[index] != VALID):
+			error = checker._checkDate(day, month, year) or checker._checkTime(start, end) or checker._checkFutureTime({ "day": day, "month": month, "year": year, "hour": start }, currTime);
+			results.append((first + index, None, error));
+			continue;
+		
+		# These come after the overlap check in addRecords(), so the row is kept to be overlap checked first
+		error = None;
+		if(len(description) == 0):
+			error = "Error: Description cannot be empty!";
+		elif(len(description) > 30):
+			error = "Error: Description is too long!";
+		elif(priority.lower() != "high" and priority.lower() != "low"):
+			error = "Error: Invalid priority!";
+		
+		results.append((first + index, row, error));
+	
+	return results;
+
+
+
+
+# Worker: overlap check and sort a single year/ month shard
+def _bookShard(shard: tuple[list[tuple[int, Row, str | None]], dict[int, int], bool]) -> tuple[list[tuple[int, Row]], list[tuple[int, str | None]]]:
+	"""
+	Books the rows of a shard in the order they were given, then sorts the ones that were accepted
+	
+	Every row on the same day is in the same shard, so overlaps can be checked without looking at any other shard
+	
+	Args:
+		shard (tuple): The rows of the shard (index, row, error) in their original order,
+			the bitmask of hours already booked on each day, and whether to sort the accepted rows by time
+	
+	Returns:
+		tuple[list[tuple[int, Row]], list[tuple[int, str | None]]]: The index and row of each accepted row,
+			and the index and error (None if accepted) of every row
+	"""
+	rows, occupancy, sortByTime = shard;
+	
+	accepted: list[tuple[int, Row]] = [];
+	outcomes: list[tuple[int, str | None]] = [];
+	for index, row, error in rows:
+		date = row[3] * 10000 + row[2] * 100 + row[1];
+		mask = hourMask(row[4], row[5]);
+		booked = occupancy.get(date, 0);
+		
+		# Same order as Diary._checkAppointment(), the overlap is reported before a bad description or priority
+		if(booked & mask):
+			outcomes.append((index, "Error: Appointment overlaps with another appointment!"));
+		elif(error is not None):
+			outcomes.append((index, error));
+		else:
+			occupancy[date] = booked | mask;
+			accepted.append((index, row));
+			outcomes.append((index, None));
+	
+	if(sortByTime):
+		accepted.sort(key=lambda item: _sortKey(item[1]));
+	
+	return accepted, outcomes;
+
+
+
+
+# Worker: sort a single shard by time
+def _sortShard(packed: list[int]) -> list[int]:
+	"""
+	Sorts a shard of records, each one given as its sort key with its position packed in below it
+	
+	Args:
+		packed (list[int]): (key << 33) | (low << 32) | position for every record in the shard
+	
+	Returns:
+		list[int]: The positions in time order, records with the same key are in the order of (low, position)
+	"""
+	packed.sort();
+	return [value & POSITION_MASK for value in packed];
+
+
+
+
+# The packed sort key (yyyymmddhh) of a row
+def _sortKey(row: Row) -> int:
+	return ((row[3] * 10000 + row[2] * 100 + row[1]) * 100) + row[4];
+
+
+
+
+# Put time sorted rows into priority order
+def _priorityOrder(items: list, priorityOf) -> list:
+	"""
+	Moves the high priority items in front of the low ones, keeping them in time order.
+	This is the same order Diary.sortBy("priority") gives.
+	
+	Args:
+		items (list): The items, in time order
+		priorityOf (Callable): Gets the priority of an item
+	"""
+	high = [item for item in items if(priorityOf(item).lower() == "high")];
+	high.extend(item for item in items if(priorityOf(item).lower() != "high"));
+	return high;
+
+
+
+
+# Add many records using every core
+def importParallel(diary: Diary, appointments: Iterable[Appointment | str], sortMethod: str | None = None, workers: int | None = None) -> list[AddResult]:
+	"""
+	Adds a batch of records the same way Diary.addRecords() does, with the work spread over a process pool
+	
+	The rows are parsed and validated in chunks, then split into year/ month shards which are overlap checked
+	(in their original order, against what's already in the diary) and sorted. Every day is in exactly one shard,
+	so no overlap can cross shards, and putting the shards back together in order gives the accepted rows sorted.
+	
+	Args:
+		diary (Diary): The diary to add to
+		appointments (Iterable[Appointment | str]): Appointment dictionaries or records in the string format
+		sortMethod (str | None, optional): "time" or "priority" to add the accepted records in that order, None to keep the order they were given in. Defaults to None.
+		workers (int | None, optional): How many processes to use. Defaults to the number of cores.
+	
+	Returns:
+		list[AddResult]: Whether each row was accepted, and the reason if it was not
+	"""
+	rows = list(appointments);
+	workers = workers or os.cpu_count() or 1;
+	currTime = diary._getCurrentTime();
+	
+	# A few chunks per worker, so a slow chunk doesn't leave the other workers waiting
+	chunkSize = max(1000, -(-len(rows) // (workers * 4)));
+	chunks = [(first, rows[first:first + chunkSize], currTime) for first in range(0, len(rows), chunkSize)];
+	
+	reasons: list[str | None] = [None] * len(rows);
+	shards: dict[tuple[int, int], list] = {};
+	accepted: list[tuple[int, Row]] = [];
+	
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		# The chunks come back in order, so each shard's rows stay in the order they were given
+		for results in executor.map(_parseChunk, chunks):
+			for index, row, error in results:
+				if(row is None):
+					reasons[index] = error;
+				else:
+					shards.setdefault((row[3], row[2]), []).append((index, row, error));
+		
+		# Each shard needs the hours already booked in the diary on the days it covers
+		work = [];
+		with diary._lock.reading():
+			for shardKey in sorted(shards):
+				occupancy = {};
+				for index, row, error in shards[shardKey]:
+					date = row[3] * 10000 + row[2] * 100 + row[1];
+					if(date not in occupancy):
+						occupancy[date] = diary.store.dayMask(date);
+				
+				work.append((shards[shardKey], occupancy, sortMethod is not None));
+		
+		for shardAccepted, outcomes in executor.map(_bookShard, work):
+			accepted.extend(shardAccepted);
+			for index, error in outcomes:
+				reasons[index] = error;
+	
+	# The shards were sorted by time and put together in order, so the rows are already in time order
+	if(sortMethod is None):
+		accepted.sort(key=lambda item: item[0]);  # Back into the order they were given
+	
+	elif(sortMethod == "priority"):
+		accepted = _priorityOrder(accepted, lambda item: item[1][0]);
+	
+	# Another thread may have booked some of the times while we were working, so each one is checked again as it's added
+	with diary._lock.writing():
+		for index, row in accepted:
+			record = Record(*row);
+			
+			if(diary.store.dayMask(record.date) & hourMask(record.start, record.end)):
+				reasons[index] = "Error: Appointment overlaps with another appointment!";
+				continue;
+			
+			diary._appendRecord(record);
+	
+	return [{ "index": index, "accepted": reason is None, "reason": reason } for index, reason in enumerate(reasons)];
+
+
+
+
+# Sort a diary using every core
+def sortParallel(diary: Diary, sortMethod: str, workers: int | None = None) -> bool:
+	"""
+	Sorts a diary the same way Diary.sortBy() does, with each year/ month shard sorted in its own process
+	
+	The shards cover separate ranges of time, so putting them together in order gives the whole diary in time order.
+	Only the sort keys go to the workers, they send back the order and the records are put in that order where they are.
+	Splitting up the records and sending them still costs about as much as sorting them, so this only pays off with several cores.
+	
+	Args:
+		diary (Diary): The diary to sort
+		sortMethod (str): Either "time" or "priority" - case insensitive
+		workers (int | None, optional): How many processes to use. Defaults to the number of cores.
+	
+	Returns:
+		bool: False if the sort method was invalid, True if the diary was sorted
+	"""
+	sortMethod = sortMethod.lower();
+	if(sortMethod != "time" and sortMethod != "priority"):
+		return false;
+	
+	with diary._lock.writing():
+		# Shards are keyed by yyyymm, the top of the sort key. The position breaks ties, so records with the same key keep their order
+		# For a priority sort, high priority records go first when they share a key, the same as in the index of a sortBy("priority")
+		records = diary.store.toList();
+		byPriority = sortMethod == "priority";
+		shards: dict[int, list[int]] = {};
+		for position, record in enumerate(records):
+			key = record.key;
+			low = byPriority and record.priority.lower() != "high";
+			shards.setdefault(key // 10000, []).append(key << 33 | low << 32 | position);
+		
+		timeOrder: list[Record] = [];
+		with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+			for positions in executor.map(_sortShard, [shards[shardKey] for shardKey in sorted(shards)]):
+				timeOrder.extend(map(records.__getitem__, positions));
+		
+		sortedRecords = timeOrder;
+		if(byPriority):
+			sortedRecords = _priorityOrder(timeOrder, lambda record: record.priority);
+		
+		for listener in diary.onBeforeReplace:
+			listener();
+		
+		# The store is given the time order too, so it doesn't have to sort its index again
+		diary.store.replace(sortedRecords, timeOrder);
+		diary._orderings = {};
+		
+		for listener in diary.onReplace:
+			listener();
+	
+	return true;
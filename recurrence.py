@@ -0,0 +1,576 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Iterator, Callable	# Type hinting
+from datetime import date			# Occurrences are worked out on day numbers (ordinals) rather than dates
+from calendar import monthrange		# How many days are in a month, for monthly rules
+from heapq import merge				# Merges the occurrences of each rule into time order
+from itertools import islice		# Used to show part of the records without building them all
+
+from main import Diary, Record, Appointment, MemoryStore, hourMask
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# How many days apart the occurrences of each rule are, monthly rules are worked out on the calendar instead
+PERIODS = { "daily": 1, "weekly": 7 };
+
+
+
+# Turn a packed date into a day number
+def _ordinal(packedDate: int) -> int:
+	"""
+	Returns the day number (date.toordinal()) of a packed date (yyyymmdd)
+	
+	Range ends aren't always real dates (such as the day after the 31st), so the month and day are clamped into range
+	
+	Args:
+		packedDate (int): The packed date
+	
+	Returns:
+		int: The day number
+	"""
+	year = min(max(packedDate // 10000, 1), 9999);
+	month = min(max(packedDate // 100 % 100, 1), 12);
+	day = min(max(packedDate % 100, 1), monthrange(year, month)[1]);
+	
+	# Days past the end of the month (like the 32nd) carry on into the next month
+	return date(year, month, day).toordinal() + max(0, packedDate % 100 - day);
+
+
+
+# A single appointment that repeats
+class Rule:
+	"""
+	A recurring appointment, stored once no matter how many times it happens
+	
+	Daily and weekly rules happen every 1 or 7 days from their first day, monthly rules happen on
+	the same day of every month (months without that day are skipped). A rule ends after a number of
+	occurrences or on a date. Dates are kept as day numbers (date.toordinal()) so they can be worked out with arithmetic.
+	"""
+	# Slots stop every rule from carrying around its own __dict__
+	__slots__ = ("priority", "description", "start", "end", "frequency", "first", "last", "count");
+	
+	def __init__(this, priority: str, description: str, start: int, end: int, frequency: str, first: date, count: int | None = None, until: date | None = None) -> None:
+		"""
+		Create a new rule
+		
+		Args:
+			priority (str): The priority of the appointment (High/Low)
+			description (str): The description of the appointment
+			start (int): The start time
+			end (int): The end time
+			frequency (str): "daily", "weekly" or "monthly"
+			first (date): The date of the first occurrence
+			count (int | None, optional): How many times it happens. Defaults to None.
+			until (date | None, optional): The last date it can happen on. Defaults to None.
+		"""
+		this.priority = priority;
+		this.description = description;
+		this.start = start;
+		this.end = end;
+		this.frequency = frequency;
+		this.first = first.toordinal();
+		
+		# Work out both ends of the rule up front, so the rest of the time it can be checked with arithmetic
+		if(frequency in PERIODS):
+			period = PERIODS[frequency];
+			if(count is not None):
+				this.count = count;
+				this.last = this.first + (count - 1) * period;
+			else:
+				this.count = (until.toordinal() - this.first) // period + 1;
+				this.last = this.first + (this.count - 1) * period;
+		else:
+			# Monthly rules depend on the calendar, so we step through the months once here
+			occurrences = list(islice(this._months(date.max.toordinal() if(until is None) else until.toordinal()), count));
+			this.count = len(occurrences);
+			this.last = occurrences[-1];
+	
+	
+	
+	
+	# The day numbers of a monthly rule
+	def _months(this, last: int | None = None) -> Iterator[int]:
+		"""
+		Yields the day number of every month that has the rule's day in it, from the first occurrence on
+		
+		Args:
+			last (int | None, optional): The day number to stop after. Defaults to the end of the rule.
+		"""
+		first = date.fromordinal(this.first);
+		year, month = first.year, first.month;
+		last = this.last if(last is None) else last;
+		
+		while(true):
+			if(first.day <= monthrange(year, month)[1]):
+				ordinal = date(year, month, first.day).toordinal();
+				if(ordinal > last):
+					return;
+				
+				yield ordinal;
+			
+			month += 1;
+			if(month > 12):
+				year, month = year + 1, 1;
+			
+			if(year > 9999):
+				return;
+	
+	
+	
+	
+	# Check if the rule happens on a day
+	def occursOn(this, ordinal: int) -> bool:
+		"""
+		Checks if the rule has an occurrence on a day, without working out any other occurrences
+		
+		Args:
+			ordinal (int): The day number (date.toordinal())
+		
+		Returns:
+			bool: True if the rule happens that day
+		"""
+		if(ordinal < this.first or ordinal > this.last):
+			return false;
+		
+		if(this.frequency in PERIODS):
+			return (ordinal - this.first) % PERIODS[this.frequency] == 0;
+		
+		return date.fromordinal(ordinal).day == date.fromordinal(this.first).day;
+	
+	
+	
+	
+	# The occurrences in a range of days
+	def occurrences(this, low: int | None = None, high: int | None = None) -> Iterator[Record]:
+		"""
+		Yields the occurrences between two days, one at a time
+		
+		Args:
+			low (int | None, optional): The first day number to include. Defaults to the first occurrence.
+			high (int | None, optional): The last day number to include. Defaults to the last occurrence.
+		
+		Yields:
+			Record: Each occurrence, in time order
+		"""
+		low = this.first if(low is None) else max(low, this.first);
+		high = this.last if(high is None) else min(high, this.last);
+		
+		if(this.frequency in PERIODS):
+			period = PERIODS[this.frequency];
+			# Jump straight to the first occurrence on or after low
+			ordinals = range(low + (this.first - low) % period, high + 1, period);
+		else:
+			ordinals = (ordinal for ordinal in this._months(high) if(ordinal >= low));
+		
+		for ordinal in ordinals:
+			day = date.fromordinal(ordinal);
+			yield Record(this.priority, day.day, day.month, day.year, this.start, this.end, this.description);
+	
+	
+	
+	
+	# The rule as a json friendly dictionary, for saving
+	def toEntry(this) -> dict:
+		"""
+		Returns the rule as a dictionary that fromEntry() turns back into the same rule
+		
+		The count is always saved, a rule that ended on a date ends after the same number of occurrences
+		
+		Returns:
+			dict: The priority, description, start, end, frequency, first date (d/m/y) and count
+		"""
+		first = date.fromordinal(this.first);
+		return {
+			"priority": this.priority,
+			"description": this.description,
+			"start": this.start,
+			"end": this.end,
+			"frequency": this.frequency,
+			"first": f"{first.day}/{first.month}/{first.year}",
+			"count": this.count
+		};
+	
+	
+	
+	
+	# Load a rule saved by toEntry()
+	@classmethod
+	def fromEntry(cls, entry: dict) -> Rule:
+		"""
+		Creates a rule from a dictionary made by toEntry()
+		
+		Args:
+			entry (dict): The saved rule
+		
+		Returns:
+			Rule: The rule
+		"""
+		day, month, year = (int(part) for part in entry["first"].split("/"));
+		return cls(entry["priority"], entry["description"], entry["start"], entry["end"], entry["frequency"], date(year, month, day), entry["count"]);
+	
+	
+	
+	
+	def __repr__(this) -> str:
+		first = date.fromordinal(this.first);
+		return f"Rule({this.priority};{first.day}/{first.month}/{first.year};{this.start};{this.end};{this.description}, {this.frequency} x{this.count})";
+	
+	
+	
+	
+	# Check two rules against each other
+	def overlaps(this, other: Rule) -> bool:
+		"""
+		Checks if two rules ever book the same hour on the same day
+		
+		Daily and weekly rules line up every 7 days at most, so only a week of days needs to be tried.
+		A monthly rule is checked one month at a time against the other rule.
+		
+		Args:
+			other (Rule): The rule to check against
+		
+		Returns:
+			bool: True if they overlap
+		"""
+		if(hourMask(this.start, this.end) & hourMask(other.start, other.end) == 0):
+			return false;
+		
+		low = max(this.first, other.first);
+		high = min(this.last, other.last);
+		if(low > high):
+			return false;
+		
+		if(this.frequency in PERIODS and other.frequency in PERIODS):
+			return any(this.occursOn(ordinal) and other.occursOn(ordinal) for ordinal in range(low, min(high, low + 6) + 1));
+		
+		monthly, rule = (this, other) if(this.frequency == "monthly") else (other, this);
+		return any(rule.occursOn(ordinal) for ordinal in monthly._months(high) if(ordinal >= low));
+
+
+
+# A store with recurring appointments on top of the records
+class RecurringStore:
+	"""
+	Wraps another store and adds recurring appointments to it, can be given to Diary(store=...)
+	
+	Each rule is stored once, its occurrences are only made when a query, a page of the table or an
+	overlap check needs them. Rules are kept by weekday and day of the month, so an overlap check only
+	looks at the rules that could happen on that day and checks them with arithmetic.
+	
+	The stored records are listed first, in their stored order, then every occurrence in time order.
+	Sorting only sorts the stored records, and occurrences can't be updated or deleted on their own.
+	toList() only gives the stored records, anything that keeps its own copy of the diary (the journal, the search index,
+	analytics) reads the records from there and the rules from onRule, so no occurrences are ever made for it.
+	
+	Methods:
+		addRule(rule) -> None:
+			Add a recurring appointment
+		
+		removeRule(rule) -> None:
+			Remove a recurring appointment
+		
+		rulesOn(date) -> list[Rule]:
+			Get the rules that happen on a day
+	
+	The rest of the methods are the same as MemoryStore
+	"""
+	def __init__(this, store: MemoryStore | None = None) -> None:
+		"""
+		Wrap a store
+		
+		Args:
+			store (MemoryStore | None, optional): The store for the records, such as a sqlitestore.SqliteStore. Defaults to a new MemoryStore.
+		"""
+		this.store = store if(store is not None) else MemoryStore();
+		this.rules: list[Rule] = [];
+		
+		# Functions to call when a rule is added (with True) or removed (with False), the same as the diary's onAdd
+		this.onRule: list[Callable[[Rule, bool], None]] = [];
+		
+		# Rules that could happen on a day: daily ones always, weekly ones by weekday, monthly ones by day of the month
+		this._daily: list[Rule] = [];
+		this._weekly: dict[int, list[Rule]] = {};
+		this._monthly: dict[int, list[Rule]] = {};
+	
+	
+	
+	
+	def __len__(this) -> int:
+		return len(this.store) + sum(rule.count for rule in this.rules);
+	
+	
+	def __iter__(this) -> Iterator[Record]:
+		return this.slice(0, None);
+	
+	
+	
+	
+	# The longest description, for the width of the table
+	@property
+	def descLength(this) -> int:
+		return max([this.store.descLength] + [len(rule.description) for rule in this.rules]);
+	
+	
+	
+	
+	# Add a rule
+	def addRule(this, rule: Rule) -> None:
+		"""
+		Adds a recurring appointment, nothing is checked here - see addRecurring()
+		
+		The diary should be locked for writing, as the onRule listeners expect
+		
+		Args:
+			rule (Rule): The rule to add
+		"""
+		this.rules.append(rule);
+		
+		if(rule.frequency == "daily"):
+			this._daily.append(rule);
+		elif(rule.frequency == "weekly"):
+			this._weekly.setdefault(rule.first % 7, []).append(rule);
+		else:
+			this._monthly.setdefault(date.fromordinal(rule.first).day, []).append(rule);
+		
+		for listener in this.onRule:
+			listener(rule, true);
+	
+	
+	
+	
+	# Remove a rule
+	def removeRule(this, rule: Rule) -> None:
+		"""
+		Removes a recurring appointment, and every occurrence of it
+		
+		The diary should be locked for writing, as the onRule listeners expect
+		
+		Args:
+			rule (Rule): The rule to remove
+		"""
+		this.rules.remove(rule);
+		
+		if(rule.frequency == "daily"):
+			this._daily.remove(rule);
+		elif(rule.frequency == "weekly"):
+			this._weekly[rule.first % 7].remove(rule);
+		else:
+			this._monthly[date.fromordinal(rule.first).day].remove(rule);
+		
+		for listener in this.onRule:
+			listener(rule, false);
+	
+	
+	
+	
+	# The rules that happen on a day
+	def rulesOn(this, packedDate: int) -> list[Rule]:
+		"""
+		Returns the rules with an occurrence on a day
+		
+		Args:
+			packedDate (int): The packed date (yyyymmdd)
+		
+		Returns:
+			list[Rule]: The rules that happen that day
+		"""
+		if(len(this.rules) == 0):
+			return [];
+		
+		day = date(packedDate // 10000, packedDate // 100 % 100, packedDate % 100);
+		ordinal = day.toordinal();
+		
+		candidates = this._daily + this._weekly.get(ordinal % 7, []) + this._monthly.get(day.day, []);
+		return [rule for rule in candidates if(rule.occursOn(ordinal))];
+	
+	
+	
+	
+	# Get the hours booked on a day
+	def dayMask(this, packedDate: int) -> int:
+		"""
+		Returns the bitmask of hours booked on a day, by records or by rules
+		
+		Args:
+			packedDate (int): The packed date (yyyymmdd)
+		
+		Returns:
+			int: The bitmask of booked hours, 0 if nothing is booked
+		"""
+		mask = this.store.dayMask(packedDate);
+		for rule in this.rulesOn(packedDate):
+			mask |= hourMask(rule.start, rule.end);
+		
+		return mask;
+	
+	
+	
+	
+	# Get the records and occurrences in a range of sort keys
+	def between(this, low: int, high: int) -> Iterator[Record]:
+		"""
+		Returns the records and occurrences with a sort key (yyyymmddhh) from low up to (but not including) high, in time order
+		
+		Only the occurrences in the range are made
+		
+		Args:
+			low (int): The lowest sort key to include
+			high (int): The sort key to stop at
+		
+		Returns:
+			Iterator[Record]: The records in the range
+		"""
+		records = this.store.between(low, high);
+		if(len(this.rules) == 0):
+			return records;
+		
+		# Only the rules' days in the range are tried, the keys are checked again in case the range starts or ends part way through a day
+		lowDay = _ordinal(low // 100);
+		highDay = _ordinal((high - 1) // 100);
+		
+		occurrences = merge(*(rule.occurrences(lowDay, highDay) for rule in this.rules), key=lambda record: record.key);
+		occurrences = (record for record in occurrences if(low <= record.key < high));
+		
+		return merge(records, occurrences, key=lambda record: record.key);
+	
+	
+	
+	
+	# Get part of the records, in their listed order
+	def slice(this, offset: int, stop: int | None) -> Iterator[Record]:
+		"""
+		Returns the records from offset up to (but not including) stop, the occurrences come after the stored records
+		
+		Args:
+			offset (int): The position of the first record
+			stop (int | None): The position to stop at, or None for the end
+		
+		Returns:
+			Iterator[Record]: The records in the slice
+		"""
+		stored = len(this.store);
+		occurrences = merge(*(rule.occurrences() for rule in this.rules), key=lambda record: record.key);
+		
+		if(offset >= stored):
+			# Both ends are positions in the whole listing, the occurrences start counting from after the stored records
+			return islice(occurrences, offset - stored, None if(stop is None) else max(offset, stop) - stored);
+		
+		def records() -> Iterator[Record]:
+			yield from this.store.slice(offset, stop);
+			
+			if(stop is None or stop > stored):
+				yield from islice(occurrences, None if(stop is None) else stop - stored);
+		
+		return records();
+	
+	
+	
+	
+	# The rest just goes to the wrapped store
+	def append(this, record: Record) -> None:
+		this.store.append(record);
+	
+	
+	def replace(this, records: list[Record], timeOrder: list[Record] | None = None) -> None:
+		this.store.replace(records, timeOrder);
+	
+	
+	def sort(this, sortMethod: str) -> bool:
+		return this.store.sort(sortMethod);
+	
+	
+	def remove(this, record: Record) -> bool:
+		return this.store.remove(record);
+	
+	
+	def update(this, old: Record, new: Record) -> bool:
+		return this.store.update(old, new);
+	
+	
+	def compact(this) -> None:
+		this.store.compact();
+	
+	
+	# Only the stored records, so what comes out of toList() can be given back to replace()
+	def toList(this) -> list[Record]:
+		return this.store.toList();
+	
+	
+	def close(this) -> None:
+		if(hasattr(this.store, "close")):
+			this.store.close();
+
+
+
+
+# Add a recurring appointment to a diary
+def addRecurring(diary: Diary, apmnt: Appointment, frequency: str, count: int | None = None, until: tuple[int, int, int] | None = None) -> Rule | str:
+	"""
+	Adds a recurring appointment to a diary that uses a RecurringStore
+	
+	The first occurrence goes through the same checks as addRecords(). The rest of the series is then checked against
+	the records in its date range and against the other rules, without making any of its occurrences.
+	
+	Args:
+		diary (Diary): The diary to add it to, diary.store must be a RecurringStore
+		apmnt (Appointment): The first occurrence
+		frequency (str): "daily", "weekly" or "monthly" - case insensitive
+		count (int | None, optional): How many times it happens. Defaults to None.
+		until (tuple[int, int, int] | None, optional): The last (day, month, year) it can happen on. Defaults to None.
+	
+	Returns:
+		Rule | str: The new rule, or the error message if it wasn't added
+	"""
+	frequency = frequency.lower();
+	if(frequency not in PERIODS and frequency != "monthly"):
+		return "Error: Frequency must be daily, weekly or monthly!";
+	
+	if((count is None) == (until is None)):
+		return "Error: A recurring appointment needs either a count or an end date!";
+	
+	if(count is not None and count < 1):
+		return "Error: Count must be at least 1!";
+	
+	record = diary._checkAppointment(apmnt, diary._getCurrentTime());
+	if(not isinstance(record, Record)):
+		return record;
+	
+	first = date(record.year, record.month, record.day);
+	if(until is not None):
+		if(diary._checkDate(*until) is not None):
+			return "Error: Invalid end date!";
+		
+		until = date(until[2], until[1], until[0]);
+		if(until < first):
+			return "Error: End date must be on or after the first appointment!";
+	
+	rule = Rule(record.priority, record.description, record.start, record.end, frequency, first, count, until);
+	
+	# Every occurrence has to be on a date the diary accepts, a count can carry a rule past the end of 9999
+	# (a monthly rule just stops making occurrences there, so it comes up short of its count instead)
+	if(rule.last > date.max.toordinal() or (count is not None and rule.count < count)):
+		return "Error: A recurring appointment can't go past the year 9999!";
+	
+	last = date.fromordinal(rule.last);
+	
+	with diary._lock.writing():
+		# Only the records in the series' date range are looked at, each is checked against the rule with arithmetic
+		store = diary.store;
+		mask = hourMask(rule.start, rule.end);
+		for other in store.store.between((first.year * 10000 + first.month * 100 + first.day) * 100, (last.year * 10000 + last.month * 100 + last.day + 1) * 100):
+			if(hourMask(other.start, other.end) & mask and rule.occursOn(date(other.year, other.month, other.day).toordinal())):
+				return "Error: Appointment overlaps with another appointment!";
+		
+		for other in store.rules:
+			if(rule.overlaps(other)):
+				return "Error: Appointment overlaps with another appointment!";
+		
+		# The diary's listeners only hear about records, the rule goes to the store's onRule listeners instead
+		store.addRule(rule);
+		diary._orderings = {};
+	
+	return rule;
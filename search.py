@@ -0,0 +1,289 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from bisect import bisect_left, insort	# Prefix searches are a range of the sorted tokens
+from datetime import date			# Turns the search dates into day numbers for recurring appointments
+import re							# Used to split descriptions into words
+
+from main import Diary, Record
+from recurrence import Rule
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# Substrings are found through every 1, 2 and 3 character piece of each description
+GRAM_LENGTH = 3
+
+# The words of a description, anything that isn't a letter or number separates them
+WORD = re.compile(r"\w+");
+
+
+
+# Search index over the descriptions of a diary
+class SearchIndex:
+	"""
+	Finds the records of a diary by their description, kept up to date as records are added
+	
+	Lots of records share a description, so the index is built over the distinct descriptions:
+	words and 1-3 character pieces (n-grams) point to descriptions, and each description points to its records.
+	A search only looks at the descriptions that could match and the records that have them.
+	Searches ignore case.
+	
+	The rules of a recurrence.RecurringStore are indexed by their description too, a search makes
+	the occurrences of the matching rules in its date range without making any others.
+	
+	Methods:
+		search(text, mode, priority, start, end) -> list[Record]:
+			Find the records whose description matches, in time order
+		
+		close() -> None:
+			Stop keeping the index up to date
+	"""
+	def __init__(this, diary: Diary) -> None:
+		"""
+		Index a diary, and keep the index up to date as records are added
+		
+		Args:
+			diary (Diary): The diary to search
+		"""
+		this.diary = diary;
+		
+		this.records: dict[str, list[Record]] = {};	# Description (casefolded) -> the records with it
+		this.rules: dict[str, list[Rule]] = {};		# Description (casefolded) -> the recurring appointments with it
+		this.words: dict[str, set[str]] = {};			# Word -> the descriptions with it
+		this.grams: dict[str, set[str]] = {};			# 1-3 character piece -> the descriptions with it
+		this.sortedWords: list[str] = [];				# Every word in order, for prefix searches
+		
+		with diary._lock.writing():
+			this._rebuild();
+			diary.onAdd.append(this._add);
+			diary.onUpdate.append(this._update);
+			diary.onReplace.append(this._rebuild);
+			
+			# Only a RecurringStore has rules
+			if(hasattr(diary.store, "onRule")):
+				diary.store.onRule.append(this._ruled);
+	
+	
+	
+	
+	# Called by the diary every time a record is added
+	def _add(this, record: Record) -> None:
+		"""
+		Adds a record to the index, a new description also gets its words and pieces indexed
+		
+		Args:
+			record (Record): The record that was added
+		"""
+		description = record.description.casefold();
+		
+		records = this.records.get(description);
+		if(records is not None):
+			records.append(record);
+			return;
+		
+		this.records[description] = [record];
+		if(description not in this.rules):
+			this._indexDescription(description);
+	
+	
+	
+	
+	# Called by a RecurringStore every time a rule is added or removed
+	def _ruled(this, rule: Rule, added: bool) -> None:
+		"""
+		Adds a rule to the index, or takes it out
+		
+		Args:
+			rule (Rule): The rule
+			added (bool): True if it was added, False if it was removed
+		"""
+		description = rule.description.casefold();
+		
+		if(not added):
+			this.rules[description].remove(rule);
+			return;
+		
+		if(description not in this.rules):
+			this.rules[description] = [];
+			if(description not in this.records):
+				this._indexDescription(description);
+		
+		this.rules[description].append(rule);
+	
+	
+	
+	
+	# Index the words and pieces of a new description
+	def _indexDescription(this, description: str) -> None:
+		for word in set(WORD.findall(description)):
+			if(word not in this.words):
+				this.words[word] = set();
+				insort(this.sortedWords, word);
+			
+			this.words[word].add(description);
+		
+		for length in range(1, GRAM_LENGTH + 1):
+			for i in range(len(description) - length + 1):
+				this.grams.setdefault(description[i:i + length], set()).add(description);
+	
+	
+	
+	
+	# Called by the diary every time a record is updated or deleted
+	def _update(this, old: Record, new: Record | None) -> None:
+		"""
+		Takes the old record out of the index and adds the new one
+		
+		The description's words and pieces are left behind even if no records have it any more, it just won't find anything
+		
+		Args:
+			old (Record): The record before it was changed
+			new (Record | None): The record after it was changed, or None if it was deleted
+		"""
+		# Some stores (such as SqliteStore) give out a new Record every time, so it's matched by its fields too
+		records = this.records[old.description.casefold()];
+		for position, record in enumerate(records):
+			if(record is old or str(record) == str(old)):
+				del records[position];
+				break;
+		
+		if(new is not None):
+			this._add(new);
+	
+	
+	
+	
+	# Called by the diary when all its records are replaced, such as after a sort
+	def _rebuild(this) -> None:
+		"""
+		Builds the index again from the records in the diary
+		"""
+		this.records = {};
+		this.rules = {};
+		this.words = {};
+		this.grams = {};
+		this.sortedWords = [];
+		
+		# toList() is only the stored records, a RecurringStore's rules are indexed once each rather than as every occurrence
+		for record in this.diary.store.toList():
+			this._add(record);
+		
+		for rule in getattr(this.diary.store, "rules", ()):
+			this._ruled(rule, true);
+	
+	
+	
+	
+	# Find the descriptions that match
+	def _descriptions(this, text: str, mode: str) -> set[str]:
+		"""
+		Returns the descriptions (casefolded) that match the text
+		
+		Args:
+			text (str): What to search for, casefolded
+			mode (str): "word", "prefix" or "substring"
+		
+		Returns:
+			set[str]: The matching descriptions
+		"""
+		if(mode == "word"):
+			# Every word of the text has to be in the description
+			found = None;
+			for word in sorted(set(WORD.findall(text)), key=lambda word: len(this.words.get(word, ()))):
+				descriptions = this.words.get(word, set());
+				found = set(descriptions) if(found is None) else found & descriptions;
+				
+				if(len(found) == 0):
+					break;
+			
+			return found or set();
+		
+		if(mode == "prefix"):
+			# A word of the description has to start with the text
+			found = set();
+			i = bisect_left(this.sortedWords, text);
+			while(i < len(this.sortedWords) and this.sortedWords[i].startswith(text)):
+				found |= this.words[this.sortedWords[i]];
+				i += 1;
+			
+			return found;
+		
+		if(mode == "substring"):
+			if(len(text) == 0):
+				return set(this.records) | set(this.rules);
+			
+			# Short text is a piece on its own, otherwise every piece of it has to be in the description
+			if(len(text) <= GRAM_LENGTH):
+				return set(this.grams.get(text, ()));
+			
+			pieces = sorted((this.grams.get(text[i:i + GRAM_LENGTH], set()) for i in range(len(text) - GRAM_LENGTH + 1)), key=len);
+			
+			# Having every piece doesn't mean they're in the right order, so the smallest set is checked directly
+			return { description for description in pieces[0] if(text in description) };
+		
+		raise ValueError(f"Can't search by {mode!r}, the modes are word, prefix and substring");
+	
+	
+	
+	
+	# Search the descriptions
+	def search(this, text: str, mode: str = "word", priority: str | None = None, start: tuple[int, int, int] | None = None, end: tuple[int, int, int] | None = None) -> list[Record]:
+		"""
+		Finds the records whose description matches the text
+		
+		Args:
+			text (str): What to search for, case doesn't matter
+			mode (str, optional): "word" to match whole words (every word in the text has to be there),
+				"prefix" to match the start of a word, or "substring" to match anywhere. Defaults to "word".
+			priority (str | None, optional): Only find records with this priority - case insensitive. Defaults to any priority.
+			start (tuple[int, int, int] | None, optional): Only find records on or after this (day, month, year). Defaults to no limit.
+			end (tuple[int, int, int] | None, optional): Only find records on or before this (day, month, year). Defaults to no limit.
+		
+		Returns:
+			list[Record]: The matching records, in time order
+		
+		Raises:
+			ValueError: If the mode isn't word, prefix or substring
+		"""
+		low = 0 if(start is None) else start[2] * 10000 + start[1] * 100 + start[0];
+		high = 99999999 if(end is None) else end[2] * 10000 + end[1] * 100 + end[0];
+		priority = None if(priority is None) else priority.lower();
+		
+		with this.diary._lock.reading():
+			descriptions = this._descriptions(text.casefold(), mode);
+			found = [
+				record
+				for description in descriptions
+				for record in this.records.get(description, ())
+				if(low <= record.date <= high and (priority is None or record.priority.lower() == priority))
+			];
+			
+			# Only the occurrences in the date range are made
+			firstDay = None if(start is None) else date(start[2], start[1], start[0]).toordinal();
+			lastDay = None if(end is None) else date(end[2], end[1], end[0]).toordinal();
+			for description in descriptions:
+				for rule in this.rules.get(description, ()):
+					if(priority is None or rule.priority.lower() == priority):
+						found.extend(rule.occurrences(firstDay, lastDay));
+		
+		found.sort(key=lambda record: record.key);
+		return found;
+	
+	
+	
+	
+	# Stop keeping the index up to date
+	def close(this) -> None:
+		"""
+		Stops listening to the diary, the index won't see any more records
+		"""
+		with this.diary._lock.writing():
+			this.diary.onAdd.remove(this._add);
+			this.diary.onUpdate.remove(this._update);
+			this.diary.onReplace.remove(this._rebuild);
+			
+			if(hasattr(this.diary.store, "onRule")):
+				this.diary.store.onRule.remove(this._ruled);
@@ -0,0 +1,341 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+import argparse						# Reads the options from the command line
+import asyncio						# Serves every client from a single event loop
+from datetime import datetime		# Free times are searched for from today if no date is given
+import io							# Used to render showRecords() into a string
+import json							# Requests and responses are sent as json, one per line
+import time							# Used to time the load generator
+
+from main import Diary, Appointment
+from parallel import sortParallel
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+# Diaries with at least this many records are sorted in a process pool, a sort in a thread would hold the GIL the whole time
+LARGE_SORT = 100000;
+
+# The longest request line a client can send, about 25 MB of appointments in a single add
+REQUEST_LIMIT = 32 * 1024 * 1024;
+
+
+
+# A TCP server for many named diaries
+class DiaryServer:
+	"""
+	Serves named diaries over TCP, each request and response is a single line of json
+	
+	Requests look like { "id": 1, "diary": "work", "op": "add", ... } and get back
+	{ "id": 1, "ok": true, "result": ... } or { "id": 1, "ok": false, "error": "..." }
+	
+	Operations:
+		add:	{ "appointments": [...] } -> the results from Diary.addRecords()
+		query:	{ "day": [d, m, y] }, { "start": [d, m, y], "end": [d, m, y] } or { "at": [d, m, y, hour] } -> records as strings
+		show:	{ "offset": 0, "limit": 100 } -> the table from showRecords()
+		sort:	{ "method": "time" } -> whether the diary was sorted
+		free:	{ "length": 2, "start": [d, m, y], "count": 1 } -> free times from Diary.findFreeSlots()
+	
+	Everything that touches a diary runs in a thread pool, waiting for its lock would otherwise hold up every other client.
+	Diary is thread safe, so this is fine even when several of them work on the same diary.
+	Sorting a large diary is CPU bound, so that goes to a process pool instead, see parallel.sortParallel().
+	"""
+	def __init__(this, host: str = "127.0.0.1", port: int = 8765) -> None:
+		"""
+		Set up the server
+		
+		Args:
+			host (str, optional): The address to listen on. Defaults to "127.0.0.1".
+			port (int, optional): The port to listen on, 0 picks a free one. Defaults to 8765.
+		"""
+		this.host = host;
+		this.port = port;
+		this.diaries: dict[str, Diary] = {};
+		this.server: asyncio.AbstractServer | None = None;
+	
+	
+	
+	
+	# Get a diary, making it if it doesn't exist yet
+	def diary(this, name: str) -> Diary:
+		diary = this.diaries.get(name);
+		if(diary is None):
+			diary = this.diaries[name] = Diary();
+		
+		return diary;
+	
+	
+	
+	
+	# Start listening
+	async def start(this) -> None:
+		"""
+		Starts listening for clients, the port is updated if it was 0
+		"""
+		# A big backlog so thousands of clients can connect at once without being refused
+		this.server = await asyncio.start_server(this._serveClient, this.host, this.port, backlog=8192, limit=REQUEST_LIMIT);
+		this.port = this.server.sockets[0].getsockname()[1];
+	
+	
+	
+	
+	# Stop listening
+	async def stop(this) -> None:
+		if(this.server is not None):
+			this.server.close();
+			await this.server.wait_closed();
+			this.server = None;
+	
+	
+	
+	
+	# Handle a single client until it disconnects
+	async def _serveClient(this, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		try:
+			while(true):
+				try:
+					line = await reader.readline();
+				except (ValueError, asyncio.LimitOverrunError):
+					# The rest of the line is still on its way, so there's no telling where the next request starts
+					response = { "id": None, "ok": false, "error": f"Request is longer than {REQUEST_LIMIT} bytes" };
+					writer.write(json.dumps(response).encode("utf-8") + b"\n");
+					await writer.drain();
+					break;
+				
+				if(not line):
+					break;
+				
+				response = await this._handle(line);
+				writer.write(json.dumps(response).encode("utf-8") + b"\n");
+				await writer.drain();
+		except (ConnectionError, asyncio.IncompleteReadError):
+			pass;
+		finally:
+			writer.close();
+	
+	
+	
+	
+	# Handle a single request
+	async def _handle(this, line: bytes) -> dict:
+		"""
+		Runs a single request
+		
+		Args:
+			line (bytes): The request, as a line of json
+		
+		Returns:
+			dict: The response
+		"""
+		requestId = None;
+		try:
+			request = json.loads(line);
+			requestId = request.get("id");
+			diary = this.diary(str(request["diary"]));
+			operation = request["op"];
+			loop = asyncio.get_running_loop();
+			
+			if(operation == "add"):
+				result = await loop.run_in_executor(None, diary.addRecords, request["appointments"]);
+			
+			elif(operation == "query"):
+				result = await loop.run_in_executor(None, this._query, diary, request);
+			
+			elif(operation == "show"):
+				result = await loop.run_in_executor(None, this._show, diary, request.get("offset", 0), request.get("limit"));
+			
+			elif(operation == "sort"):
+				method = request.get("method", "time");
+				if(len(diary.store) >= LARGE_SORT):
+					result = await loop.run_in_executor(None, sortParallel, diary, method);
+				else:
+					result = await loop.run_in_executor(None, diary.sortBy, method);
+			
+			elif(operation == "free"):
+				start = request.get("start");
+				result = await loop.run_in_executor(None, this._free, diary, request["length"], tuple(start) if(start) else _today(), request.get("count", 1));
+			
+			else:
+				return { "id": requestId, "ok": false, "error": f"Unknown operation {operation!r}" };
+			
+			return { "id": requestId, "ok": true, "result": result };
+		
+		except Exception as error:
+			# Bad requests get an error back, they don't bring the connection down
+			# Anything can be wrong with a request (a short date, a year past 9999...), so every error is turned into a response
+			return { "id": requestId, "ok": false, "error": f"{type(error).__name__}: {error}" };
+	
+	
+	
+	
+	# Look up records for a query
+	def _query(this, diary: Diary, request: dict) -> list[str]:
+		if("at" in request):
+			record = diary.recordAt(*request["at"]);
+			return [] if(record is None) else [str(record)];
+		
+		if("day" in request):
+			return [str(record) for record in diary.recordsOn(*request["day"])];
+		
+		return [str(record) for record in diary.recordsBetween(tuple(request["start"]), tuple(request["end"]))];
+	
+	
+	
+	
+	# Find free times for a free request
+	def _free(this, diary: Diary, length: int, start: tuple[int, int, int], count: int) -> list[Appointment]:
+		return diary.findFreeSlots(length, start, count=count);
+	
+	
+	
+	
+	# Render the table of records into a string
+	def _show(this, diary: Diary, offset: int, limit: int | None) -> str:
+		output = io.StringIO();
+		diary.writeRecords(output, offset, limit);
+		return output.getvalue();
+
+
+
+
+# Today's date as (day, month, year)
+def _today() -> tuple[int, int, int]:
+	now = datetime.now();
+	return (now.day, now.month, now.year);
+
+
+
+
+# A client for DiaryServer
+class DiaryClient:
+	"""
+	Sends requests to a DiaryServer over a single connection, one at a time
+	"""
+	def __init__(this, host: str = "127.0.0.1", port: int = 8765) -> None:
+		this.host = host;
+		this.port = port;
+		this._reader: asyncio.StreamReader | None = None;
+		this._writer: asyncio.StreamWriter | None = None;
+		this._nextId = 0;
+	
+	
+	
+	
+	async def connect(this) -> None:
+		# Responses can be as long as the requests, such as the results of a large add
+		this._reader, this._writer = await asyncio.open_connection(this.host, this.port, limit=REQUEST_LIMIT);
+	
+	
+	async def close(this) -> None:
+		if(this._writer is not None):
+			this._writer.close();
+			await this._writer.wait_closed();
+			this._writer = None;
+	
+	
+	
+	
+	# Send a request and wait for the response
+	async def request(this, diary: str, op: str, **fields) -> dict:
+		"""
+		Sends a request and waits for its response
+		
+		Args:
+			diary (str): The name of the diary
+			op (str): The operation, see DiaryServer
+			**fields: The rest of the request
+		
+		Returns:
+			dict: The response
+		"""
+		this._nextId += 1;
+		request = { "id": this._nextId, "diary": diary, "op": op, **fields };
+		
+		this._writer.write(json.dumps(request).encode("utf-8") + b"\n");
+		await this._writer.drain();
+		
+		return json.loads(await this._reader.readline());
+
+
+
+
+# Generate load against a server
+async def runLoad(host: str, port: int, clients: int = 1000, requests: int = 10, diaries: int = 10) -> dict:
+	"""
+	Connects many clients at once, each adds appointments to and queries one of a few diaries
+	
+	Args:
+		host (str): The server's address
+		port (int): The server's port
+		clients (int, optional): How many clients to connect at once. Defaults to 1000.
+		requests (int, optional): How many add and query pairs each client sends. Defaults to 10.
+		diaries (int, optional): How many diaries the clients are spread over. Defaults to 10.
+	
+	Returns:
+		dict: How many requests were sent, failed and were accepted, and how long it all took
+	"""
+	year = time.localtime().tm_year + 1;
+	totals = { "clients": clients, "requests": 0, "errors": 0, "accepted": 0, "seconds": 0.0 };
+	
+	async def client(number: int) -> None:
+		connection = DiaryClient(host, port);
+		await connection.connect();
+		
+		try:
+			name = f"diary{number % diaries}";
+			for index in range(requests):
+				# Every client books its own times, so the appointments only overlap if a booking is lost or doubled
+				slot = number // diaries * requests + index;
+				day = slot // 15;
+				hour = 7 + slot % 15;
+				date = [day % 28 + 1, day // 28 % 12 + 1, year + day // (28 * 12)];
+				
+				added = await connection.request(name, "add", appointments=[f"Low;{date[0]}/{date[1]}/{date[2]};{hour};{hour + 1};Load test"]);
+				queried = await connection.request(name, "query", day=date);
+				
+				totals["requests"] += 2;
+				totals["errors"] += (not added["ok"]) + (not queried["ok"]);
+				totals["accepted"] += sum(1 for result in added.get("result", []) if result["accepted"]);
+		finally:
+			await connection.close();
+	
+	start = time.perf_counter();
+	await asyncio.gather(*(client(number) for number in range(clients)));
+	totals["seconds"] = time.perf_counter() - start;
+	
+	return totals;
+
+
+
+
+# Run the server, or the load generator, from the command line
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Serve diaries over TCP, one line of json per request");
+	parser.add_argument("--host", default="127.0.0.1");
+	parser.add_argument("--port", type=int, default=8765);
+	parser.add_argument("--load", action="store_true", help="Run the load generator against a server instead of serving");
+	parser.add_argument("--clients", type=int, default=1000, help="How many clients the load generator connects at once");
+	parser.add_argument("--requests", type=int, default=10, help="How many add and query pairs each client sends");
+	args = parser.parse_args();
+	
+	if(args.load):
+		print(json.dumps(asyncio.run(runLoad(args.host, args.port, args.clients, args.requests))));
+		return;
+	
+	async def serve() -> None:
+		server = DiaryServer(args.host, args.port);
+		await server.start();
+		print(f"Serving diaries on {server.host}:{server.port}");
+		await server.server.serve_forever();
+	
+	try:
+		asyncio.run(serve());
+	except KeyboardInterrupt:
+		print("\nExiting program...");
+
+
+
+if(__name__ == "__main__"):
+	main();
@@ -0,0 +1,652 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Iterator			# Type hinting
+from collections import OrderedDict	# Keeps the loaded shards in the order they were last used
+from itertools import islice		# Used to skip into the middle of a shard
+import json							# Each record is stored as a line of json, and the manifest is json
+import os							# Used to find, remove and replace shard files
+import threading					# Readers may load shards at the same time, so loading is locked
+
+from main import MemoryStore, Record
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# Records stored in one file per year and month, loaded only when they are needed
+class ShardedStore:
+	"""
+	Keeps each year/ month of a diary in its own file (yyyy-mm.jsonl), can be given to Diary(store=...)
+	
+	A shard is only read from disk when an add, overlap check or query touches its month, and can be
+	unloaded again afterwards, so memory use depends on the months being worked on rather than the whole history.
+	A small manifest keeps the record count and longest description of each shard, so the diary can be
+	counted and shown without loading every month.
+	
+	Records are listed month by month, in their stored order within each month.
+	After a priority sort, every month's high priority records are listed before any low priority ones.
+	
+	Methods:
+		append(record) -> None:
+			Add a record to the end of its month
+		
+		replace(records, timeOrder) -> None:
+			Replace every record in the store
+		
+		slice(offset, stop) -> Iterator[Record]:
+			Get the records between two positions
+		
+		dayMask(date) -> int:
+			Get the bitmask of hours booked on a day
+		
+		between(low, high) -> Iterator[Record]:
+			Get the records with a sort key from low up to high, in time order
+		
+		sort(sortMethod) -> bool:
+			Sort the records by priority or time, a month at a time
+		
+		toList() -> list[Record]:
+			Get the records as a list
+		
+		remove(record) -> bool:
+			Remove a record, leaving a tombstone in its month's file
+		
+		update(old, new) -> bool:
+			Swap a record for a new one
+		
+		compact() -> None:
+			Rewrite the months that have tombstones in their files
+		
+		unload(year, month) -> None:
+			Forget a loaded month
+		
+		flush() -> None:
+			Save the manifest if anything changed since it was last saved
+		
+		close() -> None:
+			Unload every month and save the manifest
+	"""
+	def __init__(this, directory: str, maxLoaded: int | None = None) -> None:
+		"""
+		Open (or create) a sharded diary
+		
+		Args:
+			directory (str): The folder the shards are kept in, created if it doesn't exist
+			maxLoaded (int | None, optional): The most months to keep loaded at once, the least recently used are unloaded. Defaults to no limit.
+		"""
+		os.makedirs(directory, exist_ok=true);
+		
+		this.directory = directory;
+		this.maxLoaded = maxLoaded;
+		this.manifestPath = os.path.join(directory, "shards.json");
+		
+		# The loaded shards, (year, month) -> MemoryStore, most recently used last
+		this.loaded: OrderedDict[tuple[int, int], MemoryStore] = OrderedDict();
+		this._files: dict[tuple[int, int], object] = {};
+		this._lock = threading.RLock();
+		
+		# What we know about each shard without loading it: its record count, longest description and file size
+		this.shards: dict[tuple[int, int], dict] = {};
+		this.priorityFirst = false;
+		
+		# Whether the shards have changed since the manifest was saved, it's only saved by flush(), close() and the bulk operations
+		# A manifest that's out of date is still safe, any shard whose file size doesn't match it is counted again when it's opened
+		this._manifestDirty = false;
+		
+		manifest = { "shards": {}, "priorityFirst": false };
+		if(os.path.exists(this.manifestPath)):
+			with open(this.manifestPath, "r", encoding="utf-8") as file:
+				manifest = json.load(file);
+		
+		this.priorityFirst = manifest["priorityFirst"];
+		
+		for name in os.listdir(directory):
+			if(not name.endswith(".jsonl")):
+				continue;
+			
+			year, month = (int(part) for part in name[:-6].split("-"));
+			info = manifest["shards"].get(name[:-6]);
+			
+			# A shard the manifest doesn't know about (or that changed since) has to be read once to count it
+			if(info is None or info["size"] != os.path.getsize(this._path((year, month)))):
+				shard = this._read((year, month));
+				info = { "count": len(shard), "descLength": shard.descLength, "size": os.path.getsize(this._path((year, month))) };
+			
+			this.shards[(year, month)] = info;
+	
+	
+	
+	
+	def __len__(this) -> int:
+		return sum(info["count"] for info in this.shards.values());
+	
+	
+	def __iter__(this) -> Iterator[Record]:
+		return this.slice(0, None);
+	
+	
+	
+	
+	# The longest description of any record, for the width of the table
+	@property
+	def descLength(this) -> int:
+		return max([7] + [info["descLength"] for info in this.shards.values()]);
+	
+	
+	
+	
+	# The file a shard is kept in
+	def _path(this, shardKey: tuple[int, int]) -> str:
+		return os.path.join(this.directory, f"{shardKey[0]:04d}-{shardKey[1]:02d}.jsonl");
+	
+	
+	
+	
+	# Read a shard from its file
+	def _read(this, shardKey: tuple[int, int]) -> MemoryStore:
+		"""
+		Reads a shard from its file, replaying any tombstones
+		
+		Each line is a record in the string format, or {"remove": record} / {"replace": record, "with": record}
+		for records that were removed or updated after they were written
+		"""
+		records: list[str | None] = [];
+		positions: dict[str, list[int]] | None = None;  # Only built if the file has tombstones
+		
+		with open(this._path(shardKey), "r", encoding="utf-8") as file:
+			for line in file:
+				if(not line.strip()):
+					continue;
+				
+				entry = json.loads(line);
+				if(isinstance(entry, str)):
+					if(positions is not None):
+						positions.setdefault(entry, []).append(len(records));
+					
+					records.append(entry);
+					continue;
+				
+				if(positions is None):
+					positions = {};
+					for position, record in enumerate(records):
+						if(record is not None):
+							positions.setdefault(record, []).append(position);
+				
+				old = entry.get("remove", entry.get("replace"));
+				position = positions[old].pop(0);
+				records[position] = entry.get("with");
+				
+				if(records[position] is not None):
+					positions.setdefault(records[position], []).append(position);
+		
+		shard = MemoryStore();
+		shard.replace([Record.fromString(record) for record in records if(record is not None)]);
+		return shard;
+	
+	
+	
+	
+	# Get a shard, loading it if it isn't loaded
+	def _shard(this, shardKey: tuple[int, int], create: bool = false) -> MemoryStore | None:
+		"""
+		Returns a shard, loading it from its file if needed
+		
+		Args:
+			shardKey (tuple[int, int]): The (year, month) of the shard
+			create (bool, optional): Whether to make the shard if it doesn't exist. Defaults to false.
+		
+		Returns:
+			MemoryStore | None: The shard, or None if it doesn't exist and create was false
+		"""
+		with this._lock:
+			shard = this.loaded.get(shardKey);
+			if(shard is not None):
+				this.loaded.move_to_end(shardKey);
+				return shard;
+			
+			if(shardKey in this.shards):
+				shard = this._read(shardKey);
+			elif(create):
+				shard = MemoryStore();
+				this.shards[shardKey] = { "count": 0, "descLength": 7, "size": 0 };
+				this._manifestDirty = true;
+			else:
+				return None;
+			
+			this.loaded[shardKey] = shard;
+			
+			# Make room by unloading the months that haven't been used for the longest
+			if(this.maxLoaded is not None):
+				while(len(this.loaded) > this.maxLoaded):
+					this.unload(*next(iter(this.loaded)));
+			
+			return shard;
+	
+	
+	
+	
+	# Add a single record
+	def append(this, record: Record) -> None:
+		"""
+		Appends a record to the end of its month, and to the end of that month's file
+		
+		Args:
+			record (Record): The record to add
+		"""
+		shardKey = (record.year, record.month);
+		
+		with this._lock:
+			shard = this._shard(shardKey, create=true);
+			shard.append(record);
+			
+			this._log(shardKey, str(record));
+			
+			info = this.shards[shardKey];
+			info["count"] += 1;
+			info["descLength"] = shard.descLength;
+	
+	
+	
+	
+	# Add a line to the end of a shard's file
+	def _log(this, shardKey: tuple[int, int], entry: str | dict) -> None:
+		file = this._files.get(shardKey);
+		if(file is None):
+			file = this._files[shardKey] = open(this._path(shardKey), "a", encoding="utf-8");
+		
+		file.write(json.dumps(entry) + "\n");
+		file.flush();
+		
+		this.shards[shardKey]["size"] = file.tell();
+		this._manifestDirty = true;
+	
+	
+	
+	
+	# Remove a single record
+	def remove(this, record: Record) -> bool:
+		"""
+		Removes a record from its month, a tombstone is added to the month's file instead of rewriting it
+		
+		Args:
+			record (Record): The record to remove, or one with the same fields
+		
+		Returns:
+			bool: False if the record isn't in the store, True if it was removed
+		"""
+		shardKey = (record.year, record.month);
+		
+		with this._lock:
+			shard = this._shard(shardKey);
+			record = None if(shard is None) else this._find(shard, record);
+			if(record is None or not shard.remove(record)):
+				return false;
+			
+			this.shards[shardKey]["count"] -= 1;
+			this._log(shardKey, { "remove": str(record) });
+			this._tombstoned(shardKey);
+		
+		return true;
+	
+	
+	
+	
+	# Swap a record for a new one
+	def update(this, old: Record, new: Record) -> bool:
+		"""
+		Replaces a record with a new one, moving it to the end of its new month if the month changed
+		
+		Args:
+			old (Record): The record to replace, or one with the same fields
+			new (Record): The record to put in its place
+		
+		Returns:
+			bool: False if the old record isn't in the store, True if it was replaced
+		"""
+		if((old.year, old.month) != (new.year, new.month)):
+			if(not this.remove(old)):
+				return false;
+			
+			this.append(new);
+			return true;
+		
+		shardKey = (old.year, old.month);
+		
+		with this._lock:
+			shard = this._shard(shardKey);
+			old = None if(shard is None) else this._find(shard, old);
+			if(old is None or not shard.update(old, new)):
+				return false;
+			
+			this._log(shardKey, { "replace": str(old), "with": str(new) });
+			this._tombstoned(shardKey);
+			this.shards[shardKey]["descLength"] = shard.descLength;
+		
+		return true;
+	
+	
+	
+	
+	# Find a record in a shard
+	def _find(this, shard: MemoryStore, record: Record) -> Record | None:
+		"""
+		Returns the shard's own copy of a record. A month that was unloaded and read again has new Record objects,
+		so a record that doesn't match by identity is matched by its fields instead.
+		
+		Args:
+			shard (MemoryStore): The record's month
+			record (Record): The record to look for
+		
+		Returns:
+			Record | None: The record as it is in the shard, or None if it isn't there
+		"""
+		candidates = list(shard.between(record.key, record.key + 1));
+		for other in candidates:
+			if(other is record):
+				return other;
+		
+		text = str(record);
+		return next((other for other in candidates if(str(other) == text)), None);
+	
+	
+	
+	
+	# Count a tombstone, rewriting the file once it has more tombstones than records
+	def _tombstoned(this, shardKey: tuple[int, int]) -> None:
+		info = this.shards[shardKey];
+		info["removed"] = info.get("removed", 0) + 1;
+		
+		if(info["removed"] > info["count"]):
+			this._write(shardKey, this.loaded[shardKey].toList());
+	
+	
+	
+	
+	# Rewrite the months with tombstones
+	def compact(this) -> None:
+		"""
+		Rewrites every month that has tombstones in its file, each month is only loaded while it's rewritten
+		"""
+		with this._lock:
+			for shardKey in sorted(this.shards):
+				if(this.shards[shardKey].get("removed", 0) == 0):
+					continue;
+				
+				wasLoaded = shardKey in this.loaded;
+				shard = this._shard(shardKey);
+				shard.compact();
+				this._write(shardKey, shard.toList());
+				
+				if(not wasLoaded):
+					this.loaded.pop(shardKey, None);
+			
+			this._saveManifest();
+	
+	
+	
+	
+	# Write a whole shard to its file
+	def _write(this, shardKey: tuple[int, int], records: list[Record]) -> None:
+		file = this._files.pop(shardKey, None);
+		if(file is not None):
+			file.close();
+		
+		# Write to a temporary file first, then swap it in so there is always a complete shard on disk
+		path = this._path(shardKey);
+		with open(path + ".tmp", "w", encoding="utf-8") as file:
+			for record in records:
+				file.write(json.dumps(str(record)) + "\n");
+		
+		os.replace(path + ".tmp", path);
+		this.shards[shardKey] = { "count": len(records), "descLength": max([7] + [len(record.description) for record in records]), "size": os.path.getsize(path) };
+		this._manifestDirty = true;
+	
+	
+	
+	
+	# Replace all the records
+	def replace(this, records: list[Record], timeOrder: list[Record] | None = None) -> None:
+		"""
+		Replaces every record, each month's file is rewritten
+		
+		Args:
+			records (list[Record]): The new records
+			timeOrder (list[Record] | None, optional): Not needed, each month is indexed as it's loaded. Defaults to None.
+		"""
+		grouped: dict[tuple[int, int], list[Record]] = {};
+		for record in records:
+			grouped.setdefault((record.year, record.month), []).append(record);
+		
+		with this._lock:
+			for shardKey in list(this.shards):
+				if(shardKey not in grouped):
+					this._drop(shardKey);
+			
+			this.loaded.clear();
+			for shardKey, shardRecords in grouped.items():
+				this._write(shardKey, shardRecords);
+			
+			this.priorityFirst = false;
+			this._saveManifest();
+	
+	
+	
+	
+	# Delete a shard
+	def _drop(this, shardKey: tuple[int, int]) -> None:
+		file = this._files.pop(shardKey, None);
+		if(file is not None):
+			file.close();
+		
+		this.loaded.pop(shardKey, None);
+		this.shards.pop(shardKey, None);
+		this._manifestDirty = true;
+		
+		if(os.path.exists(this._path(shardKey))):
+			os.remove(this._path(shardKey));
+	
+	
+	
+	
+	# Go through the records in their listed order
+	def _ordered(this, skip: int = 0) -> Iterator[Record]:
+		"""
+		Yields the records month by month, after a priority sort the high priority ones go first
+		
+		Args:
+			skip (int, optional): How many records to skip, whole months are skipped without loading them when possible. Defaults to 0.
+		"""
+		shardKeys = sorted(this.shards);
+		
+		if(not this.priorityFirst):
+			for shardKey in shardKeys:
+				count = this.shards[shardKey]["count"];
+				if(skip >= count):
+					skip -= count;
+					continue;
+				
+				yield from islice(this._shard(shardKey), skip, None);
+				skip = 0;
+			
+			return;
+		
+		# The high and low priority records of a month aren't counted separately, so these months have to be loaded
+		records = (record for high in (true, false) for shardKey in shardKeys for record in this._shard(shardKey) if((record.priority.lower() == "high") == high));
+		yield from islice(records, skip, None);
+	
+	
+	
+	
+	# Get part of the records, in their listed order
+	def slice(this, offset: int, stop: int | None) -> Iterator[Record]:
+		"""
+		Returns the records from offset up to (but not including) stop
+		
+		Args:
+			offset (int): The position of the first record
+			stop (int | None): The position to stop at, or None for the end
+		
+		Returns:
+			Iterator[Record]: The records in the slice
+		"""
+		return islice(this._ordered(offset), None if(stop is None) else max(0, stop - offset));
+	
+	
+	
+	
+	# Get the hours booked on a day
+	def dayMask(this, date: int) -> int:
+		"""
+		Returns the bitmask of hours booked on a day, only that day's month is loaded
+		
+		Args:
+			date (int): The packed date (yyyymmdd)
+		
+		Returns:
+			int: The bitmask of booked hours, 0 if nothing is booked
+		"""
+		shard = this._shard((date // 10000, date // 100 % 100));
+		return 0 if(shard is None) else shard.dayMask(date);
+	
+	
+	
+	
+	# Get the records in a range of sort keys
+	def between(this, low: int, high: int) -> Iterator[Record]:
+		"""
+		Returns the records with a sort key (yyyymmddhh) from low up to (but not including) high, in time order
+		
+		Only the months in the range are loaded
+		
+		Args:
+			low (int): The lowest sort key to include
+			high (int): The sort key to stop at
+		
+		Returns:
+			Iterator[Record]: The records in the range
+		"""
+		first = (low // 1000000, low // 10000 % 100);
+		last = (high // 1000000, high // 10000 % 100);
+		
+		records = [];
+		for shardKey in sorted(this.shards):
+			if(first <= shardKey <= last):
+				records.extend(this._shard(shardKey).between(low, high));
+		
+		return iter(records);
+	
+	
+	
+	
+	# Sort the records
+	def sort(this, sortMethod: str) -> bool:
+		"""
+		Sorts each month and rewrites its file, only one month needs to be loaded at a time
+		
+		Args:
+			sortMethod (str): Either "time" or "priority" - lowercase
+		
+		Returns:
+			bool: False if the sort method was invalid, True if the records were sorted
+		"""
+		if(sortMethod != "time" and sortMethod != "priority"):
+			return false;
+		
+		with this._lock:
+			for shardKey in sorted(this.shards):
+				wasLoaded = shardKey in this.loaded;
+				shard = this._shard(shardKey);
+				
+				shard.sort(sortMethod);
+				this._write(shardKey, shard.toList());
+				
+				# Sorting shouldn't leave the whole diary loaded
+				if(not wasLoaded):
+					this.loaded.pop(shardKey, None);
+			
+			this.priorityFirst = sortMethod == "priority";
+			this._saveManifest();
+		
+		return true;
+	
+	
+	
+	
+	# Get the records as a list
+	def toList(this) -> list[Record]:
+		"""
+		Returns every record as a new list, in their listed order. This loads every month.
+		
+		Returns:
+			list[Record]: The records
+		"""
+		return list(this);
+	
+	
+	
+	
+	# Forget a loaded month
+	def unload(this, year: int, month: int) -> None:
+		"""
+		Unloads a month, its records stay in its file and are loaded again the next time they're needed
+		
+		The manifest isn't saved here, a scan through many months would otherwise rewrite it for every month. See flush().
+		
+		Args:
+			year (int): The year of the month
+			month (int): The month
+		"""
+		with this._lock:
+			this.loaded.pop((year, month), None);
+			
+			file = this._files.pop((year, month), None);
+			if(file is not None):
+				file.close();
+	
+	
+	
+	
+	# Save what we know about each shard
+	def _saveManifest(this) -> None:
+		manifest = {
+			"shards": { f"{year:04d}-{month:02d}": info for (year, month), info in this.shards.items() },
+			"priorityFirst": this.priorityFirst
+		};
+		
+		with open(this.manifestPath + ".tmp", "w", encoding="utf-8") as file:
+			json.dump(manifest, file);
+		
+		os.replace(this.manifestPath + ".tmp", this.manifestPath);
+		this._manifestDirty = false;
+	
+	
+	
+	
+	# Save the manifest if it's out of date
+	def flush(this) -> None:
+		"""
+		Saves the manifest if any shard has changed since it was last saved
+		"""
+		with this._lock:
+			if(this._manifestDirty):
+				this._saveManifest();
+	
+	
+	
+	
+	# Unload everything
+	def close(this) -> None:
+		"""
+		Unloads every month and saves the manifest
+		"""
+		with this._lock:
+			for shardKey in list(this.loaded):
+				this.unload(*shardKey);
+			
+			for file in this._files.values():
+				file.close();
+			
+			this._files.clear();
+			this._saveManifest();
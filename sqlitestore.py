@@ -0,0 +1,367 @@
+# All of our imports, these are built-in libraries
+from __future__ import annotations  # Type hinting
+from typing import Iterator			# Type hinting
+import json							# Used to import the records.json file written by main()
+import sqlite3						# The embedded database the records are kept in
+
+from main import Record, hourMask
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+
+# SQLite storage for the records of a diary
+class SqliteStore:
+	"""
+	Keeps the records of a diary in an SQLite database, can be given to Diary(store=...)
+	
+	The table is indexed on (year, month, day, start), so overlap checks only look at the
+	records on a single day, and on position so records can be listed in their stored order.
+	
+	Methods:
+		append(record) -> None:
+			Add a record to the end of the store
+		
+		replace(records, timeOrder) -> None:
+			Replace every record in the store
+		
+		slice(offset, stop) -> Iterator[Record]:
+			Get the records between two positions
+		
+		dayMask(date) -> int:
+			Get the bitmask of hours booked on a day
+		
+		between(low, high) -> Iterator[Record]:
+			Get the records with a sort key from low up to high, in time order
+		
+		sort(sortMethod) -> bool:
+			Sort the records by priority or time
+		
+		toList() -> list[Record]:
+			Get the records as a list
+		
+		remove(record) -> bool:
+			Delete a record
+		
+		update(old, new) -> bool:
+			Swap a record for a new one in the same place
+		
+		compact() -> None:
+			Reclaim the space left by deleted records
+		
+		importJson(path) -> int:
+			Add the records from a records.json file
+	"""
+	def __init__(this, path: str = ":memory:") -> None:
+		"""
+		Open (or create) the database
+		
+		Args:
+			path (str, optional): The database file. Defaults to ":memory:".
+		"""
+		this.connection = sqlite3.connect(path, check_same_thread=false);
+		
+		# Write ahead logging lets each commit be a small append instead of rewriting pages
+		this.connection.execute("PRAGMA journal_mode=WAL");
+		this.connection.execute("PRAGMA synchronous=NORMAL");
+		
+		this.connection.execute("""
+			CREATE TABLE IF NOT EXISTS records (
+				id INTEGER PRIMARY KEY,
+				position INTEGER NOT NULL,
+				priority TEXT NOT NULL,
+				day INTEGER NOT NULL,
+				month INTEGER NOT NULL,
+				year INTEGER NOT NULL,
+				start INTEGER NOT NULL,
+				"end" INTEGER NOT NULL,
+				description TEXT NOT NULL
+			)
+		""");
+		this.connection.execute("CREATE INDEX IF NOT EXISTS recordsByDate ON records (year, month, day, start)");
+		this.connection.execute("CREATE INDEX IF NOT EXISTS recordsByPosition ON records (position)");
+		this.connection.commit();
+		
+		# Work out where the next record goes, and the longest description so far
+		nextPosition, descLength = this.connection.execute("SELECT MAX(position), MAX(LENGTH(description)) FROM records").fetchone();
+		this._nextPosition: int = 0 if(nextPosition is None) else nextPosition + 1;
+		this.descLength: int = max(7, descLength or 0);
+	
+	
+	
+	
+	def __len__(this) -> int:
+		return this.connection.execute("SELECT COUNT(*) FROM records").fetchone()[0];
+	
+	
+	def __iter__(this) -> Iterator[Record]:
+		return this.slice(0, None);
+	
+	
+	
+	
+	# Add a single record
+	def append(this, record: Record) -> None:
+		"""
+		Inserts a record after every other record
+		
+		Args:
+			record (Record): The record to add
+		"""
+		this.connection.execute(
+			"INSERT INTO records (position, priority, day, month, year, start, \"end\", description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+			(this._nextPosition, record.priority, record.day, record.month, record.year, record.start, record.end, record.description)
+		);
+		this.connection.commit();
+		
+		this._nextPosition += 1;
+		this.descLength = max(this.descLength, len(record.description));
+	
+	
+	
+	
+	# Replace all the records
+	def replace(this, records: list[Record], timeOrder: list[Record] | None = None) -> None:
+		"""
+		Deletes every record and inserts the new ones in a single transaction
+		
+		Args:
+			records (list[Record]): The new records
+			timeOrder (list[Record] | None, optional): Not needed, sqlite keeps its own index on the sort key. Defaults to None.
+		"""
+		with this.connection:
+			this.connection.execute("DELETE FROM records");
+			this.connection.executemany(
+				"INSERT INTO records (position, priority, day, month, year, start, \"end\", description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+				((position, record.priority, record.day, record.month, record.year, record.start, record.end, record.description) for position, record in enumerate(records))
+			);
+		
+		this._nextPosition = len(records);
+		this.descLength = max([7] + [len(record.description) for record in records]);
+	
+	
+	
+	
+	# Get part of the records, in their stored order
+	def slice(this, offset: int, stop: int | None) -> Iterator[Record]:
+		"""
+		Returns the records from offset up to (but not including) stop, read from the position index
+		
+		Args:
+			offset (int): The position of the first record
+			stop (int | None): The position to stop at, or None for the end
+		
+		Returns:
+			Iterator[Record]: The records in the slice
+		"""
+		limit = -1 if(stop is None) else max(0, stop - offset);
+		cursor = this.connection.execute(
+			"SELECT priority, day, month, year, start, \"end\", description FROM records ORDER BY position LIMIT ? OFFSET ?",
+			(limit, offset)
+		);
+		
+		for row in cursor:
+			yield Record(*row);
+	
+	
+	
+	
+	# Get the hours booked on a day
+	def dayMask(this, date: int) -> int:
+		"""
+		Returns the bitmask of hours booked on a day, only the records on that day are read from the date index
+		
+		Args:
+			date (int): The packed date (yyyymmdd)
+		
+		Returns:
+			int: The bitmask of booked hours, 0 if nothing is booked
+		"""
+		year, monthDay = divmod(date, 10000);
+		month, day = divmod(monthDay, 100);
+		
+		mask = 0;
+		for start, end in this.connection.execute("SELECT start, \"end\" FROM records WHERE year = ? AND month = ? AND day = ?", (year, month, day)):
+			mask |= hourMask(start, end);
+		
+		return mask;
+	
+	
+	
+	
+	# Get the records in a range of sort keys
+	def between(this, low: int, high: int) -> Iterator[Record]:
+		"""
+		Returns the records with a sort key (yyyymmddhh) from low up to (but not including) high, in time order
+		
+		The row value comparison lets SQLite range scan the date index
+		
+		Args:
+			low (int): The lowest sort key to include
+			high (int): The sort key to stop at
+		
+		Returns:
+			Iterator[Record]: The records in the range
+		"""
+		lowDate, lowStart = divmod(low, 100);
+		highDate, highStart = divmod(high, 100);
+		cursor = this.connection.execute(
+			"""
+			SELECT priority, day, month, year, start, "end", description FROM records
+			WHERE (year, month, day, start) >= (?, ?, ?, ?) AND (year, month, day, start) < (?, ?, ?, ?)
+			ORDER BY year, month, day, start, position
+			""",
+			(lowDate // 10000, lowDate // 100 % 100, lowDate % 100, lowStart, highDate // 10000, highDate // 100 % 100, highDate % 100, highStart)
+		);
+		
+		for row in cursor:
+			yield Record(*row);
+	
+	
+	
+	
+	# Sort the records
+	def sort(this, sortMethod: str) -> bool:
+		"""
+		Sorts the records by renumbering their positions inside the database, see Diary.sortBy()
+		
+		Ties keep their old order, as the old position is the last thing sorted on
+		
+		Args:
+			sortMethod (str): Either "time" or "priority" - lowercase
+		
+		Returns:
+			bool: False if the sort method was invalid, True if the records were sorted
+		"""
+		if(sortMethod == "time"):
+			order = "year, month, day, start, position";
+		
+		elif(sortMethod == "priority"):
+			order = "LOWER(priority) != 'high', year, month, day, start, position";
+		
+		else:
+			return false;
+		
+		with this.connection:
+			this.connection.execute(f"""
+				UPDATE records SET position = ranked.newPosition
+				FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY {order}) - 1 AS newPosition FROM records) AS ranked
+				WHERE records.id = ranked.id
+			""");
+		
+		return true;
+	
+	
+	
+	
+	# Get the records as a list
+	def toList(this) -> list[Record]:
+		"""
+		Returns every record as a new list, in their stored order
+		
+		Returns:
+			list[Record]: The records
+		"""
+		return list(this);
+	
+	
+	
+	
+	# The row of a record, found through the date index
+	_FIND = "SELECT id FROM records WHERE year = ? AND month = ? AND day = ? AND start = ? AND \"end\" = ? AND priority = ? AND description = ? ORDER BY position LIMIT 1";
+	
+	
+	
+	
+	# Remove a single record
+	def remove(this, record: Record) -> bool:
+		"""
+		Deletes a record, SQLite keeps track of the free space itself
+		
+		Args:
+			record (Record): The record to delete
+		
+		Returns:
+			bool: False if the record isn't in the store, True if it was deleted
+		"""
+		with this.connection:
+			cursor = this.connection.execute(
+				f"DELETE FROM records WHERE id = ({this._FIND})",
+				(record.year, record.month, record.day, record.start, record.end, record.priority, record.description)
+			);
+		
+		return cursor.rowcount > 0;
+	
+	
+	
+	
+	# Swap a record for a new one
+	def update(this, old: Record, new: Record) -> bool:
+		"""
+		Updates a record's row in place, so it keeps its position
+		
+		Args:
+			old (Record): The record to replace
+			new (Record): The record to put in its place
+		
+		Returns:
+			bool: False if the old record isn't in the store, True if it was replaced
+		"""
+		with this.connection:
+			cursor = this.connection.execute(
+				f"UPDATE records SET priority = ?, day = ?, month = ?, year = ?, start = ?, \"end\" = ?, description = ? WHERE id = ({this._FIND})",
+				(new.priority, new.day, new.month, new.year, new.start, new.end, new.description, old.year, old.month, old.day, old.start, old.end, old.priority, old.description)
+			);
+		
+		this.descLength = max(this.descLength, len(new.description));
+		return cursor.rowcount > 0;
+	
+	
+	
+	
+	# Reclaim the space left by deleted records
+	def compact(this) -> None:
+		"""
+		Rebuilds the database file without the pages freed by deleted records
+		"""
+		this.connection.execute("VACUUM");
+	
+	
+	
+	
+	# Migrate the records.json file written by main()
+	def importJson(this, path: str) -> int:
+		"""
+		Adds the records from a records.json file (a list of records in the string format) after the existing records
+		
+		Args:
+			path (str): The json file to read
+		
+		Returns:
+			int: How many records were added
+		"""
+		with open(path, "r", encoding="utf-8") as file:
+			records = [Record.fromString(record) for record in json.load(file)];
+		
+		with this.connection:
+			this.connection.executemany(
+				"INSERT INTO records (position, priority, day, month, year, start, \"end\", description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+				((this._nextPosition + index, record.priority, record.day, record.month, record.year, record.start, record.end, record.description) for index, record in enumerate(records))
+			);
+		
+		this._nextPosition += len(records);
+		this.descLength = max([this.descLength] + [len(record.description) for record in records]);
+		
+		return len(records);
+	
+	
+	
+	
+	# Close the database
+	def close(this) -> None:
+		"""
+		Closes the connection to the database
+		"""
+		this.connection.close();
@@ -0,0 +1,154 @@
+# All of our imports, these are built-in libraries (numpy is optional, it's used if it's installed)
+from __future__ import annotations  # Type hinting
+from typing import Sequence			# Type hinting
+from array import array				# Holds the reason codes when numpy isn't installed
+
+from main import MONTHS
+
+try:
+	import numpy
+except ImportError:
+	numpy = None;
+
+# Bools that are lowercase are so much nicer
+true = True
+false = False
+
+
+# Reason codes, in the same order the checks are done by Diary._checkAppointment()
+VALID = 0;
+BAD_YEAR = 1;
+BAD_MONTH = 2;
+BAD_DAY = 3;
+BAD_ORDER = 4;
+BAD_START = 5;
+BAD_END = 6;
+PAST_YEAR = 7;
+PAST_MONTH = 8;
+PAST_DAY = 9;
+PAST_HOUR = 10;
+
+# The error message for each reason code, the day message is general as it depends on the month
+REASONS = (
+	None,
+	"Error: Year must be between 10000 and 2022",
+	"Error: Month must be between 1 and 12",
+	"Error: Day is not valid for the month!",
+	"Error: Start time must be before end time!",
+	"Error: Start time must be between 7 and 22!",
+	"Error: End time must be between 7 and 22!",
+	"Error: Year must be greater than or equal to the current year!",
+	"Error: Month must be greater than or equal to the current month!",
+	"Error: Day must be greater than or equal to the current day!",
+	"Error: Hour must be greater than the current hour!"
+);
+
+# Days in each month, indexed by month (index 0 is a placeholder), for normal and leap years
+DAYS_IN_MONTH = (0,) + tuple(MONTHS[month]["days"] for month in range(1, 13));
+LEAP_DAYS_IN_MONTH = (0,) + tuple(29 if(month == 2) else MONTHS[month]["days"] for month in range(1, 13));
+
+
+
+# Validate whole columns of appointments at once
+def validateColumns(day: Sequence[int], month: Sequence[int], year: Sequence[int], start: Sequence[int], end: Sequence[int], currTime: dict):
+	"""
+	Checks every row the same way Diary._checkDate(), _checkTime() and _checkFutureTime() do
+	
+	Uses numpy if it's installed, otherwise a plain loop over lookup tables.
+	Nothing is printed, the first check each row fails is given as a reason code instead.
+	
+	Args:
+		day (Sequence[int]): The day of each row
+		month (Sequence[int]): The month of each row
+		year (Sequence[int]): The year of each row
+		start (Sequence[int]): The start time of each row
+		end (Sequence[int]): The end time of each row
+		currTime (dict): The current time from Diary._getCurrentTime()
+	
+	Returns:
+		numpy.ndarray | array: A reason code for each row, VALID (0) if the row passed every check
+	"""
+	if(numpy is not None):
+		return _validateNumpy(day, month, year, start, end, currTime);
+	
+	return _validateLoop(day, month, year, start, end, currTime);
+
+
+
+
+# The numpy version, every check is done on the whole column at once
+def _validateNumpy(day, month, year, start, end, currTime: dict):
+	day = numpy.asarray(day, dtype=numpy.int64);
+	month = numpy.asarray(month, dtype=numpy.int64);
+	year = numpy.asarray(year, dtype=numpy.int64);
+	start = numpy.asarray(start, dtype=numpy.int64);
+	end = numpy.asarray(end, dtype=numpy.int64);
+	
+	leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0));
+	safeMonth = numpy.clip(month, 0, 12);  # So months out of range can still be looked up, they fail before the day is checked
+	daysInMonth = numpy.where(leap, numpy.array(LEAP_DAYS_IN_MONTH)[safeMonth], numpy.array(DAYS_IN_MONTH)[safeMonth]);
+	
+	sameYear = year == currTime["year"];
+	sameMonth = sameYear & (month == currTime["month"]);
+	sameDay = sameMonth & (day == currTime["day"]);
+	
+	# The checks go from last to first, so the first check a row fails is the one that is kept
+	checks = (
+		(sameDay & (start <= currTime["hour"]), PAST_HOUR),
+		(sameMonth & (day < currTime["day"]), PAST_DAY),
+		(sameYear & (month < currTime["month"]), PAST_MONTH),
+		(year < currTime["year"], PAST_YEAR),
+		((end < 7) | (end > 22), BAD_END),
+		((start < 7) | (start > 22), BAD_START),
+		(start >= end, BAD_ORDER),
+		((day < 1) | (day > daysInMonth), BAD_DAY),
+		((month < 1) | (month > 12), BAD_MONTH),
+		((year < 2022) | (year >= 10000), BAD_YEAR)
+	);
+	
+	codes = numpy.zeros(len(day), dtype=numpy.uint8);
+	for failed, code in checks:
+		codes[failed] = code;
+	
+	return codes;
+
+
+
+
+# The plain python version, one row at a time but with no dictionaries built or messages printed
+def _validateLoop(day, month, year, start, end, currTime: dict) -> array:
+	codes = array("B", bytes(len(day)));
+	currYear = currTime["year"];
+	currMonth = currTime["month"];
+	currDay = currTime["day"];
+	currHour = currTime["hour"];
+	
+	for row in range(len(day)):
+		d = day[row];
+		m = month[row];
+		y = year[row];
+		s = start[row];
+		e = end[row];
+		
+		if(not 10000 > y >= 2022):
+			codes[row] = BAD_YEAR;
+		elif(not 1 <= m <= 12):
+			codes[row] = BAD_MONTH;
+		elif(not 1 <= d <= (LEAP_DAYS_IN_MONTH if(y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)) else DAYS_IN_MONTH)[m]):
+			codes[row] = BAD_DAY;
+		elif(s >= e):
+			codes[row] = BAD_ORDER;
+		elif(not 7 <= s <= 22):
+			codes[row] = BAD_START;
+		elif(not 7 <= e <= 22):
+			codes[row] = BAD_END;
+		elif(y < currYear):
+			codes[row] = PAST_YEAR;
+		elif(y == currYear and m < currMonth):
+			codes[row] = PAST_MONTH;
+		elif(y == currYear and m == currMonth and d < currDay):
+			codes[row] = PAST_DAY;
+		elif(y == currYear and m == currMonth and d == currDay and s <= currHour):
+			codes[row] = PAST_HOUR;
+	
+	return codes;